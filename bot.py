@@ -13,6 +13,7 @@ from telegram.ext import (
     ContextTypes,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
     filters
 )
 
@@ -43,6 +44,12 @@ from handlers.lobby_handler import lobby_handler
 from handlers.game_handler import game_handler
 from handlers.voting_handler import voting_handler
 from utils.helpers import get_team_name
+from utils.muted_chats import muted_chats
+from utils.team_chat import team_chat_relay
+from utils.game_registry import game_registry
+from utils.chat_ownership import chat_ownership
+from handlers.update_router import update_router
+from utils.keyboards import bot_keyboards
 from models.character import Character
 from utils.constants import MBTI_TYPES, ZODIAC_SIGNS
 
@@ -86,10 +93,7 @@ MBTI နှင့် Zodiac signs ကို အခြေခံထားတဲ့
 
 🎯 **Game ကစားချင်ရင် group chat မှာ ထည့်ပြီး စတင်ပါ!**
 """
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("➕ Add to Group", url=f"https://t.me/{context.bot.username}?startgroup=true")],
-            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
-        ])
+        keyboard = bot_keyboards.add_to_group
         await update.message.reply_text(welcome_message, reply_markup=keyboard, parse_mode='Markdown')
     
     else:
@@ -116,7 +120,7 @@ Game ပြီးမှ `/start` ကို ထပ်ပို့ပြီး gam
             return
         
         # Check if lobby is already open
-        lobby_count = await db_manager.get_lobby_count()
+        lobby_count = lobby_handler.get_player_count(chat_id)
         if lobby_count > 0:
             # Lobby exists - don't show New Game button
             logger.warning(f"Channel {chat_id} has active lobby with {lobby_count} players, not showing New Game button")
@@ -149,9 +153,7 @@ MBTI နှင့် Zodiac signs ကို အခြေခံထားတဲ့
 
 Ready to play? 🎉
 """
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🎮 New Game", callback_data="start_newgame")]
-        ])
+        keyboard = bot_keyboards.new_game
         await update.message.reply_text(welcome_message, reply_markup=keyboard, parse_mode='Markdown')
 
 
@@ -167,15 +169,7 @@ Game ကစားနည်း၊ rules နှင့် features များက
 အောက်က ခလုတ်များကို နှိပ်ပြီး လေ့လာပါ:
 """
     
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🎮 ဘယ်လို စတင်မလဲ?", callback_data="help_start")],
-        [InlineKeyboardButton("📜 Game Rules", callback_data="help_rules")],
-        [InlineKeyboardButton("🗳️ Voting System", callback_data="help_voting")],
-        [InlineKeyboardButton("👑 Roles & Characters", callback_data="help_roles")],
-        [InlineKeyboardButton("🏆 Scoring System", callback_data="help_scoring")],
-        [InlineKeyboardButton("⚙️ Commands", callback_data="help_commands")],
-        [InlineKeyboardButton("❓ FAQ", callback_data="help_faq")],
-    ])
+    keyboard = bot_keyboards.help_menu
     
     await update.message.reply_text(help_text, reply_markup=keyboard, parse_mode='Markdown')
 
@@ -191,10 +185,7 @@ async def newgame_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if chat_type == ChatType.PRIVATE:
         # Private chat - Show "Add to Group" button
         logger.warning(f"User {update.effective_user.id} tried to start game in private chat")
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("➕ Add Bot to Group", url=f"https://t.me/{context.bot.username}?startgroup=true")],
-            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
-        ])
+        keyboard = bot_keyboards.add_bot_to_group
         await update.message.reply_text(
             "⚠️ **Game ကို group chat မှာသာ စတင်နိုင်ပါတယ်!**\n\n"
             "Bot ကို သင့် group မှာ ထည့်ပြီး `/newgame` ကို ထပ်စမ်းကြည့်ပါ။",
@@ -219,7 +210,7 @@ async def newgame_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Check if lobby is already open (players waiting to join)
-    lobby_count = await db_manager.get_lobby_count()
+    lobby_count = lobby_handler.get_player_count(chat_id)
     if lobby_count > 0:
         logger.warning(f"Channel {chat_id} already has an active lobby with {lobby_count} players")
         await update.message.reply_text(
@@ -331,35 +322,15 @@ async def cancelgame_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Update game status to cancelled
     await db_manager.update_game_status(game_id, GAME_STATUS['CANCELLED'])
     
-    # Cleanup game data
-    if game_id in voting_handler.active_votes:
-        del voting_handler.active_votes[game_id]
-        logger.debug(f"Cleared votes for game {game_id}")
-    
-    if game_id in voting_handler.voting_messages:
-        del voting_handler.voting_messages[game_id]
-        logger.debug(f"Cleared voting messages for game {game_id}")
-    
-    if game_id in voting_handler.round_timers:
-        del voting_handler.round_timers[game_id]
-        logger.debug(f"Cleared round timers for game {game_id}")
-    
-    # Clear player teams
-    players_to_remove = [uid for uid, data in game_handler.player_teams.items() 
-                        if data['game_id'] == game_id]
-    for uid in players_to_remove:
-        del game_handler.player_teams[uid]
-    logger.debug(f"Cleared team info for {len(players_to_remove)} players")
-    
-    # Clear active game
-    if game_id in game_handler.active_games:
-        del game_handler.active_games[game_id]
-        logger.debug(f"Removed game {game_id} from active games")
+    # Cleanup game data (votes, rounds, teams, theme)
+    game_registry.release(game_id)
+    muted_chats.unmute(chat_id, f'game:{game_id}')
     
     # Clear lobby queue if in lobby state
     if game_status == GAME_STATUS['LOBBY']:
         await lobby_handler.clear_lobby(chat_id)
         logger.debug(f"Cleared lobby queue for chat {chat_id}")
+    await chat_ownership.release(chat_id)
     
     # Announce cancellation
     username = update.effective_user.username or update.effective_user.first_name or f"User_{user_id}"
@@ -405,16 +376,8 @@ async def char_name_received(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     context.user_data['char_name'] = name
     
-    # Create MBTI selection buttons (4x4 grid)
-    keyboard = []
-    for i in range(0, len(MBTI_TYPES), 4):
-        row = [
-            InlineKeyboardButton(mbti, callback_data=f"mbti_{mbti}")
-            for mbti in MBTI_TYPES[i:i+4]
-        ]
-        keyboard.append(row)
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    # MBTI selection buttons (4x4 grid)
+    reply_markup = bot_keyboards.mbti_picker
     
     await update.message.reply_text(
         f"✅ Name: **{name}**\n\n"
@@ -440,16 +403,8 @@ async def char_mbti_received(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     context.user_data['char_mbti'] = mbti
     
-    # Create Zodiac selection buttons (3x4 grid)
-    keyboard = []
-    for i in range(0, len(ZODIAC_SIGNS), 3):
-        row = [
-            InlineKeyboardButton(zodiac, callback_data=f"zodiac_{zodiac}")
-            for zodiac in ZODIAC_SIGNS[i:i+3]
-        ]
-        keyboard.append(row)
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    # Zodiac selection buttons (3x4 grid)
+    reply_markup = bot_keyboards.zodiac_picker
     
     await query.edit_message_text(
         f"✅ Name: **{context.user_data['char_name']}**\n"
@@ -683,15 +638,7 @@ Game ကစားနည်း၊ rules နှင့် features များက
 အောက်က ခလုတ်များကို နှိပ်ပြီး လေ့လာပါ:
 """
     
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🎮 ဘယ်လို စတင်မလဲ?", callback_data="help_start")],
-        [InlineKeyboardButton("📜 Game Rules", callback_data="help_rules")],
-        [InlineKeyboardButton("🗳️ Voting System", callback_data="help_voting")],
-        [InlineKeyboardButton("👑 Roles & Characters", callback_data="help_roles")],
-        [InlineKeyboardButton("🏆 Scoring System", callback_data="help_scoring")],
-        [InlineKeyboardButton("⚙️ Commands", callback_data="help_commands")],
-        [InlineKeyboardButton("❓ FAQ", callback_data="help_faq")],
-    ])
+    keyboard = bot_keyboards.help_menu
     
     await query.edit_message_text(help_text, reply_markup=keyboard, parse_mode='Markdown')
 
@@ -1030,9 +977,7 @@ A: Multiple winners ဖြစ်နိုင်ပါတယ်။ Both teams win
         return
     
     # Create back button
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🔙 Back to Help Menu", callback_data="show_help")]
-    ])
+    keyboard = bot_keyboards.back_to_help
     
     full_text = f"**{page['title']}**\n{page['content']}"
     
@@ -1132,7 +1077,7 @@ async def start_newgame_callback_handler(update: Update, context: ContextTypes.D
         return
     
     # Check if lobby is already open
-    lobby_count = await db_manager.get_lobby_count()
+    lobby_count = lobby_handler.get_player_count(chat_id)
     if lobby_count > 0:
         logger.warning(f"Channel {chat_id} already has an active lobby with {lobby_count} players")
         await query.answer(
@@ -1196,30 +1141,10 @@ async def group_message_filter(update: Update, context: ContextTypes.DEFAULT_TYP
     if update.message.from_user.is_bot:
         return
     
-    # Check if there's an active game in this chat
-    has_active_game = False
-    for game_id, game_data in game_handler.active_games.items():
-        if game_data['chat_id'] == chat_id:
-            has_active_game = True
-            break
-    
-    # Check if there's an active lobby
-    lobby_count = await db_manager.get_lobby_count()
-    has_active_lobby = lobby_count > 0
-    
-    # If game or lobby is active, delete user messages
-    if has_active_game or has_active_lobby:
-        try:
-            await update.message.delete()
-            logger.debug(f"Deleted message from user {user_id} in chat {chat_id} (game/lobby active)")
-        except BadRequest as e:
-            # Bot doesn't have delete permissions or message is too old
-            if "Message can't be deleted" in str(e):
-                logger.debug(f"Cannot delete message in chat {chat_id} (missing permissions)")
-            else:
-                logger.warning(f"Failed to delete message: {e}")
-        except Exception as e:
-            logger.warning(f"Failed to delete message: {e}")
+    # O(1) in-memory check, maintained by lobby/game lifecycle (no DB query)
+    if muted_chats.is_muted(chat_id):
+        muted_chats.queue_delete(context.bot, chat_id, update.message.message_id)
+        logger.debug(f"Queued deletion of message from user {user_id} in chat {chat_id} (game/lobby active)")
 
 
 # ==================== Team Chat Handler ====================
@@ -1248,27 +1173,12 @@ async def team_chat_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Get team members (exclude sender)
     team_players = team_info['team_players']
-    team_id = team_info['team_id']
     team_name = get_team_name(team_players)
     
-    # Format message with sender info (no Markdown to avoid parsing errors)
-    formatted_message = f"💬 {team_name} - by {username}\n\n{message_text}"
-    
-    # Send to all team members except sender
-    sent_count = 0
-    for player in team_players:
-        recipient_id = player.get('user_id')
-        if recipient_id != user_id:
-            try:
-                await context.bot.send_message(
-                    chat_id=recipient_id,
-                    text=formatted_message
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send team chat to user {recipient_id}: {e}")
-    
-    logger.debug(f"Team chat forwarded to {sent_count} team members")
+    # Batched, concurrent fan-out to everyone except the sender
+    team_chat_relay.relay(
+        context.bot, user_id, username, team_name, team_players, message_text
+    )
 
 
 # ==================== Error Handler ====================
@@ -1325,10 +1235,57 @@ async def post_init(app: Application) -> None:
     await db_manager.init_database()
     logger.info("Database initialized")
     
+    # Cache bot identity and URL keyboards (one get_me for the process)
+    await bot_keyboards.init(app.bot)
+    
+    # Lobby sessions (members, timers) live in memory and don't survive a restart
+    # (with several workers, other workers' lobbies are still live)
+    if not config.MULTI_WORKER:
+        await db_manager.clear_lobby()
+    
+    # Multi-worker mode: receive updates forwarded by other workers
+    await chat_ownership.start(app)
+    
     # Initialize state management tables
     from utils.state_manager import state_manager
     await state_manager.init_state_tables()
     logger.info("State management initialized")
+    
+    # Initialize AI response cache table
+    from services.ai_cache import ai_cache
+    await ai_cache.init_cache_table()
+    
+    # Start draining the durable outbox (failed sends from earlier runs included)
+    from utils.outbox import outbox
+    await outbox.init_outbox_table()
+    outbox.start(app.bot)
+    
+    # Reclaim in-memory state of games that never reached finish_game
+    game_registry.start()
+    
+    # Resume games that were running when the process stopped
+    from handlers.game_recovery import game_recovery
+    await game_recovery.recover(app)
+    
+    # From now on, chats of workers that die are picked up on their next update
+    chat_ownership.on_takeover = lambda chat_id: game_recovery.take_over_chat(app, chat_id)
+    chat_ownership.on_lost = game_recovery.hand_off
+    chat_ownership.live_chats = lambda: set(lobby_handler.sessions) | {
+        game['chat_id'] for game in game_handler.active_games.values()
+    }
+
+
+async def post_shutdown(app: Application) -> None:
+    """Flush pending write-behind state before the process exits"""
+    await game_registry.stop()
+    await chat_ownership.stop()
+    
+    from utils.outbox import outbox
+    await outbox.stop()
+    
+    from utils.state_manager import state_manager
+    await state_manager.close()
+    logger.info("Pending state flushed")
 
 
 def main():
@@ -1339,7 +1296,13 @@ def main():
     logger.info("=" * 50)
     
     # Create application
-    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).post_init(post_init).build()
+    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
+    
+    # Multi-worker mode: hand updates to the worker owning their chat before anything else
+    if config.MULTI_WORKER:
+        if not config.USE_WEBHOOK:
+            logger.warning("MULTI_WORKER needs webhook mode; Telegram allows a single polling consumer")
+        app.add_handler(TypeHandler(Update, update_router.route), group=-1)
     
     # Command handlers
     app.add_handler(CommandHandler("start", start_command))
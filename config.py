@@ -2,6 +2,7 @@
 Configuration file for Telegram Strategy Game
 """
 import os
+import socket
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,6 +13,10 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 
 # Gemini AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 8))  # Max in-flight Gemini calls per process
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', 20))  # Seconds before a Gemini call is abandoned
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', 2048))  # In-memory AI response cache entries
+AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', 30 * 24 * 3600))  # Seconds; 0 = never expire
 
 # Game Configuration
 MIN_PLAYERS = int(os.getenv('MIN_PLAYERS', 6))  # Minimum 6 players
@@ -21,6 +26,7 @@ LOBBY_TIMEOUT = int(os.getenv('LOBBY_TIMEOUT', 60))  # 60 seconds to join
 ROUND_TIME = int(os.getenv('ROUND_TIME', 60))
 NUM_ROUNDS = 5
 CHARACTERS_PER_VOTING = 5  # 5 characters + 1 dice option
+STATE_FLUSH_DELAY = float(os.getenv('STATE_FLUSH_DELAY', 0.5))  # Seconds to coalesce state writes before flushing
 
 # Legacy (for backward compatibility)
 LOBBY_SIZE = int(os.getenv('LOBBY_SIZE', 9))  # Default if not using dynamic
@@ -48,6 +54,29 @@ LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')  # DEBUG, INFO, WARNING, ERROR, CRITI
 LOG_DIR = os.getenv('LOG_DIR', 'logs')
 ENABLE_CONSOLE_LOGS = os.getenv('ENABLE_CONSOLE_LOGS', 'true').lower() == 'true'
 
+# Telegram Rate Limits (Telegram allows ~30 msg/s overall, ~1 msg/s per private chat, 20 msg/min per group)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))  # Messages/s across all chats
+TELEGRAM_PRIVATE_RATE = float(os.getenv('TELEGRAM_PRIVATE_RATE', 1))  # Messages/s per private chat
+TELEGRAM_GROUP_RATE_PER_MIN = float(os.getenv('TELEGRAM_GROUP_RATE_PER_MIN', 20))  # Messages/min per group
+
+# Outbox (durable retry of failed sends)
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 2))  # Background tasks draining the outbox
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 6))  # Attempts before a message is dead-lettered
+OUTBOX_MAX_AGE = int(os.getenv('OUTBOX_MAX_AGE', ROUND_TIME))  # Default seconds a failed send stays deliverable
+
+# In-memory game state lifetime (reclaims games whose round task crashed or was cancelled)
+GAME_STATE_TTL = int(os.getenv('GAME_STATE_TTL', 3600))  # Seconds without activity before a game's state is dropped
+GAME_SWEEP_INTERVAL = int(os.getenv('GAME_SWEEP_INTERVAL', 300))  # Seconds between sweeps
+
+# Crash recovery
+RECOVERY_MAX_AGE = int(os.getenv('RECOVERY_MAX_AGE', 900))  # Games idle longer than this are cancelled, not resumed
+
+# Multi-worker mode (several processes behind one webhook; each chat owned by one worker)
+MULTI_WORKER = os.getenv('MULTI_WORKER', 'false').lower() == 'true'
+WORKER_ID = os.getenv('WORKER_ID', f"{socket.gethostname()}-{os.getpid()}")  # Unique per process
+CHAT_LEASE_TTL = int(os.getenv('CHAT_LEASE_TTL', 30))  # Seconds before a dead worker's chats fail over
+CHAT_IDLE_TTL = int(os.getenv('CHAT_IDLE_TTL', 300))  # Seconds an idle chat (no game/lobby) stays on its worker
+
 # Game Status Constants
 GAME_STATUS = {
     'LOBBY': 'lobby',
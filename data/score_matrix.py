@@ -0,0 +1,110 @@
+"""
+Precompiled Score Matrix
+Flattens MBTI_SCORES / ZODIAC_SCORES into index-addressed tables at import
+so scoring is a single array lookup instead of nested string-keyed dicts
+"""
+from array import array
+from typing import Dict, List, Tuple, Iterable
+from data.full_scores import MBTI_SCORES, ZODIAC_SCORES
+from utils.constants import MBTI_TYPES, ZODIAC_SIGNS
+
+# Score used when a role, MBTI type or zodiac sign is not in the tables
+DEFAULT_SCORE = 5
+
+# Weighting applied to the two component scores (60% MBTI, 40% Zodiac)
+MBTI_WEIGHT = 0.6
+ZODIAC_WEIGHT = 0.4
+
+# Index maps. The last slot of every axis is a "default" row/column filled
+# with DEFAULT_SCORE, so unknown keys still resolve with one lookup.
+ROLE_NAMES: List[str] = sorted(set(MBTI_SCORES) | set(ZODIAC_SCORES))
+ROLE_INDEX: Dict[str, int] = {name: i for i, name in enumerate(ROLE_NAMES)}
+MBTI_INDEX: Dict[str, int] = {mbti: i for i, mbti in enumerate(MBTI_TYPES)}
+ZODIAC_INDEX: Dict[str, int] = {zodiac: i for i, zodiac in enumerate(ZODIAC_SIGNS)}
+
+DEFAULT_ROLE = len(ROLE_NAMES)
+DEFAULT_MBTI = len(MBTI_TYPES)
+DEFAULT_ZODIAC = len(ZODIAC_SIGNS)
+
+NUM_ROLES = DEFAULT_ROLE + 1
+NUM_MBTI = DEFAULT_MBTI + 1
+NUM_ZODIAC = DEFAULT_ZODIAC + 1
+
+
+def combine_scores(mbti_score: int, zodiac_score: int) -> int:
+    """Weighted final score clamped to 1-10"""
+    final_score = int((mbti_score * MBTI_WEIGHT) + (zodiac_score * ZODIAC_WEIGHT))
+    return max(1, min(10, final_score))
+
+
+def _build_tables() -> Tuple[array, array, array]:
+    """Build flat component and final score tables"""
+    mbti_table = array('B', [DEFAULT_SCORE]) * (NUM_ROLES * NUM_MBTI)
+    zodiac_table = array('B', [DEFAULT_SCORE]) * (NUM_ROLES * NUM_ZODIAC)
+
+    for role_name, role_idx in ROLE_INDEX.items():
+        mbti_scores = MBTI_SCORES.get(role_name, {})
+        for mbti, mbti_idx in MBTI_INDEX.items():
+            mbti_table[role_idx * NUM_MBTI + mbti_idx] = mbti_scores.get(mbti, DEFAULT_SCORE)
+
+        zodiac_scores = ZODIAC_SCORES.get(role_name, {})
+        for zodiac, zodiac_idx in ZODIAC_INDEX.items():
+            zodiac_table[role_idx * NUM_ZODIAC + zodiac_idx] = zodiac_scores.get(zodiac, DEFAULT_SCORE)
+
+    # Final score tensor: role x MBTI x zodiac
+    final_table = array('B', bytes(NUM_ROLES * NUM_MBTI * NUM_ZODIAC))
+    for role_idx in range(NUM_ROLES):
+        for mbti_idx in range(NUM_MBTI):
+            mbti_score = mbti_table[role_idx * NUM_MBTI + mbti_idx]
+            base = (role_idx * NUM_MBTI + mbti_idx) * NUM_ZODIAC
+            for zodiac_idx in range(NUM_ZODIAC):
+                zodiac_score = zodiac_table[role_idx * NUM_ZODIAC + zodiac_idx]
+                final_table[base + zodiac_idx] = combine_scores(mbti_score, zodiac_score)
+
+    return mbti_table, zodiac_table, final_table
+
+
+MBTI_TABLE, ZODIAC_TABLE, FINAL_TABLE = _build_tables()
+
+
+def role_index(role_name: str) -> int:
+    """Get table index for a role (default row if unknown)"""
+    return ROLE_INDEX.get(role_name, DEFAULT_ROLE)
+
+
+def lookup(role_name: str, mbti: str, zodiac: str) -> Tuple[int, int, int]:
+    """Look up a single score
+
+    Returns:
+        Tuple of (final_score, mbti_score, zodiac_score)
+    """
+    r = ROLE_INDEX.get(role_name, DEFAULT_ROLE)
+    m = MBTI_INDEX.get(mbti, DEFAULT_MBTI)
+    z = ZODIAC_INDEX.get(zodiac, DEFAULT_ZODIAC)
+    return (
+        FINAL_TABLE[(r * NUM_MBTI + m) * NUM_ZODIAC + z],
+        MBTI_TABLE[r * NUM_MBTI + m],
+        ZODIAC_TABLE[r * NUM_ZODIAC + z]
+    )
+
+
+def score_many(characters: Iterable, roles: Iterable[str]) -> List[List[int]]:
+    """Final scores for every character x role pair
+
+    Args:
+        characters: Objects with mbti and zodiac attributes
+        roles: Role names
+
+    Returns:
+        Matrix (list of rows) where result[i][j] is the score of
+        characters[i] in roles[j]
+    """
+    role_offsets = [ROLE_INDEX.get(role, DEFAULT_ROLE) * NUM_MBTI for role in roles]
+    table = FINAL_TABLE
+
+    matrix = []
+    for character in characters:
+        m = MBTI_INDEX.get(character.mbti, DEFAULT_MBTI)
+        z = ZODIAC_INDEX.get(character.zodiac, DEFAULT_ZODIAC)
+        matrix.append([table[(offset + m) * NUM_ZODIAC + z] for offset in role_offsets])
+    return matrix
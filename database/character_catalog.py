@@ -0,0 +1,77 @@
+"""
+In-process character catalog
+Holds the whole characters table in memory so that random sampling,
+exclusion and dice picks need no database round trips
+"""
+import random
+import logging
+from typing import Dict, List, Optional, Iterable
+from models.character import Character
+
+logger = logging.getLogger(__name__)
+
+
+class CharacterCatalog:
+    """Compact id-indexed store of all characters
+
+    The catalog is loaded once from the database and then refreshed
+    incrementally whenever new rows are written (characters are never
+    updated or deleted by the bot, so ``id > max_id`` is enough to catch up).
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, Character] = {}
+        self._ids: List[int] = []  # Sampling pool, kept in insertion order
+        self.max_id = 0
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, character_id: int) -> bool:
+        return character_id in self._by_id
+
+    def load(self, characters: Iterable[Character]):
+        """Replace catalog contents with a full snapshot"""
+        self._by_id = {}
+        self._ids = []
+        self.max_id = 0
+        for character in characters:
+            self.upsert(character)
+        self.loaded = True
+        logger.info(f"Character catalog loaded: {len(self._ids)} characters")
+
+    def upsert(self, character: Character):
+        """Add or replace a single character"""
+        if character.id is None:
+            return
+        if character.id not in self._by_id:
+            self._ids.append(character.id)
+        self._by_id[character.id] = character
+        if character.id > self.max_id:
+            self.max_id = character.id
+
+    def get(self, character_id: int) -> Optional[Character]:
+        """Get character by ID"""
+        return self._by_id.get(character_id)
+
+    def all(self) -> List[Character]:
+        """Get all characters"""
+        return [self._by_id[char_id] for char_id in self._ids]
+
+    def sample(self, n: int, exclude_ids: Iterable[int] = None) -> List[Character]:
+        """Get up to n distinct random characters, skipping excluded IDs"""
+        if exclude_ids:
+            excluded = set(exclude_ids)
+            pool = [char_id for char_id in self._ids if char_id not in excluded]
+        else:
+            pool = self._ids
+
+        picked = random.sample(pool, min(n, len(pool)))
+        return [self._by_id[char_id] for char_id in picked]
+
+    def choice(self) -> Optional[Character]:
+        """Get one random character (dice roll)"""
+        if not self._ids:
+            return None
+        return self._by_id[random.choice(self._ids)]
@@ -4,11 +4,11 @@ Database manager for PostgreSQL operations (Neon)
 import asyncpg
 import json
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
 from models.character import Character
 from models.game import Game, GameRound
 from models.player import Player
+from database.character_catalog import CharacterCatalog
 import config
 
 # Setup logger
@@ -21,6 +21,8 @@ class DatabaseManager:
     def __init__(self, database_url: str = None):
         self.database_url = database_url or config.DATABASE_URL
         self.pool = None
+        # In-memory copy of the characters table (loaded in init_database)
+        self.character_catalog = CharacterCatalog()
     
     async def create_pool(self):
         """Create database connection pool with proper timeout settings"""
@@ -118,10 +120,42 @@ class DatabaseManager:
                     id SERIAL PRIMARY KEY,
                     user_id BIGINT NOT NULL UNIQUE,
                     username TEXT,
+                    chat_id BIGINT,
                     joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
             
+            # Lobbies are per chat (older deployments lack the column)
+            await conn.execute('''
+                ALTER TABLE lobby_queue ADD COLUMN IF NOT EXISTS chat_id BIGINT
+            ''')
+            await conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_lobby_queue_chat
+                ON lobby_queue(chat_id, joined_at)
+            ''')
+            
+            # Round progress for crash recovery (older deployments lack the columns)
+            await conn.execute('''
+                ALTER TABLE games ADD COLUMN IF NOT EXISTS round_started_at TIMESTAMP
+            ''')
+            await conn.execute('''
+                ALTER TABLE games ADD COLUMN IF NOT EXISTS finalized_round INTEGER DEFAULT 0
+            ''')
+            
+            # Write-ahead vote log of in-progress games (seq keeps first-vote order)
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS round_votes (
+                    seq BIGSERIAL,
+                    game_id INTEGER NOT NULL,
+                    round_number INTEGER NOT NULL,
+                    team_id INTEGER NOT NULL,
+                    user_id BIGINT NOT NULL,
+                    character_id INTEGER NOT NULL,
+                    FOREIGN KEY (game_id) REFERENCES games (id) ON DELETE CASCADE,
+                    PRIMARY KEY (game_id, round_number, user_id)
+                )
+            ''')
+            
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
@@ -129,9 +163,52 @@ class DatabaseManager:
         finally:
             # Always release connection back to pool
             await self.pool.release(conn)
+        
+        # Load character catalog once; later writes refresh it incrementally
+        await self.load_character_catalog()
     
     # ==================== Character Operations ====================
     
+    @staticmethod
+    def _row_to_character(row) -> Character:
+        """Build Character from a characters table row"""
+        return Character(
+            id=row['id'],
+            name=row['name'],
+            mbti=row['mbti'],
+            zodiac=row['zodiac'],
+            description=row['description'],
+            personality_traits=row['personality_traits']
+        )
+    
+    async def load_character_catalog(self):
+        """Load the whole characters table into the in-memory catalog"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('SELECT * FROM characters ORDER BY id')
+        self.character_catalog.load(self._row_to_character(row) for row in rows)
+    
+    async def refresh_character_catalog(self) -> int:
+        """Pull characters written since the last load (e.g. by add_new_characters.py)
+        
+        Returns:
+            Number of characters added to the catalog
+        """
+        if not self.character_catalog.loaded:
+            await self.load_character_catalog()
+            return len(self.character_catalog)
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                'SELECT * FROM characters WHERE id > $1 ORDER BY id',
+                self.character_catalog.max_id
+            )
+        for row in rows:
+            self.character_catalog.upsert(self._row_to_character(row))
+        
+        if rows:
+            logger.info(f"Character catalog refreshed: +{len(rows)} (total {len(self.character_catalog)})")
+        return len(rows)
+    
     async def add_character(self, character: Character) -> int:
         """Add a new character"""
         logger.debug(f"Adding character: {character.name} (MBTI: {character.mbti}, Zodiac: {character.zodiac})")
@@ -143,10 +220,25 @@ class DatabaseManager:
                 character.description, character.personality_traits
             )
             logger.info(f"Character added successfully: {character.name} (ID: {char_id})")
-            return char_id
+        
+        if self.character_catalog.loaded:
+            self.character_catalog.upsert(Character(
+                id=char_id,
+                name=character.name,
+                mbti=character.mbti,
+                zodiac=character.zodiac,
+                description=character.description,
+                personality_traits=character.personality_traits
+            ))
+        return char_id
     
     async def get_character(self, character_id: int) -> Optional[Character]:
         """Get character by ID"""
+        if self.character_catalog.loaded:
+            character = self.character_catalog.get(character_id)
+            if character:
+                return character
+        
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
                 'SELECT * FROM characters WHERE id = $1',
@@ -154,22 +246,50 @@ class DatabaseManager:
             )
             
             if row:
-                return Character(
-                    id=row['id'],
-                    name=row['name'],
-                    mbti=row['mbti'],
-                    zodiac=row['zodiac'],
-                    description=row['description'],
-                    personality_traits=row['personality_traits']
-                )
+                character = self._row_to_character(row)
+                if self.character_catalog.loaded:
+                    self.character_catalog.upsert(character)
+                return character
             return None
     
+    async def get_characters(self, character_ids: List[int]) -> Dict[int, Character]:
+        """Get many characters by ID (catalog first, one query for the rest)
+        
+        Returns:
+            Dict mapping character_id to Character (missing IDs are omitted)
+        """
+        wanted = {char_id for char_id in character_ids if char_id}
+        found = {}
+        if self.character_catalog.loaded:
+            for char_id in wanted:
+                character = self.character_catalog.get(char_id)
+                if character:
+                    found[char_id] = character
+        
+        missing = list(wanted - found.keys())
+        if missing:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    'SELECT * FROM characters WHERE id = ANY($1::int[])',
+                    missing
+                )
+            for row in rows:
+                character = self._row_to_character(row)
+                found[character.id] = character
+                if self.character_catalog.loaded:
+                    self.character_catalog.upsert(character)
+        
+        return found
+    
     async def get_random_characters(self, n: int = 4, exclude_ids: List[int] = None) -> List[Character]:
         """Get n random characters, optionally excluding specified IDs"""
         if exclude_ids is None:
             exclude_ids = []
         
         logger.debug(f"Fetching {n} random characters, excluding {len(exclude_ids)} IDs")
+        if self.character_catalog.loaded:
+            return self.character_catalog.sample(n, exclude_ids)
+        
         async with self.pool.acquire() as conn:
             if exclude_ids:
                 rows = await conn.fetch(
@@ -182,53 +302,56 @@ class DatabaseManager:
                     n
                 )
             
-            characters = []
-            for row in rows:
-                characters.append(Character(
-                    id=row['id'],
-                    name=row['name'],
-                    mbti=row['mbti'],
-                    zodiac=row['zodiac'],
-                    description=row['description'],
-                    personality_traits=row['personality_traits']
-                ))
-            
-            return characters
+            return [self._row_to_character(row) for row in rows]
+    
+    async def get_random_character(self) -> Optional[Character]:
+        """Get a single random character (used for dice votes)"""
+        if self.character_catalog.loaded:
+            return self.character_catalog.choice()
+        
+        characters = await self.get_random_characters(1)
+        return characters[0] if characters else None
     
     async def get_all_characters(self) -> List[Character]:
         """Get all characters"""
+        if self.character_catalog.loaded:
+            return self.character_catalog.all()
+        
         async with self.pool.acquire() as conn:
             rows = await conn.fetch('SELECT * FROM characters')
-            
-            characters = []
-            for row in rows:
-                characters.append(Character(
-                    id=row['id'],
-                    name=row['name'],
-                    mbti=row['mbti'],
-                    zodiac=row['zodiac'],
-                    description=row['description'],
-                    personality_traits=row['personality_traits']
-                ))
-            
-            return characters
+            return [self._row_to_character(row) for row in rows]
     
     async def get_character_count(self) -> int:
-        """Get total number of characters"""
+        """Get total number of characters
+        
+        Also catches the catalog up if rows were written by another process.
+        """
         async with self.pool.acquire() as conn:
             count = await conn.fetchval('SELECT COUNT(*) FROM characters')
-            return count if count else 0
+            count = count if count else 0
+        
+        if self.character_catalog.loaded and count != len(self.character_catalog):
+            await self.refresh_character_catalog()
+        return count
     
     # ==================== Lobby Operations ====================
     
-    async def add_to_lobby(self, user_id: int, username: str) -> bool:
-        """Add player to lobby queue"""
-        logger.debug(f"Adding player to lobby: {username} (ID: {user_id})")
+    async def add_to_lobby(self, user_id: int, username: str, chat_id: int = None) -> bool:
+        """Add player to a chat's lobby queue
+        
+        A player can only be queued in one lobby at a time (user_id is unique).
+        
+        Args:
+            user_id: Telegram user ID
+            username: Display name
+            chat_id: Group chat the lobby belongs to
+        """
+        logger.debug(f"Adding player to lobby: {username} (ID: {user_id}, chat: {chat_id})")
         try:
             async with self.pool.acquire() as conn:
                 await conn.execute(
-                    'INSERT INTO lobby_queue (user_id, username) VALUES ($1, $2)',
-                    user_id, username
+                    'INSERT INTO lobby_queue (user_id, username, chat_id) VALUES ($1, $2, $3)',
+                    user_id, username, chat_id
                 )
                 logger.info(f"Player added to lobby: {username}")
                 return True
@@ -251,29 +374,64 @@ class DatabaseManager:
                 logger.warning(f"Player not in lobby: User ID {user_id}")
             return removed
     
-    async def get_lobby_players(self) -> List[Dict[str, Any]]:
-        """Get all players in lobby"""
+    async def remove_many_from_lobby(self, user_ids: List[int]) -> int:
+        """Remove several players from the lobby queue in one statement
+        
+        Returns:
+            Number of players removed
+        """
+        if not user_ids:
+            return 0
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                'SELECT user_id, username FROM lobby_queue ORDER BY joined_at'
+            result = await conn.execute(
+                'DELETE FROM lobby_queue WHERE user_id = ANY($1::bigint[])',
+                list(user_ids)
             )
+        removed = int(result.split()[-1])
+        logger.info(f"Removed {removed} players from lobby")
+        return removed
+    
+    async def get_lobby_players(self, chat_id: int = None) -> List[Dict[str, Any]]:
+        """Get players in a chat's lobby (every lobby if chat_id is None)"""
+        async with self.pool.acquire() as conn:
+            if chat_id is None:
+                rows = await conn.fetch(
+                    'SELECT user_id, username, joined_at FROM lobby_queue ORDER BY joined_at'
+                )
+            else:
+                rows = await conn.fetch(
+                    'SELECT user_id, username, joined_at FROM lobby_queue WHERE chat_id = $1 ORDER BY joined_at',
+                    chat_id
+                )
             
             return [
-                {'user_id': row['user_id'], 'username': row['username']}
+                {'user_id': row['user_id'], 'username': row['username'], 'joined_at': row['joined_at']}
                 for row in rows
             ]
     
-    async def get_lobby_count(self) -> int:
-        """Get number of players in lobby"""
+    async def get_lobby_count(self, chat_id: int = None) -> int:
+        """Get number of players in a chat's lobby (every lobby if chat_id is None)"""
         async with self.pool.acquire() as conn:
-            count = await conn.fetchval('SELECT COUNT(*) FROM lobby_queue')
+            if chat_id is None:
+                count = await conn.fetchval('SELECT COUNT(*) FROM lobby_queue')
+            else:
+                count = await conn.fetchval(
+                    'SELECT COUNT(*) FROM lobby_queue WHERE chat_id = $1',
+                    chat_id
+                )
             return count if count else 0
     
     async def clear_lobby(self, chat_id: int = None):
-        """Clear all players from lobby"""
+        """Clear a chat's lobby (every lobby if chat_id is None)"""
         logger.info(f"Clearing lobby queue (chat_id: {chat_id})")
         async with self.pool.acquire() as conn:
-            result = await conn.execute('DELETE FROM lobby_queue')
+            if chat_id is None:
+                result = await conn.execute('DELETE FROM lobby_queue')
+            else:
+                result = await conn.execute(
+                    'DELETE FROM lobby_queue WHERE chat_id = $1',
+                    chat_id
+                )
             logger.debug(f"Cleared lobby: {result}")
     
     # ==================== Game Operations ====================
@@ -282,10 +440,12 @@ class DatabaseManager:
         """Create a new game with theme"""
         logger.info(f"Creating new game with theme {theme_id}...")
         async with self.pool.acquire() as conn:
+            # Database clock, like round_started_at, so recovery's staleness
+            # cutoff never mixes the bot host's timezone with the database's
             game_id = await conn.fetchval(
                 '''INSERT INTO games (status, created_at, lobby_message_id, lobby_chat_id, theme_id)
-                   VALUES ($1, $2, $3, $4, $5) RETURNING id''',
-                'lobby', datetime.now(), lobby_message_id, lobby_chat_id, theme_id
+                   VALUES ($1, LOCALTIMESTAMP, $2, $3, $4) RETURNING id''',
+                'lobby', lobby_message_id, lobby_chat_id, theme_id
             )
             return game_id
     
@@ -312,10 +472,10 @@ class DatabaseManager:
         logger.info(f"Game {game_id} status updated to: {status}")
     
     async def update_game_round(self, game_id: int, round_number: int):
-        """Update current round"""
+        """Update current round and stamp its start (used to resume its timer)"""
         async with self.pool.acquire() as conn:
             await conn.execute(
-                'UPDATE games SET current_round = $1 WHERE id = $2',
+                'UPDATE games SET current_round = $1, round_started_at = LOCALTIMESTAMP WHERE id = $2',
                 round_number, game_id
             )
     
@@ -408,6 +568,41 @@ class DatabaseManager:
             )
         logger.info(f"Round selection saved - Game: {game_id}, Round: {round_number}, Team: {team_id}")
     
+    async def save_round_selections(self, game_id: int, round_number: int, role: str,
+                                    selections: Dict[int, Tuple[int, Dict[int, int]]]):
+        """Save every team's selection for a round with one bulk upsert
+        
+        The same statement records the round as finalized, even when no
+        team selected anyone.
+        
+        Args:
+            game_id: Game ID
+            round_number: Round number
+            role: Role name of the round
+            selections: Dict mapping team_id to (character_id, votes)
+        """
+        team_ids = list(selections)
+        async with self.pool.acquire() as conn:
+            # Marks the round finalized in the same statement (crash recovery skips it)
+            await conn.execute(
+                '''WITH finalized AS (
+                       UPDATE games SET finalized_round = GREATEST(finalized_round, $2)
+                       WHERE id = $1
+                   )
+                   INSERT INTO game_rounds 
+                   (game_id, round_number, role, team_id, selected_character_id, votes)
+                   SELECT $1, $2, $3, t.team_id, t.character_id, t.votes
+                   FROM UNNEST($4::int[], $5::int[], $6::text[]) AS t(team_id, character_id, votes)
+                   ON CONFLICT (game_id, round_number, team_id) 
+                   DO UPDATE SET selected_character_id = EXCLUDED.selected_character_id,
+                                 votes = EXCLUDED.votes, role = EXCLUDED.role''',
+                game_id, round_number, role,
+                team_ids,
+                [selections[team_id][0] for team_id in team_ids],
+                [json.dumps(selections[team_id][1]) for team_id in team_ids]
+            )
+        logger.info(f"Round selections saved - Game: {game_id}, Round: {round_number}, Teams: {len(team_ids)}")
+    
     async def get_round_votes(self, game_id: int, round_number: int, team_id: int) -> Optional[Dict[int, int]]:
         """Get individual votes for a round (user_id -> character_id)"""
         async with self.pool.acquire() as conn:
@@ -420,6 +615,23 @@ class DatabaseManager:
                 return json.loads(votes_json)
             return None
     
+    async def get_all_round_votes(self, game_id: int, round_number: int) -> Dict[int, Dict[int, int]]:
+        """Get individual votes of every team in a round with one query
+        
+        Returns:
+            Dict mapping team_id to {user_id: character_id}
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''SELECT team_id, votes FROM game_rounds 
+                   WHERE game_id = $1 AND round_number = $2''',
+                game_id, round_number
+            )
+        return {
+            row['team_id']: {int(user_id): char_id for user_id, char_id in json.loads(row['votes']).items()}
+            for row in rows if row['votes']
+        }
+    
     async def save_round_score(self, game_id: int, round_number: int, 
                                team_id: int, score: int, explanation: str):
         """Save round score and explanation"""
@@ -433,6 +645,70 @@ class DatabaseManager:
             )
         logger.info(f"Round score saved - Game: {game_id}, Round: {round_number}, Team: {team_id}, Score: {score}")
     
+    async def save_round_scores(self, game_id: int, scores: List[Dict[str, Any]]):
+        """Save scores for many rounds/teams in one statement
+        
+        Args:
+            game_id: Game ID
+            scores: List of dicts with round_number, team_id, score, explanation
+        """
+        if not scores:
+            return
+        
+        logger.debug(f"Saving {len(scores)} round scores for game {game_id}")
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                '''UPDATE game_rounds AS gr
+                   SET score = s.score, explanation = s.explanation
+                   FROM UNNEST($2::int[], $3::int[], $4::int[], $5::text[])
+                        AS s(round_number, team_id, score, explanation)
+                   WHERE gr.game_id = $1
+                     AND gr.round_number = s.round_number
+                     AND gr.team_id = s.team_id''',
+                game_id,
+                [s['round_number'] for s in scores],
+                [s['team_id'] for s in scores],
+                [s['score'] for s in scores],
+                [s['explanation'] for s in scores]
+            )
+        logger.info(f"Round scores saved - Game: {game_id}, Entries: {len(scores)}")
+    
+    async def get_game_selections(self, game_id: int) -> Dict[str, Any]:
+        """Get game theme and every round selection with its character in one query
+        
+        Returns:
+            Dict with 'theme_id' and 'rounds' (list of dicts with team_id,
+            round_number, role, character_id and character)
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''SELECT g.theme_id, gr.team_id, gr.round_number, gr.role,
+                          gr.selected_character_id,
+                          c.id, c.name, c.mbti, c.zodiac, c.description, c.personality_traits
+                   FROM games g
+                   LEFT JOIN game_rounds gr ON gr.game_id = g.id
+                   LEFT JOIN characters c ON gr.selected_character_id = c.id
+                   WHERE g.id = $1
+                   ORDER BY gr.team_id, gr.round_number''',
+                game_id
+            )
+        
+        theme_id = (rows[0]['theme_id'] if rows else None) or 1
+        rounds = []
+        for row in rows:
+            if row['team_id'] is None:
+                # Game has no rounds yet (LEFT JOIN placeholder row)
+                continue
+            rounds.append({
+                'team_id': row['team_id'],
+                'round_number': row['round_number'],
+                'role': row['role'],
+                'character_id': row['selected_character_id'],
+                'character': self._row_to_character(row) if row['id'] is not None else None
+            })
+        
+        return {'theme_id': theme_id, 'rounds': rounds}
+    
     async def get_game_rounds(self, game_id: int) -> List[GameRound]:
         """Get all rounds for a game"""
         async with self.pool.acquire() as conn:
@@ -523,6 +799,50 @@ class DatabaseManager:
             logger.debug(f"Team {team_id} has used {len(used_ids)} characters: {used_ids}")
             return used_ids
     
+    async def get_round_candidates(self, game_id: int, team_ids: List[int], n: int = 4,
+                                   disjoint: bool = False) -> Dict[int, List[Character]]:
+        """Pick voting candidates for every team of a round in one round trip
+        
+        Used-character exclusions for all teams come from a single grouped
+        query; sampling then runs against the in-memory character catalog.
+        
+        Args:
+            game_id: Game ID
+            team_ids: Teams that need candidates
+            n: Characters per team
+            disjoint: If True, no character is offered to more than one team
+            
+        Returns:
+            Dict mapping team_id to list of candidate characters
+        """
+        if not self.character_catalog.loaded:
+            await self.load_character_catalog()
+        
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT team_id, array_agg(DISTINCT selected_character_id) AS used_ids
+                FROM game_rounds
+                WHERE game_id = $1 AND selected_character_id IS NOT NULL
+                GROUP BY team_id
+            ''', game_id)
+        used_by_team = {row['team_id']: set(row['used_ids']) for row in rows}
+        
+        candidates = {}
+        taken = set()
+        for team_id in team_ids:
+            exclude_ids = used_by_team.get(team_id, set())
+            if disjoint:
+                exclude_ids = exclude_ids | taken
+            
+            characters = self.character_catalog.sample(n, exclude_ids)
+            candidates[team_id] = characters
+            if disjoint:
+                taken.update(c.id for c in characters)
+            
+            logger.debug(f"Game {game_id} - Team {team_id}: {len(characters)} candidates (excluded {len(exclude_ids)})")
+        
+        return candidates
+    
     async def is_user_in_active_game(self, user_id: int) -> bool:
         """Check if user is already in an active game or lobby
         
@@ -592,6 +912,156 @@ class DatabaseManager:
                 return Game.from_dict(dict(row))
             return None
 
+    
+    # ==================== Crash Recovery Operations ====================
+    
+    async def record_vote(self, game_id: int, round_number: int, team_id: int,
+                          user_id: int, character_id: int):
+        """Append a vote to the write-ahead vote log (a changed vote keeps its place)"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                '''INSERT INTO round_votes (game_id, round_number, team_id, user_id, character_id)
+                   VALUES ($1, $2, $3, $4, $5)
+                   ON CONFLICT (game_id, round_number, user_id)
+                   DO UPDATE SET character_id = EXCLUDED.character_id''',
+                game_id, round_number, team_id, user_id, character_id
+            )
+    
+    async def clear_vote_log(self, game_id: Optional[int] = None):
+        """Drop logged votes of a game, or of every game no longer in progress"""
+        async with self.pool.acquire() as conn:
+            if game_id is not None:
+                await conn.execute('DELETE FROM round_votes WHERE game_id = $1', game_id)
+            else:
+                await conn.execute(
+                    '''DELETE FROM round_votes WHERE game_id IN (
+                           SELECT id FROM games WHERE status != 'in_progress'
+                       )'''
+                )
+    
+    async def cancel_stale_games(self, max_age: float, chat_ids: Optional[List[int]] = None) -> List[int]:
+        """Cancel in-progress games too old to resume
+        
+        A game is stale when its current round (or, before the first round,
+        the game itself) started more than max_age seconds ago, or when a
+        round is running without a recorded start (pre-recovery data).
+        
+        Args:
+            max_age: Seconds of inactivity after which a game is abandoned
+            chat_ids: Only games of these chats (None = all)
+            
+        Returns:
+            IDs of the cancelled games
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''UPDATE games SET status = 'cancelled'
+                   WHERE status = 'in_progress'
+                     AND ($2::bigint[] IS NULL OR lobby_chat_id = ANY($2::bigint[]))
+                     AND ((round_started_at IS NULL AND current_round > 0)
+                          OR COALESCE(round_started_at, created_at)
+                             < LOCALTIMESTAMP - make_interval(secs => $1))
+                   RETURNING id''',
+                float(max_age), chat_ids
+            )
+        return [row['id'] for row in rows]
+    
+    async def get_in_progress_games(self, chat_ids: Optional[List[int]] = None,
+                                    max_age: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get in-progress games with their round progress
+        
+        Args:
+            chat_ids: Only games of these chats (None = all)
+            max_age: Skip games whose current round (or the game, before the
+                first round) started more than max_age seconds ago
+            
+        Returns:
+            List of dicts with id, lobby_chat_id, lobby_message_id, theme_id,
+            current_round, finalized_round and round_elapsed (seconds since
+            the current round started, None if no round started)
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''SELECT id, lobby_chat_id, lobby_message_id, theme_id,
+                          current_round, COALESCE(finalized_round, 0) AS finalized_round,
+                          EXTRACT(EPOCH FROM LOCALTIMESTAMP - round_started_at) AS round_elapsed
+                   FROM games
+                   WHERE status = 'in_progress'
+                     AND ($1::bigint[] IS NULL OR lobby_chat_id = ANY($1::bigint[]))
+                     AND ($2::float8 IS NULL OR COALESCE(round_started_at, created_at)
+                          >= LOCALTIMESTAMP - make_interval(secs => $2::float8))
+                   ORDER BY id''',
+                chat_ids, float(max_age) if max_age is not None else None
+            )
+        return [
+            {**dict(row), 'round_elapsed': float(row['round_elapsed']) if row['round_elapsed'] is not None else None}
+            for row in rows
+        ]
+    
+    async def get_game_chat(self, game_id: int) -> Optional[int]:
+        """Get the group chat a game is played in"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                'SELECT lobby_chat_id FROM games WHERE id = $1', game_id
+            )
+    
+    async def get_player_game_chat(self, user_id: int) -> Optional[int]:
+        """Get the group chat of the in-progress game a user plays in"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                '''SELECT g.lobby_chat_id FROM game_players p
+                   JOIN games g ON g.id = p.game_id
+                   WHERE p.user_id = $1 AND g.status = 'in_progress'
+                   ORDER BY g.id DESC LIMIT 1''',
+                user_id
+            )
+    
+    async def get_players_for_games(self, game_ids: List[int]) -> Dict[int, Dict[int, List[Dict[str, Any]]]]:
+        """Get the teams of several games with one query
+        
+        Returns:
+            Dict mapping game_id to {team_number: [players]}, as get_game_players
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''SELECT game_id, user_id, username, team_number, is_leader 
+                   FROM game_players 
+                   WHERE game_id = ANY($1::int[]) 
+                   ORDER BY game_id, team_number, id''',
+                game_ids
+            )
+        
+        games: Dict[int, Dict[int, List[Dict[str, Any]]]] = {}
+        for row in rows:
+            games.setdefault(row['game_id'], {}).setdefault(row['team_number'], []).append({
+                'user_id': row['user_id'],
+                'username': row['username'],
+                'is_leader': bool(row['is_leader'])
+            })
+        return games
+    
+    async def get_vote_log(self, game_ids: List[int]) -> Dict[int, Dict[int, Dict[int, Dict[int, int]]]]:
+        """Replay the write-ahead vote log of several games with one query
+        
+        Returns:
+            Dict mapping game_id to {round: {team_id: {user_id: character_id}}}
+            with votes in the order they were first cast
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                '''SELECT game_id, round_number, team_id, user_id, character_id
+                   FROM round_votes WHERE game_id = ANY($1::int[])
+                   ORDER BY seq''',
+                game_ids
+            )
+        
+        votes: Dict[int, Dict[int, Dict[int, Dict[int, int]]]] = {}
+        for row in rows:
+            (votes.setdefault(row['game_id'], {})
+                  .setdefault(row['round_number'], {})
+                  .setdefault(row['team_id'], {}))[row['user_id']] = row['character_id']
+        return votes
+
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -10,9 +10,17 @@ from database.db_manager import db_manager
 from services.team_service import team_service
 from services.scoring_service import scoring_service
 from handlers.voting_handler import voting_handler
+from handlers.lobby_handler import lobby_handler
+from handlers.game_handler_improved import improved_message_handler
 from utils.constants import GAME_STATUS
 from utils.helpers import get_team_name
 from utils.message_delivery import message_delivery
+from utils.muted_chats import muted_chats
+from utils.game_registry import game_registry
+from utils.chat_ownership import chat_ownership
+from utils.rate_limiter import PRIORITY_BALLOT
+from utils.keyboards import bot_keyboards
+from utils.timer_wheel import timer_wheel
 from data.themes import get_random_theme, get_theme_by_id
 import config
 
@@ -33,6 +41,8 @@ class GameHandler:
         self.player_teams: Dict[int, Dict[str, Any]] = {}
         # Store game themes: {game_id: theme_dict}
         self.game_themes: Dict[int, Dict[str, Any]] = {}
+        # Task running each game's rounds: {game_id: task} (cancelled when the game is released)
+        self.round_tasks: Dict[int, asyncio.Task] = {}
     
     async def start_game(self, context: ContextTypes.DEFAULT_TYPE, 
                         lobby_chat_id: int, lobby_message_id: int) -> int:
@@ -43,8 +53,10 @@ class GameHandler:
         """
         logger.info(f"Starting new game - Chat: {lobby_chat_id}, Message: {lobby_message_id}")
         
-        # Get players from lobby
-        players = await db_manager.get_lobby_players()
+        # Get players from this chat's lobby (storage fallback after a restart)
+        players = lobby_handler.get_players(lobby_chat_id)
+        if not players:
+            players = await db_manager.get_lobby_players(lobby_chat_id)
         logger.debug(f"Retrieved {len(players)} players from lobby")
         
         if len(players) < config.MIN_PLAYERS:
@@ -59,9 +71,6 @@ class GameHandler:
         game_id = await db_manager.create_game(lobby_message_id, lobby_chat_id, theme['id'])
         logger.info(f"Game created with ID: {game_id}")
         
-        # Store theme in memory
-        self.game_themes[game_id] = theme
-        
         # Form teams
         teams = team_service.form_teams(players)
         logger.info(f"Teams formed - {len(teams)} teams created")
@@ -70,32 +79,14 @@ class GameHandler:
         flat_players = team_service.flatten_teams_for_db(teams)
         await db_manager.add_game_players(game_id, flat_players)
         
-        # Clear lobby
-        await db_manager.clear_lobby()
+        # Close this chat's lobby
+        await lobby_handler.clear_lobby(lobby_chat_id)
         
         # Update game status
         await db_manager.update_game_status(game_id, GAME_STATUS['IN_PROGRESS'])
         
-        # Store game data
-        self.active_games[game_id] = {
-            'teams': teams,
-            'chat_id': lobby_chat_id,
-            'message_id': lobby_message_id,
-            'team_announcement_message_id': None,
-            'round_messages': {}  # {round_number: message_id}
-        }
-        
-        # Store player team info for team chat
-        for team_id, team_players in teams.items():
-            for player in team_players:
-                user_id = player.get('user_id')
-                self.player_teams[user_id] = {
-                    'game_id': game_id,
-                    'team_id': team_id,
-                    'team_players': team_players
-                }
-        
-        logger.debug(f"Stored team info for {len(self.player_teams)} players")
+        # Store game data, theme and team chat membership
+        self.register_game(game_id, lobby_chat_id, lobby_message_id, teams, theme)
         
         # Announce teams with theme (no parse_mode to avoid underscore issues in usernames)
         team_announcement = team_service.get_team_announcement_message(teams)
@@ -109,16 +100,45 @@ class GameHandler:
         logger.debug(f"Team announcement message ID: {msg.message_id}")
         
         # Wait a moment before starting rounds
-        await asyncio.sleep(3)
+        await timer_wheel.sleep(3)
         
         # Start rounds
         await self.run_all_rounds(context, game_id)
         
         return game_id
     
-    async def run_all_rounds(self, context: ContextTypes.DEFAULT_TYPE, game_id: int):
-        """Run all 5 rounds of the game"""
-        logger.info(f"Starting rounds for game {game_id}")
+    def register_game(self, game_id: int, chat_id: int, message_id: int,
+                      teams: Dict[int, List[Dict[str, Any]]], theme: Dict[str, Any]):
+        """Load a running game into memory (new game or recovered after a restart)"""
+        # Registry reclaims everything below if the game never finishes
+        game_registry.track(game_id, chat_id)
+        self.game_themes[game_id] = theme
+        
+        self.active_games[game_id] = {
+            'teams': teams,
+            'chat_id': chat_id,
+            'message_id': message_id,
+            'team_announcement_message_id': None,
+            'round_messages': {}  # {round_number: message_id}
+        }
+        muted_chats.mute(chat_id, f'game:{game_id}')
+        
+        # Store player team info for team chat
+        for team_id, team_players in teams.items():
+            for player in team_players:
+                user_id = player.get('user_id')
+                self.player_teams[user_id] = {
+                    'game_id': game_id,
+                    'team_id': team_id,
+                    'team_players': team_players
+                }
+        
+        logger.debug(f"Stored team info for {len(self.player_teams)} players")
+    
+    async def run_all_rounds(self, context: ContextTypes.DEFAULT_TYPE, game_id: int,
+                             start_round: int = 1):
+        """Run all 5 rounds of the game (from start_round when resuming)"""
+        logger.info(f"Starting rounds for game {game_id} from round {start_round}")
         game_data = self.active_games.get(game_id)
         if not game_data:
             logger.error(f"Game {game_id} not found in active games")
@@ -126,24 +146,31 @@ class GameHandler:
         
         teams = game_data['teams']
         chat_id = game_data['chat_id']
+        task = asyncio.current_task()
+        self.round_tasks[game_id] = task
         
-        # Run each round
-        for round_number in range(1, self.num_rounds + 1):
-            logger.info(f"Game {game_id} - Starting round {round_number}/{self.num_rounds}")
-            await self.run_round(context, game_id, round_number, teams, chat_id)
+        try:
+            # Run each round
+            for round_number in range(start_round, self.num_rounds + 1):
+                logger.info(f"Game {game_id} - Starting round {round_number}/{self.num_rounds}")
+                await self.run_round(context, game_id, round_number, teams, chat_id)
+                
+                # Wait between rounds
+                if round_number < self.num_rounds:
+                    await timer_wheel.sleep(2)
             
-            # Wait between rounds
-            if round_number < self.num_rounds:
-                await asyncio.sleep(2)
-        
-        # Game finished, show results
-        await self.finish_game(context, game_id, teams, chat_id)
+            # Game finished, show results
+            await self.finish_game(context, game_id, teams, chat_id)
+        finally:
+            if self.round_tasks.get(game_id) is task:
+                del self.round_tasks[game_id]
     
     async def run_round(self, context: ContextTypes.DEFAULT_TYPE, game_id: int, 
                        round_number: int, teams: Dict[int, List[Dict[str, Any]]], 
                        chat_id: int):
         """Run a single round"""
         logger.debug(f"Game {game_id} - Running round {round_number}")
+        game_registry.touch(game_id)
         
         # Update game round
         await db_manager.update_game_round(game_id, round_number)
@@ -160,12 +187,8 @@ class GameHandler:
         role_name = role_info.get('name', 'Unknown')
         
         # Announce round start with "Go to Bot" button
-        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-        
-        bot_username = (await context.bot.get_me()).username
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🤖 Go to Bot", url=f"https://t.me/{bot_username}")]
-        ])
+        await bot_keyboards.ensure(context.bot)
+        keyboard = bot_keyboards.go_to_bot
         
         round_message = f"""🎯 **ROUND {round_number}/5**
 
@@ -177,10 +200,12 @@ class GameHandler:
 ▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬
 👉 Bot ထံသို့ သွားပြီး vote ပေးပါ!"""
         
-        # Always send new message for each round
-        msg = await context.bot.send_message(
+        # Always send new message for each round (within the group's rate limit)
+        msg = await message_delivery.send_message_with_retry(
+            context.bot,
             chat_id=chat_id,
             text=round_message,
+            priority=PRIORITY_BALLOT,
             reply_markup=keyboard,
             parse_mode='Markdown'
         )
@@ -189,42 +214,50 @@ class GameHandler:
         game_data = self.active_games.get(game_id)
         if 'round_messages' not in game_data:
             game_data['round_messages'] = {}
-        game_data['round_messages'][round_number] = msg.message_id
-        logger.debug(f"Sent round {round_number} message {msg.message_id}")
+        if msg:
+            game_data['round_messages'][round_number] = msg.message_id
+            logger.debug(f"Sent round {round_number} message {msg.message_id}")
         
-        # Initialize voting for this round
+        # Initialize voting for this round (roster lets it close once everyone voted)
         voting_handler.init_round_voting(game_id, round_number)
+        voting_handler.set_round_roster(game_id, round_number, teams)
         
-        # Send voting to all teams (parallel sending handles rate limiting automatically)
-        for team_id, team_players in teams.items():
-            # Get characters already used by this team
-            used_character_ids = await db_manager.get_team_used_character_ids(game_id, team_id)
-            
-            # Get random characters (excluding already used ones)
-            characters = await db_manager.get_random_characters(
-                self.characters_per_round, 
-                exclude_ids=used_character_ids
-            )
-            
-            if len(characters) < self.characters_per_round:
-                logger.error(f"Not enough characters in database: {len(characters)}/{self.characters_per_round}")
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=f"⚠️ Database မှာ character အရေအတွက် မလုံလောက်ပါ! အနည်းဆုံး {self.characters_per_round} characters လိုအပ်ပါတယ်။"
-                )
-                return
-            
-            logger.debug(f"Game {game_id} - Team {team_id} - Sending voting for round {round_number} (excluded {len(used_character_ids)} used characters)")
-            
-            # Send voting messages (parallel sending with rate limiting)
-            await voting_handler.send_team_voting(
-                context, game_id, round_number, team_id, team_players, characters
+        # Pick candidates for every team at once (one query, sampling in memory)
+        team_candidates = await db_manager.get_round_candidates(
+            game_id, list(teams.keys()), self.characters_per_round
+        )
+        
+        short_teams = [team_id for team_id, characters in team_candidates.items()
+                       if len(characters) < self.characters_per_round]
+        if short_teams:
+            logger.error(f"Not enough characters in database for teams {short_teams}")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"⚠️ Database မှာ character အရေအတွက် မလုံလောက်ပါ! အနည်းဆုံး {self.characters_per_round} characters လိုအပ်ပါတယ်။"
             )
-            # No delays needed - rate limiter handles everything!
+            return
         
-        # Wait for voting time
-        logger.debug(f"Game {game_id} - Round {round_number} - Waiting {self.round_time} seconds for votes")
-        await asyncio.sleep(self.round_time)
+        # Send every team's ballots in one batch (rate limiter paces the whole round)
+        await voting_handler.send_round_voting(
+            context, game_id, round_number, teams, team_candidates
+        )
+        
+        await self.complete_round(context, game_id, round_number, teams, chat_id, self.round_time)
+    
+    async def complete_round(self, context: ContextTypes.DEFAULT_TYPE, game_id: int,
+                             round_number: int, teams: Dict[int, List[Dict[str, Any]]],
+                             chat_id: int, timeout: float):
+        """Wait out a round whose ballots are out, then finalize and announce it
+        
+        Args:
+            timeout: Seconds left on the round timer
+        """
+        # Wait until every team has voted or the round time runs out
+        logger.debug(f"Game {game_id} - Round {round_number} - Waiting up to {timeout:.0f} seconds for votes")
+        closed_early = await voting_handler.wait_for_round(game_id, round_number, timeout)
+        voting_handler.close_round(game_id, round_number)
+        if closed_early:
+            logger.info(f"Game {game_id} - Round {round_number} - All votes in, closing early")
         
         # Finalize votes
         logger.debug(f"Game {game_id} - Round {round_number} - Finalizing votes")
@@ -233,12 +266,24 @@ class GameHandler:
         # Announce selections
         await self.announce_round_results(context, chat_id, round_number, selections, teams, game_id)
     
-    async def announce_round_results(self, context: ContextTypes.DEFAULT_TYPE, 
-                                    chat_id: int, round_number: int, 
-                                    selections: Dict[int, int], 
-                                    teams: Dict[int, List[Dict[str, Any]]],
-                                    game_id: int):
-        """Announce round results by editing the round message with individual votes"""
+    async def build_round_results(self, game_id: int, round_number: int,
+                                  selections: Dict[int, int],
+                                  teams: Dict[int, List[Dict[str, Any]]]) -> str:
+        """Render the round results message
+        
+        Individual votes come from VotingHandler's in-memory round state
+        (one game_rounds query only if that's gone), and every character
+        is resolved in a single batch lookup.
+        
+        Args:
+            game_id: Game ID
+            round_number: Round number
+            selections: Dict mapping team_id to selected character_id
+            teams: Dict mapping team_id to team players
+            
+        Returns:
+            Results message text
+        """
         # Get role info from theme
         theme = self.game_themes.get(game_id)
         if not theme:
@@ -249,6 +294,20 @@ class GameHandler:
         role_info = theme['roles'].get(round_number, {})
         role_name = role_info.get('name', 'Unknown')
         
+        round_votes = voting_handler.active_votes.get(game_id, {}).get(round_number)
+        if round_votes is None:
+            round_votes = await db_manager.get_all_round_votes(game_id, round_number)
+        
+        # Resolve every selected and voted character at once
+        char_ids = list(selections.values())
+        for votes in round_votes.values():
+            char_ids.extend(votes.values())
+        characters = await db_manager.get_characters(char_ids)
+        
+        def char_name_of(char_id: int) -> str:
+            character = characters.get(char_id)
+            return character.name if character else "Unknown"
+        
         lines = [
             f"🎯 ROUND {round_number}/5 COMPLETED",
             "",
@@ -265,8 +324,7 @@ class GameHandler:
             
             # Get the final selected character
             if char_id:
-                character = await db_manager.get_character(char_id)
-                char_name = character.name if character else "Unknown"
+                char_name = char_name_of(char_id)
             else:
                 char_name = "No selection"
             
@@ -274,29 +332,37 @@ class GameHandler:
             lines.append(f"   → {char_name} ✅")
             
             # Get individual votes
-            votes = await db_manager.get_round_votes(game_id, round_number, team_id)
+            votes = round_votes.get(team_id)
             if votes:
+                players_by_id = {p['user_id']: p for p in teams[team_id]}
                 lines.append(f"   📊 Individual votes:")
                 for user_id, voted_char_id in votes.items():
                     # Get player info
-                    player = next((p for p in teams[team_id] if p['user_id'] == int(user_id)), None)
+                    player = players_by_id.get(int(user_id))
                     if player:
                         username = player.get('username', f"User_{user_id}")
-                        # Get voted character
-                        voted_char = await db_manager.get_character(voted_char_id)
-                        voted_char_name = voted_char.name if voted_char else "Unknown"
+                        voted_char_name = char_name_of(voted_char_id)
                         leader_mark = " 👑" if player.get('is_leader') else ""
                         lines.append(f"      • {username}{leader_mark} → {voted_char_name}")
             
             lines.append("▬▬▬▬▬▬▬▬▬▬▬▬▬▬▬")
         
-        message = "\n".join(lines)
+        return "\n".join(lines)
+    
+    async def announce_round_results(self, context: ContextTypes.DEFAULT_TYPE, 
+                                    chat_id: int, round_number: int, 
+                                    selections: Dict[int, int], 
+                                    teams: Dict[int, List[Dict[str, Any]]],
+                                    game_id: int):
+        """Announce round results by editing the round message with individual votes"""
+        message = await self.build_round_results(game_id, round_number, selections, teams)
         
         # Edit this round's message with results (without Markdown to avoid parsing errors)
         game_data = self.active_games.get(game_id)
         if game_data and 'round_messages' in game_data and round_number in game_data['round_messages']:
             try:
-                await context.bot.edit_message_text(
+                await message_delivery.edit_message_text(
+                    context.bot,
                     chat_id=chat_id,
                     message_id=game_data['round_messages'][round_number],
                     text=message
@@ -304,17 +370,28 @@ class GameHandler:
                 logger.debug(f"Edited round {round_number} message with results")
             except Exception as e:
                 logger.error(f"Error editing round results: {e}")
+        else:
+            # No round message to edit (round resumed after a restart)
+            await message_delivery.send_message_with_retry(
+                context.bot, chat_id=chat_id, text=message
+            )
     
     async def send_private_results(self, context: ContextTypes.DEFAULT_TYPE, 
                                    game_id: int, teams: Dict[int, List[Dict[str, Any]]],
                                    results: Dict[int, Dict[str, Any]], winner: int):
-        """Send private results to all players"""
+        """Send private results to all players
+        
+        Returns:
+            Delivery stats with usernames per failure category
+        """
         logger.info(f"Game {game_id} - Sending private results to all players")
         
         # Prepare winner info
         winner_team_name = get_team_name(results[winner]['players'])
         winner_score = results[winner]['total_score']
         
+        recipients = []
+        
         for team_id, team_players in teams.items():
             team_name = get_team_name(team_players)
             team_data = results.get(team_id, {})
@@ -365,24 +442,26 @@ class GameHandler:
             
             private_message = "\n".join(lines)
             
-            # Send to all players in team (with retry logic)
+            # Rendered once per team, shared by all its players
             for player in team_players:
-                user_id = player.get('user_id')
-                
-                result_msg = await message_delivery.send_message_with_retry(
-                    context.bot,
-                    chat_id=user_id,
-                    text=private_message,
-                    parse_mode='Markdown'
-                )
-                
-                if result_msg:
-                    logger.debug(f"Private result delivered to user {user_id}")
-                else:
-                    logger.error(f"Failed to deliver private result to user {user_id}")
-            
-            # Small delay between teams
-            await asyncio.sleep(1)
+                recipients.append({
+                    'chat_id': player.get('user_id'),
+                    'text': private_message,
+                    'username': player.get('username', 'Unknown')
+                })
+        
+        # Send to every player in one concurrent, rate-limited batch
+        delivery_stats = await improved_message_handler.deliver_results(context, recipients)
+        logger.info(
+            f"Game {game_id} - Private results delivered: "
+            f"{delivery_stats['success']}/{len(recipients)} "
+            f"(not started: {len(delivery_stats['user_not_started'])}, "
+            f"blocked: {len(delivery_stats['user_blocked'])}, "
+            f"timeout: {len(delivery_stats['timeout'])}, "
+            f"other: {len(delivery_stats['other'])})"
+        )
+        
+        return delivery_stats
     
     async def finish_game(self, context: ContextTypes.DEFAULT_TYPE, game_id: int,
                          teams: Dict[int, List[Dict[str, Any]]], chat_id: int):
@@ -411,7 +490,7 @@ class GameHandler:
         )
         
         # Wait a moment for drama
-        await asyncio.sleep(3)
+        await timer_wheel.sleep(3)
         
         # Edit calculating message to show "ရလဒ်များ:"
         try:
@@ -444,7 +523,7 @@ class GameHandler:
                 text=message,
                 reply_markup=keyboard
             )
-            await asyncio.sleep(1)
+            await timer_wheel.sleep(1)
         
         # Final winner announcement
         winner_players = results[winner]['players']
@@ -487,23 +566,49 @@ Game ပါဝင်ကစားပေးတဲ့အတွက် ကျေး
         await db_manager.update_game_status(game_id, GAME_STATUS['FINISHED'])
         logger.info(f"Game {game_id} - Status updated to finished")
         
-        # Cleanup
-        voting_handler.clear_game_votes(game_id)
+        # Cleanup (votes, teams, theme and game data)
+        game_registry.release(game_id)
+        await chat_ownership.release(chat_id)
+        try:
+            await voting_handler.flush_vote_log(game_id)
+            await db_manager.clear_vote_log(game_id)
+        except Exception as e:
+            logger.error(f"Game {game_id} - Failed to clear vote log: {e}")
+        
+        logger.info(f"Game {game_id} - Game completed and cleaned up")
+    
+    def clear_game(self, game_id: int):
+        """Drop a game's data, team chat membership and theme from memory"""
+        game_data = self.active_games.pop(game_id, None)
+        if game_data:
+            muted_chats.unmute(game_data['chat_id'], f'game:{game_id}')
         
-        # Clear player teams
         players_to_remove = [user_id for user_id, data in self.player_teams.items() 
                             if data['game_id'] == game_id]
         for user_id in players_to_remove:
             del self.player_teams[user_id]
         logger.debug(f"Cleared team info for {len(players_to_remove)} players")
         
-        if game_id in self.active_games:
-            del self.active_games[game_id]
+        self.game_themes.pop(game_id, None)
         
-        logger.info(f"Game {game_id} - Game completed and cleaned up")
+        # Stop the game's rounds (unless the round task is the one releasing it)
+        task = self.round_tasks.pop(game_id, None)
+        if task and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            logger.info(f"Game {game_id} - Round task cancelled")
 
 
 # Global game handler instance
 game_handler = GameHandler()
 
+game_registry.register_cleanup(voting_handler.clear_game_votes)
+game_registry.register_cleanup(game_handler.clear_game)
+game_registry.register_source('active_games', lambda: list(game_handler.active_games))
+game_registry.register_source('player_teams', lambda: [data['game_id'] for data in game_handler.player_teams.values()])
+game_registry.register_source('game_themes', lambda: list(game_handler.game_themes))
+game_registry.register_source('active_votes', lambda: list(voting_handler.active_votes))
+game_registry.register_source('round_timers', lambda: list(voting_handler.round_timers))
+game_registry.register_source('voting_messages', lambda: list(voting_handler.voting_messages))
+game_registry.register_source('round_rosters', lambda: list(voting_handler.round_rosters))
+
 
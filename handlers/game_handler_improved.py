@@ -7,10 +7,9 @@ This is an upgrade to the existing game_handler.py with:
 - Fallback notifications
 """
 
-import asyncio
 import logging
 from typing import Dict, List, Any
-from telegram.error import Forbidden, BadRequest, TimedOut, NetworkError
+from utils.message_delivery import message_delivery
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +17,57 @@ logger = logging.getLogger(__name__)
 class ImprovedPrivateMessageHandler:
     """Handles private message delivery with retries and rate limiting"""
     
-    def __init__(self):
-        self.rate_limit = 30  # messages per second
-        self.delay_between_messages = 1.0 / self.rate_limit  # ~33ms
-        self.max_retries = 3
-        self.retry_delays = [1.0, 2.0, 4.0]  # exponential backoff
+    async def deliver_results(self, context, recipients: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Send prepared messages to all recipients at once and categorize failures
+        
+        Delivery goes through message_delivery's parallel pipeline, so pacing
+        comes from the shared token bucket and retries are handled there.
         
+        Args:
+            context: Bot context
+            recipients: List of dicts with 'chat_id', 'text' and 'username'
+            
+        Returns:
+            Delivery stats: success/failed counts and usernames per error category
+        """
+        delivery_stats = {
+            'success': 0,
+            'failed': 0,
+            'user_not_started': [],
+            'user_blocked': [],
+            'timeout': [],
+            'other': []
+        }
+        
+        results = await message_delivery.send_parallel_detailed(
+            context.bot, recipients, parse_mode='Markdown'
+        )
+        
+        for recipient, (message, error_type) in zip(recipients, results):
+            user_id = recipient['chat_id']
+            username = recipient.get('username', 'Unknown')
+            
+            if message:
+                delivery_stats['success'] += 1
+                logger.debug(f"Private result sent to {username} ({user_id})")
+                continue
+            
+            delivery_stats['failed'] += 1
+            logger.warning(f"Failed to send private result to {username} ({user_id}): {error_type}")
+            
+            # Categorize error
+            if error_type == 'forbidden':
+                delivery_stats['user_not_started'].append(username)
+            elif error_type == 'blocked':
+                delivery_stats['user_blocked'].append(username)
+            elif error_type == 'timeout':
+                delivery_stats['timeout'].append(username)
+            else:
+                delivery_stats['other'].append(username)
+        
+        return delivery_stats
+    
     async def send_private_results_improved(self, context, game_id: int, 
                                            teams: Dict[int, List[Dict[str, Any]]],
                                            results: Dict[int, Dict[str, Any]], 
@@ -32,8 +76,8 @@ class ImprovedPrivateMessageHandler:
         Send private results to all players with improved error handling
         
         Features:
-        - Rate limiting (30 msg/sec)
-        - Retry logic (3 attempts)
+        - One message rendered per team, sent to all players concurrently
+        - Token bucket rate limiting and retries (shared delivery pipeline)
         - Error categorization
         - Fallback group notification
         """
@@ -44,15 +88,7 @@ class ImprovedPrivateMessageHandler:
         winner_team_name = get_team_name(results[winner].get('players', []))
         winner_score = results[winner]['total_score']
         
-        # Track delivery status
-        delivery_stats = {
-            'success': 0,
-            'failed': 0,
-            'user_not_started': [],
-            'user_blocked': [],
-            'timeout': [],
-            'other': []
-        }
+        recipients = []
         
         # Process each team
         for team_id, team_players in teams.items():
@@ -85,35 +121,15 @@ class ImprovedPrivateMessageHandler:
             
             private_message = "\n".join(lines)
             
-            # Send to all players in team with rate limiting and retries
             for player in team_players:
-                user_id = player.get('user_id')
-                username = player.get('username', 'Unknown')
-                
-                # Send with retry logic
-                success, error_type = await self._send_with_retry(
-                    context, user_id, private_message
-                )
-                
-                if success:
-                    delivery_stats['success'] += 1
-                    logger.debug(f"Private result sent to {username} ({user_id})")
-                else:
-                    delivery_stats['failed'] += 1
-                    logger.warning(f"Failed to send private result to {username} ({user_id}): {error_type}")
-                    
-                    # Categorize error
-                    if error_type == 'forbidden':
-                        delivery_stats['user_not_started'].append(username)
-                    elif error_type == 'blocked':
-                        delivery_stats['user_blocked'].append(username)
-                    elif error_type == 'timeout':
-                        delivery_stats['timeout'].append(username)
-                    else:
-                        delivery_stats['other'].append(username)
-                
-                # Rate limiting
-                await asyncio.sleep(self.delay_between_messages)
+                recipients.append({
+                    'chat_id': player.get('user_id'),
+                    'text': private_message,
+                    'username': player.get('username', 'Unknown')
+                })
+        
+        # Send to every player in one concurrent batch
+        delivery_stats = await self.deliver_results(context, recipients)
         
         # Log delivery statistics
         logger.info(f"Game {game_id} - Private message delivery: "
@@ -128,58 +144,6 @@ class ImprovedPrivateMessageHandler:
         
         return delivery_stats
     
-    async def _send_with_retry(self, context, user_id: int, message: str) -> tuple:
-        """
-        Send message with retry logic
-        
-        Returns:
-            (success: bool, error_type: str)
-        """
-        for attempt in range(self.max_retries):
-            try:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
-                return (True, None)
-                
-            except Forbidden as e:
-                # User hasn't started bot or blocked it
-                error_msg = str(e).lower()
-                if 'bot was blocked' in error_msg:
-                    return (False, 'blocked')
-                else:
-                    return (False, 'forbidden')
-            
-            except BadRequest as e:
-                # Invalid request (shouldn't happen with valid user_id)
-                logger.error(f"BadRequest for user {user_id}: {e}")
-                return (False, 'bad_request')
-            
-            except TimedOut:
-                # Timeout - retry
-                if attempt < self.max_retries - 1:
-                    logger.warning(f"Timeout for user {user_id}, retrying...")
-                    await asyncio.sleep(self.retry_delays[attempt])
-                else:
-                    return (False, 'timeout')
-            
-            except NetworkError as e:
-                # Network error - retry
-                if attempt < self.max_retries - 1:
-                    logger.warning(f"Network error for user {user_id}: {e}, retrying...")
-                    await asyncio.sleep(self.retry_delays[attempt])
-                else:
-                    return (False, 'network')
-            
-            except Exception as e:
-                # Unknown error
-                logger.error(f"Unexpected error sending to user {user_id}: {e}")
-                return (False, 'other')
-        
-        return (False, 'max_retries')
-    
     async def _send_fallback_notification(self, context, chat_id: int, 
                                          game_id: int, stats: dict):
         """Send fallback notification to group chat for failed deliveries"""
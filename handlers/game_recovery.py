@@ -0,0 +1,210 @@
+"""
+Crash recovery for in-progress games
+Rebuilds game, team and vote state from Postgres on startup and resumes
+each game's round loop where it stopped
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from telegram.ext import Application, CallbackContext
+from database.db_manager import db_manager
+from handlers.game_handler import game_handler
+from handlers.lobby_handler import lobby_handler
+from handlers.voting_handler import voting_handler
+from utils.chat_ownership import chat_ownership
+from utils.game_registry import game_registry
+from utils.constants import GAME_STATUS
+from utils.message_delivery import message_delivery
+from utils.timer_wheel import timer_wheel
+from data.themes import get_theme_by_id
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def plan_resume(game: Dict[str, Any], round_time: float) -> Tuple[Optional[int], float, int]:
+    """Decide where a recovered game picks up
+
+    Args:
+        game: Row from db_manager.get_in_progress_games()
+        round_time: Full round length in seconds
+
+    Returns:
+        (round to resume or None, seconds left on its timer, next round to start)
+    """
+    current = game.get('current_round') or 0
+    finalized = game.get('finalized_round') or 0
+
+    if current == 0:
+        # Crashed before the first round started
+        return None, 0.0, 1
+    if finalized >= current:
+        # Round was finalized; continue with the next one
+        return None, 0.0, current + 1
+
+    elapsed = game.get('round_elapsed')
+    if elapsed is None:
+        # Round start unknown (pre-recovery data) - close it right away
+        elapsed = round_time
+    remaining = max(0.0, round_time - elapsed)
+    return current, remaining, current + 1
+
+
+class GameRecovery:
+    """Rehydrates in-progress games after a restart"""
+
+    def __init__(self):
+        # game_id -> resumed round loop (kept so tasks aren't garbage collected)
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    async def recover(self, application: Application, chat_ids: Optional[List[int]] = None) -> int:
+        """Load in-progress games from the database and resume them
+
+        Games idle for longer than RECOVERY_MAX_AGE are cancelled instead.
+        Games, players and logged votes are read with one query each,
+        whatever the number of games. In multi-worker mode only games of
+        chats this worker can claim are resumed.
+
+        Args:
+            application: Bot application
+            chat_ids: Only games of these chats (None = all, at startup)
+
+        Returns:
+            Number of games resumed
+        """
+        started = time.monotonic()
+
+        # Games abandoned long ago (or from before recovery existed) would
+        # announce a restart and play rounds nobody is in
+        stale = await db_manager.cancel_stale_games(config.RECOVERY_MAX_AGE, chat_ids)
+        if stale:
+            logger.info(f"Recovery: cancelled {len(stale)} stale games {stale}")
+
+        if chat_ids is None:
+            # Votes of finished or cancelled games are no longer needed
+            await db_manager.clear_vote_log()
+
+        games = await db_manager.get_in_progress_games(chat_ids, max_age=config.RECOVERY_MAX_AGE)
+        games = [game for game in games if game['id'] not in game_handler.active_games]
+
+        if chat_ownership.enabled:
+            # Leave games of chats owned by live workers alone
+            with_chat = [game for game in games if game.get('lobby_chat_id') is not None]
+            owners = await asyncio.gather(*(
+                chat_ownership.claim(game['lobby_chat_id']) for game in with_chat
+            ))
+            foreign = {
+                game['id'] for game, owner in zip(with_chat, owners)
+                if owner != chat_ownership.worker_id
+            }
+            games = [game for game in games if game['id'] not in foreign]
+
+        if not games:
+            logger.info("Recovery: no in-progress games to resume")
+            return 0
+
+        game_ids = [game['id'] for game in games]
+        players, vote_log = await asyncio.gather(
+            db_manager.get_players_for_games(game_ids),
+            db_manager.get_vote_log(game_ids)
+        )
+
+        context = CallbackContext(application)
+        resumed = 0
+        restored_votes = 0
+
+        for game in games:
+            game_id = game['id']
+            teams = players.get(game_id)
+            chat_id = game.get('lobby_chat_id')
+            if not teams or chat_id is None:
+                logger.warning(f"Recovery: game {game_id} has no players or chat, cancelling it")
+                await db_manager.update_game_status(game_id, GAME_STATUS['CANCELLED'])
+                continue
+
+            resume_round, remaining, next_round = plan_resume(game, game_handler.round_time)
+
+            game_handler.register_game(
+                game_id, chat_id, game.get('lobby_message_id'), teams,
+                get_theme_by_id(game.get('theme_id') or 1)
+            )
+            voting_handler.init_game_voting(game_id)
+            if resume_round:
+                team_votes = vote_log.get(game_id, {}).get(resume_round, {})
+                voting_handler.restore_round(
+                    game_id, resume_round, team_votes,
+                    game_handler.round_time - remaining
+                )
+                voting_handler.set_round_roster(game_id, resume_round, teams)
+                restored_votes += sum(len(votes) for votes in team_votes.values())
+
+            self.tasks[game_id] = asyncio.create_task(
+                self._resume(context, game_id, chat_id, teams, resume_round, remaining, next_round)
+            )
+            # Cancelling the game stops the resumed round too
+            game_handler.round_tasks[game_id] = self.tasks[game_id]
+            resumed += 1
+            logger.info(
+                f"Recovery: game {game_id} resuming "
+                + (f"round {resume_round} with {remaining:.0f}s left" if resume_round
+                   else f"at round {next_round}")
+            )
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        logger.info(
+            f"Recovery: resumed {resumed}/{len(games)} games, "
+            f"{restored_votes} votes replayed in {elapsed_ms:.0f} ms"
+        )
+        return resumed
+
+    async def take_over_chat(self, application: Application, chat_id: int):
+        """Pick up a chat whose previous owner died (multi-worker failover)"""
+        resumed = await self.recover(application, chat_ids=[chat_id])
+        if not resumed:
+            # The dead worker's lobby (if any) lived only in its memory
+            await db_manager.clear_lobby(chat_id)
+    
+    def hand_off(self, chat_ids: List[int]):
+        """Drop local games and lobbies of chats another worker now owns
+
+        Called when this worker lost its leases (multi-worker mode); the new
+        owner resumes the games from the database.
+        """
+        chats = set(chat_ids)
+        for game_id, game_data in list(game_handler.active_games.items()):
+            if game_data['chat_id'] in chats:
+                # Also cancels the game's round task
+                game_registry.release(game_id)
+                logger.warning(f"Game {game_id} handed off with chat {game_data['chat_id']}")
+        for chat_id in chats:
+            lobby_handler.cancel_lobby_timer(chat_id)
+            lobby_handler.sessions.pop(chat_id, None)
+    
+    async def _resume(self, context: CallbackContext, game_id: int, chat_id: int,
+                      teams: Dict[int, Any], resume_round: Optional[int],
+                      remaining: float, next_round: int):
+        """Finish the interrupted round, then run the rest of the game"""
+        try:
+            await message_delivery.send_message_with_retry(
+                context.bot,
+                chat_id=chat_id,
+                text="♻️ Bot ပြန်လည်စတင်ခဲ့ပါတယ်။ Game ကို ရပ်ခဲ့တဲ့နေရာကနေ ဆက်ကစားပါမယ်!"
+            )
+
+            if resume_round:
+                await game_handler.complete_round(
+                    context, game_id, resume_round, teams, chat_id, remaining
+                )
+                if next_round <= game_handler.num_rounds:
+                    await timer_wheel.sleep(2)
+
+            await game_handler.run_all_rounds(context, game_id, start_round=next_round)
+        except Exception as e:
+            logger.error(f"Recovery: game {game_id} failed to resume: {e}", exc_info=True)
+        finally:
+            self.tasks.pop(game_id, None)
+
+
+# Global game recovery instance
+game_recovery = GameRecovery()
@@ -1,45 +1,113 @@
 """
 Lobby handler for join/quit operations
 """
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
 import logging
-import asyncio
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from database.db_manager import db_manager
 from utils.helpers import format_player_list
+from utils.muted_chats import muted_chats
+from utils.keyboards import bot_keyboards
+from utils.message_delivery import message_delivery
+from utils.rate_limiter import rate_limiter
+from utils.timer_wheel import TimerHandle, timer_wheel
+from utils.chat_ownership import chat_ownership
 import config
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# Seconds between lobby countdown message updates
+LOBBY_UPDATE_INTERVAL = 5
+
+
+class LobbySession:
+    """State of one chat's lobby: message, timer and member set"""
+    
+    def __init__(self, chat_id: int, message_id: Optional[int] = None):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.start_time: Optional[datetime] = None
+        # Countdown timer on the shared timer wheel
+        self.timer_task: Optional[TimerHandle] = None
+        # user_id -> {'user_id', 'username', 'joined_at'} in join order
+        self.members: Dict[int, Dict[str, Any]] = {}
+        # Set once the lobby filled up so only one join triggers the game start
+        self.starting = False
+    
+    def __len__(self) -> int:
+        return len(self.members)
+    
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.members
+    
+    def add(self, user_id: int, username: str):
+        self.members[user_id] = {
+            'user_id': user_id,
+            'username': username,
+            'joined_at': datetime.now()
+        }
+        # Player chatter in the group is deleted while the lobby has members
+        muted_chats.mute(self.chat_id, 'lobby')
+    
+    def remove(self, user_id: int) -> bool:
+        removed = self.members.pop(user_id, None) is not None
+        if not self.members:
+            muted_chats.unmute(self.chat_id, 'lobby')
+        return removed
+    
+    def players(self) -> List[Dict[str, Any]]:
+        """Members in join order"""
+        return list(self.members.values())
+
 
 class LobbyHandler:
-    """Handles lobby operations with dynamic sizing and timer"""
+    """Handles lobby operations with dynamic sizing and timer
+    
+    Every group chat gets its own LobbySession, so lobbies in different
+    groups fill, time out and start independently.
+    """
     
     def __init__(self):
         self.min_players = config.MIN_PLAYERS
         self.max_players = config.MAX_PLAYERS
         self.lobby_timeout = config.LOBBY_TIMEOUT
         
-        # Track lobby timer
-        self.lobby_start_time: Optional[datetime] = None
-        self.lobby_chat_id: Optional[int] = None
-        self.lobby_message_id: Optional[int] = None
-        self.timer_task: Optional[asyncio.Task] = None
+        # Active lobbies: {chat_id: LobbySession}
+        self.sessions: Dict[int, LobbySession] = {}
+    
+    def get_session(self, chat_id: int) -> Optional[LobbySession]:
+        """Get the lobby session for a chat, if one is open"""
+        return self.sessions.get(chat_id)
+    
+    def get_player_count(self, chat_id: int) -> int:
+        """Number of players waiting in a chat's lobby (from memory)"""
+        session = self.sessions.get(chat_id)
+        return len(session) if session else 0
     
-    async def create_lobby_message(self, update: Update = None, players: list = None) -> str:
+    def get_players(self, chat_id: int) -> List[Dict[str, Any]]:
+        """Players waiting in a chat's lobby, in join order (from memory)"""
+        session = self.sessions.get(chat_id)
+        return session.players() if session else []
+    
+    async def create_lobby_message(self, update: Update = None, players: list = None,
+                                   chat_id: int = None) -> str:
         """Create lobby message with current players and timer"""
+        if chat_id is None and update and update.effective_chat:
+            chat_id = update.effective_chat.id
+        session = self.sessions.get(chat_id)
+        
         if players is None:
-            players = await db_manager.get_lobby_players()
+            players = session.players() if session else []
         count = len(players)
         
         # Calculate remaining time
         time_remaining = "N/A"
-        if self.lobby_start_time:
-            elapsed = (datetime.now() - self.lobby_start_time).total_seconds()
+        if session and session.start_time:
+            elapsed = (datetime.now() - session.start_time).total_seconds()
             remaining = max(0, self.lobby_timeout - elapsed)
             time_remaining = f"{int(remaining)}s"
         
@@ -79,74 +147,75 @@ class LobbyHandler:
         return "\n".join(message_lines)
     
     def get_lobby_keyboard(self) -> InlineKeyboardMarkup:
-        """Get lobby inline keyboard"""
-        keyboard = [
-            [
-                InlineKeyboardButton("✅ Join Game", callback_data="join_lobby"),
-                InlineKeyboardButton("❌ Quit Game", callback_data="quit_lobby")
-            ]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        """Get lobby inline keyboard (shared prebuilt instance)"""
+        return bot_keyboards.lobby
     
-    async def start_lobby_timer(self, context: ContextTypes.DEFAULT_TYPE):
-        """Start lobby countdown timer"""
-        self.lobby_start_time = datetime.now()
-        logger.info(f"Lobby timer started: {self.lobby_timeout} seconds")
+    async def start_lobby_timer(self, context: ContextTypes.DEFAULT_TYPE, session: LobbySession):
+        """Start a chat's lobby countdown on the shared timer wheel"""
+        session.start_time = datetime.now()
+        logger.info(f"Lobby timer started for chat {session.chat_id}: {self.lobby_timeout} seconds")
         
         # Cancel existing timer if any
-        if self.timer_task and not self.timer_task.done():
-            self.timer_task.cancel()
-        
-        # Create new timer task
-        self.timer_task = asyncio.create_task(
-            self._run_lobby_timer(context)
+        if session.timer_task and not session.timer_task.done():
+            session.timer_task.cancel()
+        
+        # One wheel timer per lobby, rescheduled on every countdown tick
+        session.timer_task = timer_wheel.schedule(
+            min(LOBBY_UPDATE_INTERVAL, self.lobby_timeout),
+            self._lobby_timer_tick, context, session,
+            key=f"lobby:{session.chat_id}"
         )
     
-    async def _run_lobby_timer(self, context: ContextTypes.DEFAULT_TYPE):
-        """Run the lobby timer and update message every 5 seconds"""
+    async def _lobby_timer_tick(self, context: ContextTypes.DEFAULT_TYPE, session: LobbySession):
+        """Update the countdown every 5 seconds, start or close the lobby at the end"""
+        # Lobby closed or timer cancelled while this tick was due
+        if session.start_time is None or self.sessions.get(session.chat_id) is not session:
+            return
+        
         try:
-            update_interval = 5  # Update every 5 seconds
-            elapsed = 0
-            
-            while elapsed < self.lobby_timeout:
-                await asyncio.sleep(update_interval)
-                elapsed += update_interval
-                
-                # Update lobby message
-                try:
-                    players = await db_manager.get_lobby_players()
-                    lobby_message = await self.create_lobby_message(players=players)
-                    
-                    await context.bot.edit_message_text(
-                        chat_id=self.lobby_chat_id,
-                        message_id=self.lobby_message_id,
-                        text=lobby_message,
-                        reply_markup=self.get_lobby_keyboard()
-                    )
-                except BadRequest as e:
-                    # Ignore "message not modified" errors (content unchanged)
-                    if "message is not modified" in str(e).lower():
-                        logger.debug(f"Lobby message unchanged, skipping update")
-                    else:
-                        logger.warning(f"BadRequest updating lobby timer: {e}")
-                except Exception as e:
-                    logger.error(f"Error updating lobby timer: {e}")
+            elapsed = (datetime.now() - session.start_time).total_seconds()
+            if elapsed >= self.lobby_timeout:
+                # Timer expired - start game if minimum players reached
+                logger.info(f"Lobby timer expired in chat {session.chat_id} - checking if game can start")
+                await self._handle_timer_expiry(context, session)
+                return
             
-            # Timer expired - start game if minimum players reached
-            logger.info("Lobby timer expired - checking if game can start")
-            await self._handle_timer_expiry(context)
+            timer_wheel.reschedule(
+                session.timer_task,
+                min(LOBBY_UPDATE_INTERVAL, self.lobby_timeout - elapsed)
+            )
             
-        except asyncio.CancelledError:
-            logger.info("Lobby timer cancelled")
+            # Update lobby message
+            try:
+                lobby_message = await self.create_lobby_message(chat_id=session.chat_id)
+                
+                # Countdown ticks are best-effort: skipped while the group is throttled
+                await message_delivery.edit_message_text(
+                    context.bot,
+                    chat_id=session.chat_id,
+                    message_id=session.message_id,
+                    text=lobby_message,
+                    skip_if_throttled=True,
+                    reply_markup=self.get_lobby_keyboard()
+                )
+            except BadRequest as e:
+                # Ignore "message not modified" errors (content unchanged)
+                if "message is not modified" in str(e).lower():
+                    logger.debug(f"Lobby message unchanged, skipping update")
+                else:
+                    logger.warning(f"BadRequest updating lobby timer: {e}")
+            except Exception as e:
+                logger.error(f"Error updating lobby timer: {e}")
+        
         except Exception as e:
             logger.error(f"Error in lobby timer: {e}")
     
-    async def _handle_timer_expiry(self, context: ContextTypes.DEFAULT_TYPE):
-        """Handle what happens when lobby timer expires"""
-        players = await db_manager.get_lobby_players()
+    async def _handle_timer_expiry(self, context: ContextTypes.DEFAULT_TYPE, session: LobbySession):
+        """Handle what happens when a chat's lobby timer expires"""
+        players = session.players()
         count = len(players)
         
-        logger.info(f"Timer expired with {count} players")
+        logger.info(f"Timer expired with {count} players in chat {session.chat_id}")
         
         if count < self.min_players:
             # Not enough players
@@ -160,13 +229,14 @@ class LobbyHandler:
 Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိမ် ထပ်စမ်းကြည့်ပါ။"""
             
             await context.bot.edit_message_text(
-                chat_id=self.lobby_chat_id,
-                message_id=self.lobby_message_id,
+                chat_id=session.chat_id,
+                message_id=session.message_id,
                 text=message
             )
             
             # Clear lobby
-            await db_manager.clear_lobby()
+            await self.clear_lobby(session.chat_id)
+            await chat_ownership.release(session.chat_id)
             return False
         
         # Remove excess players to form complete teams
@@ -174,18 +244,12 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
         if excess > 0:
             logger.info(f"Removing {excess} excess players to form complete teams")
             
-            # Get players sorted by join time (oldest first)
-            sorted_players = sorted(players, key=lambda p: p.get('joined_at', ''))
-            
-            # Remove latest joiners (excess players)
-            removed_players = sorted_players[-excess:]
+            # Remove latest joiners (members are kept in join order)
+            removed_players = players[-excess:]
             for player in removed_players:
-                await db_manager.remove_from_lobby(player['user_id'])
+                session.remove(player['user_id'])
                 logger.info(f"Removed excess player: {player.get('username', 'Unknown')}")
-            
-            # Get final player list
-            final_players = await db_manager.get_lobby_players()
-            final_count = len(final_players)
+            await db_manager.remove_many_from_lobby([p['user_id'] for p in removed_players])
             
             # Notify removed players
             for player in removed_players:
@@ -200,21 +264,21 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
                 except Exception as e:
                     logger.error(f"Error notifying removed player {player['user_id']}: {e}")
             
-            logger.info(f"Final player count after removal: {final_count}")
+            logger.info(f"Final player count after removal: {len(session)}")
         
         # Start game
         num_teams = count // config.TEAM_SIZE
         message = f"""⏱️ **TIMER EXPIRED - GAME STARTING**
 
-✅ Players: {len(await db_manager.get_lobby_players())} ယောက်
+✅ Players: {len(session)} ယောက်
 🏆 Teams: {num_teams} teams
 
 ⏳ Game ကို စတင်နေပါပြီ..."""
         
         try:
             await context.bot.edit_message_text(
-                chat_id=self.lobby_chat_id,
-                message_id=self.lobby_message_id,
+                chat_id=session.chat_id,
+                message_id=session.message_id,
                 text=message
             )
         except Exception as e:
@@ -222,19 +286,35 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
         
         # Trigger game start
         from handlers.game_handler import game_handler
-        await game_handler.start_game(context, self.lobby_chat_id, self.lobby_message_id)
+        await game_handler.start_game(context, session.chat_id, session.message_id)
         
         return True
     
-    def cancel_lobby_timer(self):
-        """Cancel the lobby timer"""
-        if self.timer_task and not self.timer_task.done():
-            self.timer_task.cancel()
-            logger.info("Lobby timer cancelled")
-        
-        self.lobby_start_time = None
-        self.lobby_chat_id = None
-        self.lobby_message_id = None
+    def cancel_lobby_timer(self, chat_id: int):
+        """Cancel a chat's lobby timer (members are kept for game start)"""
+        session = self.sessions.get(chat_id)
+        if not session:
+            return
+        
+        # Already fired when the caller is the expiry itself (timer expiry -> game start)
+        if session.timer_task and not session.timer_task.done():
+            session.timer_task.cancel()
+            logger.info(f"Lobby timer cancelled for chat {chat_id}")
+        
+        session.start_time = None
+    
+    async def clear_lobby(self, chat_id: int):
+        """Close a chat's lobby: stop its timer, drop members and clear storage"""
+        self.cancel_lobby_timer(chat_id)
+        self.sessions.pop(chat_id, None)
+        muted_chats.unmute(chat_id, 'lobby')
+        await db_manager.clear_lobby(chat_id)
+        logger.info(f"Lobby closed for chat {chat_id}")
+    
+    def _discard_if_empty(self, session: LobbySession):
+        """Drop a session that never got a member (failed first join)"""
+        if not session.members and session.timer_task is None and self.sessions.get(session.chat_id) is session:
+            del self.sessions[session.chat_id]
     
     async def handle_join(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
         """Handle player joining lobby
@@ -248,21 +328,21 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
         user = query.from_user
         user_id = user.id
         username = user.username or user.first_name or f"User_{user_id}"
-        logger.debug(f"Player attempting to join lobby: {username} (ID: {user_id})")
+        chat_id = query.message.chat_id
+        logger.debug(f"Player attempting to join lobby: {username} (ID: {user_id}, chat: {chat_id})")
         
-        # Check if user is already in another active game
-        is_in_game = await db_manager.is_user_in_active_game(user_id)
-        if is_in_game:
-            logger.warning(f"User {user_id} tried to join but is already in active game")
-            await query.answer(
-                "⚠️ သင်သည် လက်ရှိ game တခုထဲမှာ ပါဝင်နေပါသည်!\n\n"
-                "Game တပွဲပြီးမှ နောက်တပွဲ ဆော့နိုင်ပါမယ်။",
-                show_alert=True
-            )
+        session = self.sessions.get(chat_id)
+        if session is None:
+            session = LobbySession(chat_id, query.message.message_id)
+            self.sessions[chat_id] = session
+        
+        if user_id in session:
+            logger.info(f"Player already in lobby: {username}")
+            await query.answer("သင် lobby ထဲမှာ ရှိပြီးသားပါ!", show_alert=True)
             return False
         
         # Check if lobby is already full
-        count = await db_manager.get_lobby_count()
+        count = len(session)
         if count >= self.max_players:
             logger.warning(f"User {user_id} tried to join but lobby is full ({count}/{self.max_players})")
             await query.answer(
@@ -272,22 +352,37 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
             )
             return False
         
+        # Reserve the seat before any await so concurrent joins can't overfill
+        session.add(user_id, username)
+        
+        # Check if user is already in another active game or lobby
+        is_in_game = await db_manager.is_user_in_active_game(user_id)
+        if is_in_game:
+            session.remove(user_id)
+            self._discard_if_empty(session)
+            logger.warning(f"User {user_id} tried to join but is already in active game")
+            await query.answer(
+                "⚠️ သင်သည် လက်ရှိ game တခုထဲမှာ ပါဝင်နေပါသည်!\n\n"
+                "Game တပွဲပြီးမှ နောက်တပွဲ ဆော့နိုင်ပါမယ်။",
+                show_alert=True
+            )
+            return False
+        
         # Add to lobby
-        added = await db_manager.add_to_lobby(user_id, username)
+        added = await db_manager.add_to_lobby(user_id, username, chat_id)
         
         if not added:
-            logger.info(f"Player already in lobby: {username}")
+            session.remove(user_id)
+            self._discard_if_empty(session)
+            logger.info(f"Player already in a lobby: {username}")
             await query.answer("သင် lobby ထဲမှာ ရှိပြီးသားပါ!", show_alert=True)
             return False
         
-        logger.info(f"Player joined lobby: {username}")
-        
-        # Longer delay to avoid rate limiting when multiple joins happen quickly
-        # Especially important for 12-15 player games
-        await asyncio.sleep(0.6)
+        logger.info(f"Player joined lobby in chat {chat_id}: {username}")
         
         # Test if bot can send private messages to user
         try:
+            await rate_limiter.acquire(user_id)
             test_message = await context.bot.send_message(
                 chat_id=user_id,
                 text="✅ သင် lobby သို့ အောင်မြင်စွာ ဝင်ရောက်ပြီးပါပြီ!\n\n"
@@ -297,6 +392,8 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
         except Exception as e:
             # Can't send private message - remove from lobby
             logger.warning(f"Cannot send private message to user {user_id}: {e}")
+            session.remove(user_id)
+            self._discard_if_empty(session)
             await db_manager.remove_from_lobby(user_id)
             
             await query.answer(
@@ -307,27 +404,34 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
             )
             return False
         
-        # Get current count after successful join
-        new_count = await db_manager.get_lobby_count()
+        # The lobby may have been closed (cancel/timeout) while we were waiting
+        if self.sessions.get(chat_id) is not session:
+            return False
         
-        # Start timer if this is the first player
-        if new_count == 1:
-            self.lobby_chat_id = query.message.chat_id
-            self.lobby_message_id = query.message.message_id
-            await self.start_lobby_timer(context)
-            logger.info("First player joined - lobby timer started")
+        new_count = len(session)
         
-        # Update message
-        lobby_message = await self.create_lobby_message(update)
-        await query.edit_message_text(
+        # Start timer when the first player joins
+        if session.timer_task is None:
+            session.message_id = query.message.message_id
+            await self.start_lobby_timer(context, session)
+            logger.info(f"First player joined chat {chat_id} - lobby timer started")
+        
+        # Update message (skipped while the group is throttled; the countdown catches up)
+        lobby_message = await self.create_lobby_message(chat_id=chat_id)
+        await message_delivery.edit_message_text(
+            context.bot,
+            chat_id=chat_id,
+            message_id=query.message.message_id,
             text=lobby_message,
+            skip_if_throttled=True,
             reply_markup=self.get_lobby_keyboard()
         )
         
         # Check if we reached max players (immediate start)
-        if new_count >= self.max_players:
+        if new_count >= self.max_players and not session.starting:
+            session.starting = True
             logger.info(f"Max players reached ({new_count}/{self.max_players})! Starting game immediately")
-            self.cancel_lobby_timer()
+            self.cancel_lobby_timer(chat_id)
             return True
         
         return False
@@ -339,27 +443,34 @@ Game ကို စတင်၍ မရပါ။ နောက်တစ်ကြိ
         
         user = query.from_user
         user_id = user.id
-        logger.debug(f"Player attempting to quit lobby: User ID {user_id}")
-        
-        # Remove from lobby
-        removed = await db_manager.remove_from_lobby(user_id)
+        chat_id = query.message.chat_id
+        logger.debug(f"Player attempting to quit lobby: User ID {user_id}, chat {chat_id}")
         
-        if not removed:
+        session = self.sessions.get(chat_id)
+        if not session or user_id not in session:
             logger.info(f"Player not in lobby: User ID {user_id}")
             await query.answer("သင် lobby ထဲမှာ မရှိပါဘူး!", show_alert=True)
             return False
         
+        # Remove from lobby
+        session.remove(user_id)
+        await db_manager.remove_from_lobby(user_id)
+        
         logger.info(f"Player quit lobby: User ID {user_id}")
         
-        # Update message
-        lobby_message = await self.create_lobby_message(update)
-        await query.edit_message_text(
+        # Update message (skipped while the group is throttled; the countdown catches up)
+        lobby_message = await self.create_lobby_message(chat_id=chat_id)
+        await message_delivery.edit_message_text(
+            context.bot,
+            chat_id=chat_id,
+            message_id=query.message.message_id,
             text=lobby_message,
+            skip_if_throttled=True,
             reply_markup=self.get_lobby_keyboard()
         )
         
         return True
-    
+
     async def announce_game_start(self, context: ContextTypes.DEFAULT_TYPE, 
                                  chat_id: int, message_id: int):
         """Announce that game is starting"""
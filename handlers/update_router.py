@@ -0,0 +1,114 @@
+"""
+Update router for multi-worker mode
+Finds the chat an update belongs to and forwards it to the worker that
+owns that chat, so each game's in-memory state lives in one process
+"""
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from telegram import Update
+from telegram.constants import ChatType
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+from database.db_manager import db_manager
+from handlers.game_handler import game_handler
+from utils.chat_ownership import chat_ownership
+from utils.helpers import parse_vote_callback
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateRouter:
+    """Routes each update to the owner of its home chat
+
+    Group updates belong to their group. Votes and team chat happen in
+    private chats but belong to the game's group, so they follow the game;
+    any other private update belongs to the private chat itself (keeps
+    per-user conversations on one worker).
+    """
+
+    def __init__(self, lookup_ttl: float = 5.0):
+        """
+        Args:
+            lookup_ttl: Seconds a user -> game chat database lookup is cached
+        """
+        self.lookup_ttl = lookup_ttl
+        # user_id -> (game chat or None, cached until monotonic time)
+        self._player_chats: Dict[int, Tuple[Optional[int], float]] = {}
+
+    async def _game_chat(self, game_id: int) -> Optional[int]:
+        game_data = game_handler.active_games.get(game_id)
+        if game_data:
+            return game_data['chat_id']
+        return await db_manager.get_game_chat(game_id)
+
+    async def _player_game_chat(self, user_id: int) -> Optional[int]:
+        team_info = game_handler.player_teams.get(user_id)
+        if team_info:
+            game_data = game_handler.active_games.get(team_info['game_id'])
+            if game_data:
+                return game_data['chat_id']
+
+        cached = self._player_chats.get(user_id)
+        now = time.monotonic()
+        if cached and cached[1] > now:
+            return cached[0]
+        chat_id = await db_manager.get_player_game_chat(user_id)
+        if len(self._player_chats) > 10000:
+            self._player_chats = {
+                uid: entry for uid, entry in self._player_chats.items() if entry[1] > now
+            }
+        self._player_chats[user_id] = (chat_id, now + self.lookup_ttl)
+        return chat_id
+
+    async def resolve_chat(self, update: Update) -> Optional[int]:
+        """Get the chat whose owner must handle an update (None = any worker)"""
+        chat = update.effective_chat
+        if chat is None:
+            return None
+        if chat.type != ChatType.PRIVATE:
+            return chat.id
+
+        query = update.callback_query
+        if query and query.data:
+            vote = parse_vote_callback(query.data)
+            if vote:
+                return await self._game_chat(vote['game_id']) or chat.id
+            return chat.id
+
+        message = update.message
+        if message and message.text and not message.text.startswith('/') and update.effective_user:
+            # Team chat relay runs on the game's owner
+            game_chat = await self._player_game_chat(update.effective_user.id)
+            if game_chat is not None:
+                return game_chat
+        return chat.id
+
+    async def route(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Forward updates owned by another worker and stop local handling"""
+        if not chat_ownership.enabled or not isinstance(update, Update):
+            return
+        if chat_ownership.was_forwarded(update):
+            return
+
+        try:
+            chat_id = await self.resolve_chat(update)
+            if chat_id is None:
+                return
+            owner = await chat_ownership.claim(chat_id)
+            if owner == chat_ownership.worker_id:
+                # A takeover started by this (or an earlier) update restores
+                # the chat's game first, so local handlers see its state
+                await chat_ownership.wait_takeover(chat_id)
+                return
+            forwarded = await chat_ownership.forward(owner, update)
+        except Exception as e:
+            # Ownership store unavailable: better to handle here than to drop
+            logger.error(f"Routing update {update.update_id} failed, handling locally: {e}")
+            return
+
+        if forwarded:
+            raise ApplicationHandlerStop
+
+
+# Global update router instance
+update_router = UpdateRouter()
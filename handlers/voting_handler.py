@@ -3,14 +3,18 @@ Voting handler for character selection
 """
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from database.db_manager import db_manager
 from models.character import Character
 from utils.helpers import parse_vote_callback, get_team_name
 from utils.message_delivery import message_delivery
+from utils.rate_limiter import PRIORITY_BALLOT
+from utils.vote_notifier import vote_notifier
+from utils.timer_wheel import timer_wheel
+from utils.game_registry import game_registry
 from data.themes import get_theme_by_id
 import config
 
@@ -79,6 +83,49 @@ class VotingHandler:
         self.round_timers: Dict[int, Dict[int, datetime]] = {}
         # Store voting messages: {game_id: {round: {team: {user_id: message_id}}}}
         self.voting_messages: Dict[int, Dict[int, Dict[int, Dict[int, int]]]] = {}
+        # Expected voters per team: {game_id: {round: {team: {user_id, ...}}}}
+        self.round_rosters: Dict[int, Dict[int, Dict[int, Set[int]]]] = {}
+        # Set when every rostered player has voted: {game_id: {round: Event}}
+        self.round_complete: Dict[int, Dict[int, asyncio.Event]] = {}
+        # Rounds that stopped accepting votes: {game_id: {round, ...}}
+        self.closed_rounds: Dict[int, Set[int]] = {}
+        # Pending vote log writes: {(game_id, round, user_id): task}
+        self.vote_log_writes: Dict[Tuple[int, int, int], asyncio.Task] = {}
+    
+    def _log_vote(self, game_id: int, round_number: int, team_id: int, user_id: int, character_id: int):
+        """Write a vote to the vote log without blocking the voter
+        
+        Writes for the same voter run one after another so a changed vote
+        always lands last.
+        """
+        key = (game_id, round_number, user_id)
+        previous = self.vote_log_writes.get(key)
+        task = asyncio.create_task(
+            self._write_vote(previous, game_id, round_number, team_id, user_id, character_id)
+        )
+        self.vote_log_writes[key] = task
+        task.add_done_callback(lambda done, key=key: self._vote_logged(key, done))
+    
+    async def _write_vote(self, previous: Optional[asyncio.Task], game_id: int, round_number: int,
+                          team_id: int, user_id: int, character_id: int):
+        """Wait for the voter's previous log write, then record this vote"""
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await db_manager.record_vote(game_id, round_number, team_id, user_id, character_id)
+        except Exception as e:
+            logger.error(f"Failed to log vote - Game: {game_id}, User: {user_id}: {e}")
+    
+    def _vote_logged(self, key: Tuple[int, int, int], task: asyncio.Task):
+        """Forget a finished log write unless a newer one replaced it"""
+        if self.vote_log_writes.get(key) is task:
+            del self.vote_log_writes[key]
+    
+    async def flush_vote_log(self, game_id: int):
+        """Wait for a game's pending vote log writes to finish"""
+        pending = [task for key, task in self.vote_log_writes.items() if key[0] == game_id]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
     
     def init_game_voting(self, game_id: int):
         """Initialize voting data for a game"""
@@ -97,6 +144,101 @@ class VotingHandler:
             self.round_timers[game_id][round_number] = datetime.now()
             self.voting_messages[game_id][round_number] = {}
     
+    def restore_round(self, game_id: int, round_number: int,
+                      team_votes: Dict[int, Dict[int, int]], elapsed: float):
+        """Reload a running round's votes and timer after a restart
+        
+        Args:
+            game_id: Game ID
+            round_number: Round number
+            team_votes: Dict mapping team_id to {user_id: character_id} in vote order
+            elapsed: Seconds the round had already run
+        """
+        self.init_round_voting(game_id, round_number)
+        self.active_votes[game_id][round_number] = {
+            team_id: dict(votes) for team_id, votes in team_votes.items()
+        }
+        self.round_timers[game_id][round_number] = datetime.now() - timedelta(seconds=elapsed)
+    
+    def set_round_roster(self, game_id: int, round_number: int,
+                         teams: Dict[int, List[Dict[str, Any]]]):
+        """Register who is expected to vote so the round can close early
+        
+        Args:
+            game_id: Game ID
+            round_number: Round number
+            teams: Dict mapping team_id to team players
+        """
+        self.init_round_voting(game_id, round_number)
+        self.round_rosters.setdefault(game_id, {})[round_number] = {
+            team_id: {player['user_id'] for player in team_players}
+            for team_id, team_players in teams.items()
+        }
+        self.round_complete.setdefault(game_id, {})[round_number] = asyncio.Event()
+        # Votes may already be in (e.g. roster set after ballots went out)
+        self._check_round_complete(game_id, round_number)
+    
+    def is_round_complete(self, game_id: int, round_number: int) -> bool:
+        """Check whether every rostered player in every team has voted"""
+        roster = self.round_rosters.get(game_id, {}).get(round_number)
+        if not roster:
+            return False
+        round_votes = self.active_votes.get(game_id, {}).get(round_number, {})
+        return all(
+            expected <= round_votes.get(team_id, {}).keys()
+            for team_id, expected in roster.items()
+        )
+    
+    def _check_round_complete(self, game_id: int, round_number: int):
+        """Signal the round's completion event once all votes are in"""
+        event = self.round_complete.get(game_id, {}).get(round_number)
+        if event and not event.is_set() and self.is_round_complete(game_id, round_number):
+            logger.info(f"All players voted - Game: {game_id}, Round: {round_number}")
+            event.set()
+    
+    async def wait_for_round(self, game_id: int, round_number: int, timeout: float) -> bool:
+        """Wait until every team has voted or the deadline passes
+        
+        Args:
+            game_id: Game ID
+            round_number: Round number
+            timeout: Round deadline in seconds
+            
+        Returns:
+            True if the round completed early, False if the deadline passed
+        """
+        event = self.round_complete.get(game_id, {}).get(round_number)
+        if event is None:
+            await timer_wheel.sleep(timeout)
+            return False
+        if event.is_set():
+            return True
+        
+        # The deadline lives on the shared timer wheel (visible as 'round:<game>:<round>')
+        deadline = timer_wheel.schedule(
+            timeout, event.set, key=f"round:{game_id}:{round_number}"
+        )
+        try:
+            await event.wait()
+        finally:
+            deadline.cancel()
+        return not deadline.fired
+    
+    def close_round(self, game_id: int, round_number: int):
+        """Stop accepting votes for a round (called before finalizing)"""
+        self.closed_rounds.setdefault(game_id, set()).add(round_number)
+    
+    def round_time_left(self, game_id: int, round_number: int) -> float:
+        """Seconds until a round's voting deadline (0 once it has passed)"""
+        started = self.round_timers.get(game_id, {}).get(round_number)
+        if started is None:
+            return float(config.ROUND_TIME)
+        return max(0.0, config.ROUND_TIME - (datetime.now() - started).total_seconds())
+    
+    def is_round_closed(self, game_id: int, round_number: int) -> bool:
+        """Check whether a round has stopped accepting votes"""
+        return round_number in self.closed_rounds.get(game_id, ())
+    
     async def create_voting_message(self, characters: List[Character], 
                                    role: str, role_description: str,
                                    team_id: int, team_players: List[Dict[str, Any]],
@@ -161,68 +303,113 @@ class VotingHandler:
         
         return InlineKeyboardMarkup(keyboard)
     
-    async def send_team_voting(self, context: ContextTypes.DEFAULT_TYPE, 
-                              game_id: int, round_number: int, team_id: int,
-                              team_players: List[Dict[str, Any]], 
-                              characters: List[Character]):
-        """Send voting message to all players in a team (PARALLEL for scalability)"""
-        logger.info(f"Sending voting to team {team_id} ({len(team_players)} players) - Game: {game_id}, Round: {round_number}")
-        self.init_round_voting(game_id, round_number)
+    async def get_round_role(self, game_id: int, round_number: int) -> Dict[str, Any]:
+        """Get role info for a round from the game's theme
         
-        if team_id not in self.active_votes[game_id][round_number]:
-            self.active_votes[game_id][round_number][team_id] = {}
-            self.voting_messages[game_id][round_number][team_id] = {}
+        Uses the theme cached by GameHandler; only falls back to the
+        database when the game isn't in memory.
+        """
+        from handlers.game_handler import game_handler
+        theme = game_handler.game_themes.get(game_id)
+        if not theme:
+            theme_id = await db_manager.get_game_theme(game_id)
+            theme = get_theme_by_id(theme_id)
+            game_handler.game_themes[game_id] = theme
+        return theme['roles'].get(round_number, {})
+    
+    async def send_round_voting(self, context: ContextTypes.DEFAULT_TYPE,
+                                game_id: int, round_number: int,
+                                teams: Dict[int, List[Dict[str, Any]]],
+                                team_candidates: Dict[int, List[Character]]) -> Dict[int, int]:
+        """Send every team's ballots as one parallel batch
         
-        # Get role info from theme
-        theme_id = await db_manager.get_game_theme(game_id)
-        theme = get_theme_by_id(theme_id)
-        role_info = theme['roles'].get(round_number, {})
+        All ballots are built up front and handed to the delivery layer
+        together, so the rate limiter schedules the whole round instead of
+        one team after another.
+        
+        Args:
+            context: Bot context
+            game_id: Game ID
+            round_number: Round number
+            teams: Dict mapping team_id to team players
+            team_candidates: Dict mapping team_id to candidate characters
+            
+        Returns:
+            Dict mapping team_id to number of ballots delivered
+        """
+        total_players = sum(len(team_players) for team_players in teams.values())
+        logger.info(f"Sending round voting to {len(teams)} teams ({total_players} players) - Game: {game_id}, Round: {round_number}")
+        self.init_round_voting(game_id, round_number)
+        
+        role_info = await self.get_round_role(game_id, round_number)
         role_name = role_info.get('name', 'Unknown')
         role_description = role_info.get('description', '')
         
-        # Create keyboard (same for all)
-        keyboard = self.create_voting_keyboard(game_id, round_number, team_id, characters)
-        
-        # Prepare recipients for parallel sending
+        # Build all teams' ballots before sending anything
         recipients = []
-        for player in team_players:
-            user_id = player['user_id']
+        for team_id, team_players in teams.items():
+            if team_id not in self.active_votes[game_id][round_number]:
+                self.active_votes[game_id][round_number][team_id] = {}
+                self.voting_messages[game_id][round_number][team_id] = {}
             
-            # Create personalized message for this player
-            message_text = await self.create_voting_message(
-                characters, role_name, role_description,
-                team_id, team_players, user_id
-            )
+            characters = team_candidates[team_id]
+            # Keyboard is shared by the team
+            keyboard = self.create_voting_keyboard(game_id, round_number, team_id, characters)
             
-            recipients.append({
-                'chat_id': user_id,
-                'text': message_text,
-                'player': player  # Store for later reference
-            })
-        
-        # Send all messages in parallel with rate limiting
-        # This is FAST and SCALABLE - works for 3 or 1000 players!
+            for player in team_players:
+                user_id = player['user_id']
+                
+                # Create personalized message for this player
+                message_text = await self.create_voting_message(
+                    characters, role_name, role_description,
+                    team_id, team_players, user_id
+                )
+                
+                recipients.append({
+                    'chat_id': user_id,
+                    'text': message_text,
+                    'team_id': team_id,
+                    'kwargs': {'reply_markup': keyboard}
+                })
+        
+        # One globally rate-limited batch for the whole round; a ballot the
+        # outbox can't deliver before the deadline is dropped, not sent late
         results = await message_delivery.send_parallel(
             context.bot,
             recipients,
-            reply_markup=keyboard,
+            priority=PRIORITY_BALLOT,
+            ttl=self.round_time_left(game_id, round_number),
             parse_mode='Markdown'
         )
         
         # Store message IDs and log results
-        success_count = 0
+        delivered = {team_id: 0 for team_id in teams}
         for recipient in recipients:
             user_id = recipient['chat_id']
+            team_id = recipient['team_id']
             msg = results.get(user_id)
             
             if msg:
                 self.voting_messages[game_id][round_number][team_id][user_id] = msg.message_id
-                success_count += 1
+                delivered[team_id] += 1
             else:
                 logger.warning(f"Failed to deliver voting message to user {user_id}")
         
-        logger.info(
-            f"Team {team_id} voting sent: {success_count}/{len(team_players)} delivered"
+        for team_id, team_players in teams.items():
+            logger.info(
+                f"Team {team_id} voting sent: {delivered[team_id]}/{len(team_players)} delivered"
+            )
+        
+        return delivered
+    
+    async def send_team_voting(self, context: ContextTypes.DEFAULT_TYPE, 
+                              game_id: int, round_number: int, team_id: int,
+                              team_players: List[Dict[str, Any]], 
+                              characters: List[Character]):
+        """Send voting message to all players in a team (PARALLEL for scalability)"""
+        await self.send_round_voting(
+            context, game_id, round_number,
+            {team_id: team_players}, {team_id: characters}
         )
     
     async def handle_vote(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
@@ -246,17 +433,21 @@ class VotingHandler:
         character_id = vote_data['character_id']
         user_id = query.from_user.id
         
+        # Finished, cancelled, swept or not-yet-restored games must not get
+        # fresh voting state (or vote log rows) rebuilt from a stale ballot
+        if not game_registry.is_tracked(game_id):
+            logger.warning(f"Vote for untracked game rejected - Game: {game_id}, Round: {round_number}, User: {user_id}")
+            await query.answer("⚠️ ဒီ game က ပြီးဆုံးသွားပါပြီ။", show_alert=True)
+            return False
+        
         # Handle dice roll - select random character
         if character_id == 'dice':
-            import random
-            # Get all characters from database
-            all_characters = await db_manager.get_all_characters()
-            if not all_characters:
+            # Pick from the in-memory character catalog (no DB round trip)
+            random_character = await db_manager.get_random_character()
+            if not random_character:
                 await query.answer("❌ No characters available!", show_alert=True)
                 return False
             
-            # Select random character
-            random_character = random.choice(all_characters)
             character_id = random_character.id
             logger.info(f"Dice roll - User {user_id} got random character: {random_character.name} (ID: {character_id})")
             await query.answer(f"🎲 Random: {random_character.name}!")
@@ -268,7 +459,7 @@ class VotingHandler:
             round_start_time = self.round_timers[game_id][round_number]
             elapsed_time = (datetime.now() - round_start_time).total_seconds()
             
-            if elapsed_time > config.ROUND_TIME:
+            if elapsed_time > config.ROUND_TIME or self.is_round_closed(game_id, round_number):
                 logger.warning(f"Late vote rejected - Game: {game_id}, Round: {round_number}, User: {user_id}, Elapsed: {elapsed_time}s")
                 await query.answer(
                     "⏱️ Voting time ကျော်သွားပါပြီ!\n\n"
@@ -280,13 +471,18 @@ class VotingHandler:
         await query.answer("မဲပေးပြီးပါပြီ! ✅")
         
         # Record vote
-        
         if team_id not in self.active_votes[game_id][round_number]:
             self.active_votes[game_id][round_number][team_id] = {}
         
         self.active_votes[game_id][round_number][team_id][user_id] = character_id
         logger.info(f"Vote recorded - Game: {game_id}, Round: {round_number}, Team: {team_id}, User: {user_id}, Character: {character_id}")
         
+        # Log the vote in the background so a restart mid-round can replay it
+        self._log_vote(game_id, round_number, team_id, user_id, character_id)
+        
+        # Let the round close early once every team is complete
+        self._check_round_complete(game_id, round_number)
+        
         # Get voter info
         voter_username = query.from_user.username or query.from_user.first_name or f"User_{user_id}"
         
@@ -294,9 +490,7 @@ class VotingHandler:
         try:
             character = await db_manager.get_character(character_id)
             # Get role name for this round from theme
-            theme_id = await db_manager.get_game_theme(game_id)
-            theme = get_theme_by_id(theme_id)
-            role_info = theme['roles'].get(round_number, {})
+            role_info = await self.get_round_role(game_id, round_number)
             role_name = role_info.get('name', 'Unknown')
             
             await query.edit_message_text(
@@ -304,31 +498,16 @@ class VotingHandler:
                 parse_mode='Markdown'
             )
             
-            # Notify team members about this vote
-            # Get team players from game handler
+            # Update teammates' live vote status (debounced, sent in the background)
             from handlers.game_handler import game_handler
             if user_id in game_handler.player_teams:
                 team_info = game_handler.player_teams[user_id]
                 team_players = team_info['team_players']
-                team_name = get_team_name(team_players)
-                
-                # Send notification to other team members (with retry logic)
-                for player in team_players:
-                    recipient_id = player.get('user_id')
-                    if recipient_id != user_id:  # Don't send to voter
-                        notification = await message_delivery.send_message_with_retry(
-                            context.bot,
-                            chat_id=recipient_id,
-                            text=f"📢 **{team_name} Vote Update**\n\n"
-                                 f"@{voter_username} က **{character.name}** ကို "
-                                 f"**{role_name}** အတွက် vote လုပ်ပြီးပါပြီ။",
-                            parse_mode='Markdown'
-                        )
-                        
-                        if notification:
-                            logger.debug(f"Vote notification delivered to team member {recipient_id}")
-                        else:
-                            logger.error(f"Failed to deliver vote notification to {recipient_id}")
+                vote_notifier.notify(
+                    context.bot, game_id, round_number, team_id,
+                    team_players, get_team_name(team_players), role_name,
+                    user_id, voter_username, character.name
+                )
         except Exception as e:
             logger.error(f"Error updating vote message: {e}")
         
@@ -399,94 +578,115 @@ class VotingHandler:
             logger.debug(f"No majority, leader didn't vote, using first voter's choice: Character {first_vote}")
             return first_vote
     
+    def build_selection_confirmation(self, team_players: List[Dict[str, Any]], round_number: int,
+                                     role_name: str, selected_char_id: Optional[int],
+                                     votes: Dict[int, int], characters: Dict[int, Character]) -> str:
+        """Render a team's end-of-round selection message (plain text)"""
+        team_name = get_team_name(team_players)
+        selected = characters.get(selected_char_id) if selected_char_id else None
+        if not selected:
+            return (
+                f"⚠️ {team_name} - Round {round_number} ရလဒ်\n\n"
+                f"{role_name} အတွက်: Optional\n"
+                f"(Team က vote မပေးခဲ့ပါ)"
+            )
+        
+        confirmation_msg = (
+            f"✅ {team_name} - Round {round_number} ရလဒ်\n\n"
+            f"📊 {role_name} အတွက်:\n"
+            f"➡️ {selected.name} ကို ရွေးချယ်ပြီးပါပြီ!\n\n"
+        )
+        
+        # Show voting summary
+        if votes:
+            confirmation_msg += "🗳️ Voting Summary:\n"
+            players_by_id = {p['user_id']: p for p in team_players}
+            for voter_id, char_id in votes.items():
+                voter_player = players_by_id.get(voter_id)
+                voted_char = characters.get(char_id)
+                if voter_player and voted_char:
+                    voter_name = voter_player.get('username', 'Unknown')
+                    leader_mark = " 👑" if voter_player.get('is_leader') else ""
+                    confirmation_msg += f"• {voter_name}{leader_mark} → {voted_char.name}\n"
+        return confirmation_msg
+    
     async def finalize_round_voting(self, game_id: int, round_number: int, 
                                    teams: Dict[int, List[Dict[str, Any]]],
                                    context: ContextTypes.DEFAULT_TYPE = None) -> Dict[int, Optional[int]]:
         """Finalize voting for all teams in a round
         
+        Every team is resolved in memory, all selections are saved with one
+        bulk upsert, and skip notices plus confirmations go out together in
+        one concurrent delivery wave.
+        
         Returns:
             Dict mapping team_id to selected character_id
         """
         logger.info(f"Finalizing voting - Game: {game_id}, Round: {round_number}")
         selections = {}
-        
-        # Get role info from theme
-        theme_id = await db_manager.get_game_theme(game_id)
-        theme = get_theme_by_id(theme_id)
-        role_info = theme['roles'].get(round_number, {})
-        role_name = role_info.get('name', 'Unknown')
+        team_votes = {}
         
         for team_id, team_players in teams.items():
             votes = self.get_team_votes(game_id, round_number, team_id)
             selected_char_id = self.resolve_team_vote(votes, team_players)
             logger.debug(f"Team {team_id} selection: Character {selected_char_id} (Votes: {votes})")
-            
             selections[team_id] = selected_char_id
+            team_votes[team_id] = votes
+        
+        role_info = await self.get_round_role(game_id, round_number)
+        role_name = role_info.get('name', 'Unknown')
+        
+        to_save = {
+            team_id: (char_id, team_votes[team_id])
+            for team_id, char_id in selections.items() if char_id
+        }
+        save_task = asyncio.create_task(
+            db_manager.save_round_selections(game_id, round_number, role_name, to_save)
+        )
+        
+        if context:
+            char_ids = {
+                char_id for votes in team_votes.values() for char_id in votes.values()
+            }
+            characters = await db_manager.get_characters(list(char_ids)) if char_ids else {}
+            
+            skip_notice = (
+                f"⚠️ **Round {round_number} Voting Skipped**\n\n"
+                f"သင် Round {round_number} ({role_name}) အတွက် "
+                f"vote မပေးခဲ့ပါ!\n\n"
+                f"နောက် round မှာ မမေ့ပဲ vote ပေးပါနော်။"
+            )
+            skip_recipients = []
+            confirmation_recipients = []
             
-            # Send notification to players who didn't vote
-            if context:
+            for team_id, team_players in teams.items():
+                votes = team_votes[team_id]
+                # Confirmation without Markdown to avoid parsing errors
+                confirmation_msg = self.build_selection_confirmation(
+                    team_players, round_number, role_name,
+                    selections[team_id], votes, characters
+                )
                 for player in team_players:
                     user_id = player.get('user_id')
                     if user_id not in votes:
-                        # Player didn't vote
-                        try:
-                            await context.bot.send_message(
-                                chat_id=user_id,
-                                text=f"⚠️ **Round {round_number} Voting Skipped**\n\n"
-                                     f"သင် Round {round_number} ({role_name}) အတွက် "
-                                     f"vote မပေးခဲ့ပါ!\n\n"
-                                     f"နောက် round မှာ မမေ့ပဲ vote ပေးပါနော်။",
-                                parse_mode='Markdown'
-                            )
-                            logger.debug(f"Sent skip notification to user {user_id}")
-                        except Exception as e:
-                            logger.error(f"Failed to send skip notification to user {user_id}: {e}")
-                
-                # Send final selection confirmation to all team members
-                team_name = get_team_name(team_players)
-                if selected_char_id:
-                    character = await db_manager.get_character(selected_char_id)
-                    confirmation_msg = (
-                        f"✅ {team_name} - Round {round_number} ရလဒ်\n\n"
-                        f"📊 {role_name} အတွက်:\n"
-                        f"➡️ {character.name} ကို ရွေးချယ်ပြီးပါပြီ!\n\n"
-                    )
-                    
-                    # Show voting summary
-                    if votes:
-                        confirmation_msg += "🗳️ Voting Summary:\n"
-                        for voter_id, char_id in votes.items():
-                            voter_player = next((p for p in team_players if p['user_id'] == voter_id), None)
-                            if voter_player:
-                                voter_name = voter_player.get('username', 'Unknown')
-                                voted_char = await db_manager.get_character(char_id)
-                                leader_mark = " 👑" if voter_player.get('is_leader') else ""
-                                confirmation_msg += f"• {voter_name}{leader_mark} → {voted_char.name}\n"
-                else:
-                    confirmation_msg = (
-                        f"⚠️ {team_name} - Round {round_number} ရလဒ်\n\n"
-                        f"{role_name} အတွက်: Optional\n"
-                        f"(Team က vote မပေးခဲ့ပါ)"
-                    )
-                
-                # Send confirmation to all team members (without Markdown to avoid parsing errors)
-                for player in team_players:
-                    user_id = player.get('user_id')
-                    try:
-                        await context.bot.send_message(
-                            chat_id=user_id,
-                            text=confirmation_msg
-                        )
-                        logger.debug(f"Sent selection confirmation to user {user_id}")
-                    except Exception as e:
-                        logger.error(f"Failed to send confirmation to user {user_id}: {e}")
+                        skip_recipients.append({
+                            'chat_id': user_id,
+                            'text': skip_notice,
+                            'kwargs': {'parse_mode': 'Markdown'}
+                        })
+                    confirmation_recipients.append({'chat_id': user_id, 'text': confirmation_msg})
             
-            # Save to database
-            if selected_char_id:
-                await db_manager.save_round_selection(
-                    game_id, round_number, team_id, role_name, 
-                    selected_char_id, votes
-                )
+            # Skip notices are queued ahead of confirmations in each chat
+            await message_delivery.send_parallel(
+                context.bot, skip_recipients + confirmation_recipients
+            )
+            logger.debug(
+                f"Round {round_number} wrap-up sent: {len(skip_recipients)} skip notices, "
+                f"{len(confirmation_recipients)} confirmations"
+            )
+        
+        # Save to database
+        await save_task
         
         return selections
     
@@ -499,6 +699,10 @@ class VotingHandler:
             del self.round_timers[game_id]
         if game_id in self.voting_messages:
             del self.voting_messages[game_id]
+        self.round_rosters.pop(game_id, None)
+        self.round_complete.pop(game_id, None)
+        self.closed_rounds.pop(game_id, None)
+        vote_notifier.clear_game(game_id)
 
 
 # Global voting handler instance
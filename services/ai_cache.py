@@ -0,0 +1,261 @@
+"""
+Persistent memoization cache for AI responses
+In-memory LRU in front of a Postgres table, keyed by prompt hash
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from database.db_manager import db_manager
+import config
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+class ComputeAbandoned(Exception):
+    """The caller computing a value was cancelled; waiters compute it themselves"""
+
+
+class AICache:
+    """Content-addressed cache for Gemini responses
+
+    Lookups check the in-process LRU first, then the ai_cache table.
+    Database errors never fail a lookup; the cache just misses.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: int = None):
+        """
+        Args:
+            max_entries: LRU capacity (in-memory entries)
+            ttl: Entry lifetime in seconds (0 = never expires)
+        """
+        self.max_entries = max_entries if max_entries is not None else config.AI_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else config.AI_CACHE_TTL
+        # key -> (value, expires_at monotonic or None)
+        self._entries: OrderedDict = OrderedDict()
+        # Single-flight: concurrent misses for one key share one model call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind: str, model_name: str, prompt: str) -> str:
+        """Build the content address for a prompt
+
+        Args:
+            kind: Request kind (e.g. 'description', 'role_score')
+            model_name: Model the prompt is sent to
+            prompt: Full prompt text
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in (kind, model_name, prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    async def init_cache_table(self):
+        """Create the ai_cache table"""
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS ai_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP
+                )
+            ''')
+            await conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_ai_cache_expires
+                ON ai_cache(expires_at)
+            ''')
+        logger.info("AI cache table initialized")
+
+    # ==================== Memory Layer ====================
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: str, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl > 0 else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ==================== Public API ====================
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached value
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached value or None on miss/expiry
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if db_manager.pool:
+            try:
+                async with db_manager.pool.acquire() as conn:
+                    row = await conn.fetchrow('''
+                        SELECT value,
+                               EXTRACT(EPOCH FROM (expires_at - NOW())) AS remaining
+                        FROM ai_cache
+                        WHERE cache_key = $1
+                          AND (expires_at IS NULL OR expires_at > NOW())
+                    ''', key)
+                if row:
+                    remaining = row['remaining']
+                    # Keep the row's own expiry when promoting into memory
+                    self._memory_set(key, row['value'], float(remaining) if remaining is not None else 0)
+                    self.hits += 1
+                    return row['value']
+            except Exception as e:
+                logger.warning(f"AI cache read failed: {e}")
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, kind: str, value: str):
+        """Store a value in memory and in the ai_cache table
+
+        Args:
+            key: Cache key from make_key
+            kind: Request kind (kept for inspection and purges)
+            value: Response text
+        """
+        self._memory_set(key, value)
+
+        if not db_manager.pool:
+            return
+        try:
+            async with db_manager.pool.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO ai_cache (cache_key, kind, value, expires_at)
+                    VALUES ($1, $2, $3,
+                            CASE WHEN $4::int > 0
+                                 THEN NOW() + make_interval(secs => $4::int)
+                            END)
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET value = EXCLUDED.value,
+                        created_at = CURRENT_TIMESTAMP,
+                        expires_at = EXCLUDED.expires_at
+                ''', key, kind, value, int(self.ttl))
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    async def get_or_compute(self, kind: str, key: str,
+                             compute: Callable[[], Awaitable[str]],
+                             validate: Optional[Callable[[str], bool]] = None) -> Tuple[str, bool]:
+        """Return the cached value or compute and store it
+
+        Concurrent callers missing on the same key wait for a single compute.
+        Exceptions from compute are not cached and propagate to every waiter.
+        If the computing caller is cancelled, the waiters are not: one of
+        them takes over the compute.
+
+        Args:
+            kind: Request kind
+            key: Cache key from make_key
+            compute: Coroutine factory producing the value
+            validate: Optional check; values failing it are returned but
+                never cached (and cached ones failing it count as misses)
+
+        Returns:
+            Tuple of (value, was_cached)
+        """
+        while True:
+            value = await self.get(key)
+            if value is not None and (validate is None or validate(value)):
+                return value, True
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending), True
+            except ComputeAbandoned:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            if validate is None or validate(value):
+                await self.set(key, kind, value)
+            else:
+                logger.warning(f"AI response for {kind} failed validation, not caching it")
+            future.set_result(value)
+            return value, False
+        except asyncio.CancelledError:
+            self._release_inflight(key, future)
+            future.set_exception(ComputeAbandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._release_inflight(key, future)
+
+    def _release_inflight(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from memory and the ai_cache table
+
+        Returns:
+            Number of database rows deleted
+        """
+        now = time.monotonic()
+        for key in [k for k, (_, exp) in self._entries.items() if exp is not None and exp <= now]:
+            del self._entries[key]
+
+        if not db_manager.pool:
+            return 0
+        async with db_manager.pool.acquire() as conn:
+            result = await conn.execute(
+                'DELETE FROM ai_cache WHERE expires_at IS NOT NULL AND expires_at <= NOW()'
+            )
+        deleted = int(result.split()[-1])
+        logger.info(f"Purged {deleted} expired AI cache rows")
+        return deleted
+
+    def clear_memory(self):
+        """Drop all in-memory entries (the table is untouched)"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache statistics"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Global AI cache instance
+ai_cache = AICache()
@@ -2,11 +2,13 @@
 AI Service for Gemini integration
 """
 import google.generativeai as genai
+import asyncio
 import re
 import logging
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 import config
 from models.character import Character
+from services.ai_cache import ai_cache
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -17,7 +19,50 @@ class AIService:
     
     def __init__(self):
         genai.configure(api_key=config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model_name = 'gemini-1.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.timeout = config.AI_TIMEOUT
+        # Bounds in-flight model calls so a burst of games can't pile up requests
+        self._semaphore = asyncio.Semaphore(config.AI_MAX_CONCURRENCY)
+    
+    async def _generate(self, prompt: str, kind: Optional[str] = None,
+                        validate: Optional[Callable[[str], bool]] = None) -> str:
+        """Run one Gemini request without blocking the event loop
+        
+        Uses the native async client, limited by the concurrency semaphore
+        and cancelled after the configured timeout. When kind is given the
+        response is memoized in ai_cache by prompt hash.
+        
+        Args:
+            prompt: Prompt text
+            kind: Cache namespace (None = don't cache)
+            validate: Responses failing this check are not cached
+            
+        Returns:
+            Stripped response text
+            
+        Raises:
+            asyncio.TimeoutError: If the model does not answer in time
+        """
+        if kind is None:
+            return await self._call_model(prompt)
+        
+        key = ai_cache.make_key(kind, self.model_name, prompt)
+        text, cached = await ai_cache.get_or_compute(
+            kind, key, lambda: self._call_model(prompt), validate=validate
+        )
+        if cached:
+            logger.debug(f"AI cache hit ({kind}): {key[:12]}")
+        return text
+    
+    async def _call_model(self, prompt: str) -> str:
+        """Send a prompt to Gemini (uncached)"""
+        async with self._semaphore:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt),
+                timeout=self.timeout
+            )
+        return response.text.strip()
     
     async def generate_character_description(self, character: Character) -> str:
         """Generate character description for voting display
@@ -29,23 +74,21 @@ class AIService:
             Description in Burmese
         """
         logger.debug(f"Generating AI description for character: {character.name}")
-        prompt = f"""
-ဒီ character {character.name} က {character.mbti} MBTI နှင့် {character.zodiac} zodiac ပါတယ်။ 
-သူ့ရဲ့ ပုဂ္ဂိုလ်ရေး ဝိသေသလက္ခဏာတွေကို မြန်မာလို 2-3 စာကြောင်းနှင့် ရှင်းပြပေးပါ။
-သူက ဘယ်လို လူမျိုးလဲ၊ သူ့ရဲ့ အားသာချက်တွေက ဘာတွေလဲ။
-"""
+        prompt = self._description_prompt(character)
         
         try:
-            response = self.model.generate_content(prompt)
-            description = response.text.strip()
+            description = await self._generate(prompt, kind='description')
             logger.info(f"AI description generated for {character.name}: {len(description)} chars")
             return description
+        except asyncio.TimeoutError:
+            logger.error(f"AI timeout generating description for {character.name} after {self.timeout}s")
         except Exception as e:
             logger.error(f"AI Error generating description: {e}")
-            # Fallback description
-            fallback = f"{character.name} သည် {character.mbti} လူမျိုးဖြစ်ပြီး {character.zodiac} နဲ့ မွေးဖွားသူဖြစ်ပါတယ်။"
-            logger.warning(f"Using fallback description for {character.name}")
-            return fallback
+        
+        # Fallback description
+        fallback = f"{character.name} သည် {character.mbti} လူမျိုးဖြစ်ပြီး {character.zodiac} နဲ့ မွေးဖွားသူဖြစ်ပါတယ်။"
+        logger.warning(f"Using fallback description for {character.name}")
+        return fallback
     
     async def score_character_role_match(self, character: Character, role: str, 
                                         role_description: str) -> Tuple[int, str]:
@@ -78,14 +121,15 @@ Explanation: [အကြောင်းပြချက်]
 """
         
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
+            # Replies without a Score line are used once but never cached
+            text = await self._generate(
+                prompt, kind='role_score',
+                validate=lambda reply: self.parse_role_score(reply) is not None
+            )
             
-            # Parse score
-            score_match = re.search(r'Score:\s*(\d+)', text)
-            if score_match:
-                score = int(score_match.group(1))
-                score = max(1, min(10, score))  # Ensure 1-10
+            parsed = self.parse_role_score(text)
+            if parsed:
+                score, explanation = parsed
             else:
                 # Try to find any number in the response
                 numbers = re.findall(r'\b(\d+)\b', text)
@@ -94,25 +138,46 @@ Explanation: [အကြောင်းပြချက်]
                     score = max(1, min(10, score))
                 else:
                     score = 5  # Default middle score
-            
-            # Parse explanation
-            explanation_match = re.search(r'Explanation:\s*(.+)', text, re.DOTALL)
-            if explanation_match:
-                explanation = explanation_match.group(1).strip()
-            else:
                 # Use the whole response as explanation
                 explanation = text
             
             logger.info(f"AI scored {character.name} for {role}: {score}/10")
             return score, explanation
             
+        except asyncio.TimeoutError:
+            logger.error(f"AI scoring timeout for {character.name} ({role}) after {self.timeout}s")
         except Exception as e:
             logger.error(f"AI Scoring Error: {e}")
-            # Fallback scoring
-            fallback_score = 5
-            fallback_explanation = f"{character.name} သည် {role} အခန်းကဏ္ဍအတွက် အလယ်အလတ် သင့်တော်ပါသည်။"
-            logger.warning(f"Using fallback score for {character.name}: {fallback_score}/10")
-            return fallback_score, fallback_explanation
+        
+        # Fallback scoring
+        fallback_score = 5
+        fallback_explanation = f"{character.name} သည် {role} အခန်းကဏ္ဍအတွက် အလယ်အလတ် သင့်တော်ပါသည်။"
+        logger.warning(f"Using fallback score for {character.name}: {fallback_score}/10")
+        return fallback_score, fallback_explanation
+    
+    @staticmethod
+    def parse_role_score(text: str) -> Optional[Tuple[int, str]]:
+        """Parse a role-score reply
+        
+        Returns:
+            (score clamped to 1-10, explanation), or None without a Score line
+        """
+        score_match = re.search(r'Score:\s*(\d+)', text)
+        if not score_match:
+            return None
+        score = max(1, min(10, int(score_match.group(1))))
+        
+        explanation_match = re.search(r'Explanation:\s*(.+)', text, re.DOTALL)
+        explanation = explanation_match.group(1).strip() if explanation_match else text
+        return score, explanation
+    
+    def _description_prompt(self, character: Character) -> str:
+        """Build the description prompt (also used as the cache address)"""
+        return f"""
+ဒီ character {character.name} က {character.mbti} MBTI နှင့် {character.zodiac} zodiac ပါတယ်။ 
+သူ့ရဲ့ ပုဂ္ဂိုလ်ရေး ဝိသေသလက္ခဏာတွေကို မြန်မာလို 2-3 စာကြောင်းနှင့် ရှင်းပြပေးပါ။
+သူက ဘယ်လို လူမျိုးလဲ၊ သူ့ရဲ့ အားသာချက်တွေက ဘာတွေလဲ။
+"""
     
     async def batch_score_team_selections(self, game_id: int, team_rounds: list) -> list:
         """Score all character-role selections for a team
@@ -124,26 +189,29 @@ Explanation: [အကြောင်းပြချက်]
         Returns:
             List of scored rounds
         """
-        scored_rounds = []
+        scorable = [
+            round_data for round_data in team_rounds
+            if round_data.get('character') and round_data.get('role')
+        ]
         
-        for round_data in team_rounds:
-            character = round_data.get('character')
-            role = round_data.get('role')
-            role_description = round_data.get('role_description')
-            
-            if character and role:
-                score, explanation = await self.score_character_role_match(
-                    character, role, role_description
-                )
-                scored_rounds.append({
-                    'round_number': round_data['round_number'],
-                    'role': role,
-                    'character': character,
-                    'score': score,
-                    'explanation': explanation
-                })
+        # Score concurrently; the semaphore in _generate bounds the fan-out
+        scores = await asyncio.gather(*(
+            self.score_character_role_match(
+                round_data['character'], round_data['role'], round_data.get('role_description')
+            )
+            for round_data in scorable
+        ))
         
-        return scored_rounds
+        return [
+            {
+                'round_number': round_data['round_number'],
+                'role': round_data['role'],
+                'character': round_data['character'],
+                'score': score,
+                'explanation': explanation
+            }
+            for round_data, (score, explanation) in zip(scorable, scores)
+        ]
 
 
 # Global AI service instance
@@ -6,7 +6,7 @@ import logging
 from database.db_manager import db_manager
 from utils.helpers import get_team_name
 from data.themes import get_theme_by_id
-from data.full_scores import MBTI_SCORES, ZODIAC_SCORES
+from data import score_matrix
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -27,17 +27,10 @@ class ScoringService:
         """
         logger.debug(f"Calculating score for {character.name} - Role: {role_name}")
         
-        # Get MBTI score
-        mbti_score_dict = MBTI_SCORES.get(role_name, {})
-        mbti_score = mbti_score_dict.get(character.mbti, 5)  # Default 5 if not found
-        
-        # Get Zodiac score
-        zodiac_score_dict = ZODIAC_SCORES.get(role_name, {})
-        zodiac_score = zodiac_score_dict.get(character.zodiac, 5)  # Default 5 if not found
-        
-        # Calculate average score (weighted: 60% MBTI, 40% Zodiac)
-        final_score = int((mbti_score * 0.6) + (zodiac_score * 0.4))
-        final_score = max(1, min(10, final_score))  # Ensure 1-10 range
+        # Precompiled lookup (60% MBTI, 40% Zodiac, clamped to 1-10)
+        final_score, mbti_score, zodiac_score = score_matrix.lookup(
+            role_name, character.mbti, character.zodiac
+        )
         
         # Generate explanation
         explanation = self._generate_explanation(
@@ -48,6 +41,18 @@ class ScoringService:
         logger.info(f"Score calculated: {character.name} for {role_name} = {final_score}/10")
         return final_score, explanation
     
+    def score_many(self, characters: List[Any], roles: List[str]) -> List[List[int]]:
+        """Score every character x role pair in one pass
+        
+        Args:
+            characters: Character objects with mbti and zodiac
+            roles: Role names
+            
+        Returns:
+            Matrix where result[i][j] is the 1-10 score of characters[i] for roles[j]
+        """
+        return score_matrix.score_many(characters, roles)
+    
     def _generate_explanation(self, char_name: str, mbti: str, zodiac: str,
                              role: str, mbti_score: int, zodiac_score: int,
                              final_score: int) -> str:
@@ -119,6 +124,9 @@ class ScoringService:
     async def score_game(self, game_id: int) -> Dict[int, Dict[str, Any]]:
         """Score all teams in a game
         
+        Loads every selection (with its character and the game theme) in one
+        query, scores in memory and writes all scores back in one statement.
+        
         Args:
             game_id: Game ID
             
@@ -127,44 +135,55 @@ class ScoringService:
         """
         logger.info(f"Scoring game {game_id}")
         
-        # Get all rounds for the game
-        rounds = await db_manager.get_game_rounds(game_id)
-        logger.debug(f"Game {game_id} has {len(rounds)} round entries")
+        # Get theme and all round selections with characters
+        selections = await db_manager.get_game_selections(game_id)
+        logger.debug(f"Game {game_id} has {len(selections['rounds'])} round entries")
         
         # Get teams
         teams = await db_manager.get_game_players(game_id)
         
-        # Score each team
-        team_scores = {}
-        for team_id in teams.keys():
-            logger.debug(f"Scoring team {team_id}")
-            team_rounds = [r for r in rounds if r.team_id == team_id]
+        theme = get_theme_by_id(selections['theme_id']) or get_theme_by_id(1)
+        
+        # Score every round of every team
+        results = {}
+        scores = []
+        for game_round in selections['rounds']:
+            team_id = game_round['team_id']
+            character = game_round['character']
+            if team_id not in results:
+                results[team_id] = {
+                    'rounds': [],
+                    'total_score': 0
+                }
+            
+            score = 0
+            explanation = None
+            if character:
+                role_info = theme['roles'].get(game_round['round_number'], {})
+                role_name = role_info.get('name', '')
+                
+                # Calculate score using pre-defined system
+                score, explanation = self.calculate_character_score(character, role_name)
+                logger.debug(f"Team {team_id} - Round {game_round['round_number']} - Score: {score}")
+                scores.append({
+                    'round_number': game_round['round_number'],
+                    'team_id': team_id,
+                    'score': score,
+                    'explanation': explanation
+                })
             
-            # Score each round
-            for game_round in team_rounds:
-                if game_round.selected_character_id:
-                    character = await db_manager.get_character(game_round.selected_character_id)
-                    
-                    if character:
-                        # Get role info from theme
-                        theme_id = await db_manager.get_game_theme(game_id)
-                        theme = get_theme_by_id(theme_id)
-                        role_info = theme['roles'].get(game_round.round_number, {})
-                        role_name = role_info.get('name', '')
-                        
-                        # Calculate score using pre-defined system
-                        score, explanation = self.calculate_character_score(
-                            character, role_name
-                        )
-                        
-                        # Save score
-                        logger.debug(f"Team {team_id} - Round {game_round.round_number} - Score: {score}")
-                        await db_manager.save_round_score(
-                            game_id, game_round.round_number, team_id, score, explanation
-                        )
-        
-        # Get final results
-        results = await db_manager.get_game_results(game_id)
+            results[team_id]['rounds'].append({
+                'round_number': game_round['round_number'],
+                'role': game_round['role'],
+                'character_id': game_round['character_id'],
+                'character_name': character.name if character else None,
+                'score': score,
+                'explanation': explanation
+            })
+            results[team_id]['total_score'] += score
+        
+        # Save all scores at once
+        await db_manager.save_round_scores(game_id, scores)
         
         # Add team players info
         for team_id in results.keys():
@@ -0,0 +1,252 @@
+"""
+Test AI Response Cache
+Verify LRU, TTL, single-flight and that cached prompts skip the model
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.ai_cache import AICache
+from services.ai_service import ai_service
+from services import ai_service as ai_service_module
+from models.character import Character
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+async def test_keys():
+    """Test content addressing"""
+    print("\n🔑 Test: Cache Keys")
+    print("-" * 70)
+
+    k1 = AICache.make_key('description', 'model', 'prompt')
+    k2 = AICache.make_key('description', 'model', 'prompt')
+    k3 = AICache.make_key('role_score', 'model', 'prompt')
+
+    if k1 == k2 and k1 != k3 and len(k1) == 64:
+        results.add_pass("Same prompt → same key, different kind → different key")
+    else:
+        results.add_fail("Cache keys", f"{k1} / {k2} / {k3}")
+
+
+async def test_lru_and_ttl():
+    """Test LRU eviction and TTL expiry (memory only, no pool)"""
+    print("\n♻️ Test: LRU & TTL")
+    print("-" * 70)
+
+    cache = AICache(max_entries=2, ttl=0)
+    await cache.set('a', 'k', '1')
+    await cache.set('b', 'k', '2')
+    await cache.get('a')          # a becomes most recent
+    await cache.set('c', 'k', '3')  # evicts b
+
+    if await cache.get('a') == '1' and await cache.get('b') is None and await cache.get('c') == '3':
+        results.add_pass("Least recently used entry evicted")
+    else:
+        results.add_fail("LRU eviction", str(cache._entries))
+
+    short = AICache(max_entries=10, ttl=0.05)
+    await short.set('x', 'k', 'value')
+    fresh = await short.get('x')
+    await asyncio.sleep(0.1)
+    stale = await short.get('x')
+
+    if fresh == 'value' and stale is None:
+        results.add_pass("Entries expire after TTL")
+    else:
+        results.add_fail("TTL", f"fresh={fresh}, stale={stale}")
+
+
+async def test_single_flight():
+    """Test concurrent misses share one compute"""
+    print("\n🛫 Test: Single-flight")
+    print("-" * 70)
+
+    cache = AICache(max_entries=10, ttl=0)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 'answer'
+
+    values = await asyncio.gather(*(cache.get_or_compute('k', 'key', compute) for _ in range(10)))
+
+    if calls == 1 and all(v == 'answer' for v, _ in values):
+        results.add_pass("10 concurrent misses → 1 compute")
+    else:
+        results.add_fail("Single-flight", f"compute called {calls} times")
+
+
+async def test_cancelled_leader():
+    """Test cancelling the computing caller doesn't cancel the waiters"""
+    print("\n🛑 Test: Cancelled Single-flight Leader")
+    print("-" * 70)
+
+    cache = AICache(max_entries=10, ttl=0)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 'answer'
+
+    leader = asyncio.create_task(cache.get_or_compute('k', 'key', compute))
+    await asyncio.sleep(0.01)
+    waiters = [asyncio.create_task(cache.get_or_compute('k', 'key', compute)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+
+    if all(outcome == ('answer', True) or outcome == ('answer', False) for outcome in outcomes) \
+            and calls == 2 and leader.cancelled():
+        results.add_pass("Waiters recompute once after the leader is cancelled")
+    else:
+        results.add_fail("Cancelled leader", f"outcomes={outcomes}, calls={calls}")
+
+
+async def test_unparseable_role_score_not_cached():
+    """Test role-score replies without a Score line are never cached"""
+    print("\n🧾 Test: Unparseable Role Scores")
+    print("-" * 70)
+
+    ai_service_module.ai_cache.clear_memory()
+    character = Character(3, "Score Test", "ISTP", "Virgo", "")
+    replies = ["I cannot rate this", "Score: 8\nExplanation: ခေါင်းဆောင်", "unused"]
+    calls = 0
+
+    async def fake_generate(prompt):
+        nonlocal calls
+        reply = replies[calls]
+        calls += 1
+        return FakeResponse(reply)
+
+    original = ai_service.model.generate_content_async
+    ai_service.model.generate_content_async = fake_generate
+    try:
+        first = await ai_service.score_character_role_match(character, "ဘုရင်", "ဦးဆောင်နိုင်တဲ့သူ")
+        second = await ai_service.score_character_role_match(character, "ဘုရင်", "ဦးဆောင်နိုင်တဲ့သူ")
+        third = await ai_service.score_character_role_match(character, "ဘုရင်", "ဦးဆောင်နိုင်တဲ့သူ")
+    finally:
+        ai_service.model.generate_content_async = original
+        ai_service_module.ai_cache.clear_memory()
+
+    if first[0] == 5 and second == third == (8, "ခေါင်းဆောင်") and calls == 2:
+        results.add_pass("Unparseable reply re-asked, parsed reply cached")
+    else:
+        results.add_fail("Role score validation", f"{first}, {second}, {third}, calls={calls}")
+
+
+async def test_ai_service_uses_cache():
+    """Test repeated descriptions skip the model and failures are not cached"""
+    print("\n🤖 Test: AIService Memoization")
+    print("-" * 70)
+
+    ai_service_module.ai_cache.clear_memory()
+    character = Character(1, "Cache Test", "INTJ", "Leo", "")
+    calls = 0
+
+    async def fake_generate(prompt):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return FakeResponse("ဖော်ပြချက်")
+
+    original = ai_service.model.generate_content_async
+    ai_service.model.generate_content_async = fake_generate
+    try:
+        first = await ai_service.generate_character_description(character)
+        start = time.perf_counter()
+        second = await ai_service.generate_character_description(character)
+        elapsed = time.perf_counter() - start
+
+        if first == second == "ဖော်ပြချက်" and calls == 1 and elapsed < 0.01:
+            results.add_pass(f"Repeat description served from cache ({elapsed*1e6:.0f}µs)")
+        else:
+            results.add_fail("Description cache", f"calls={calls}, elapsed={elapsed:.3f}s")
+
+        async def failing_generate(prompt):
+            raise RuntimeError("quota")
+
+        ai_service.model.generate_content_async = failing_generate
+        other = Character(2, "Other", "ENFP", "Aries", "")
+        await ai_service.generate_character_description(other)
+        ai_service.model.generate_content_async = fake_generate
+        await ai_service.generate_character_description(other)
+
+        if calls == 2:
+            results.add_pass("Fallback results are not cached")
+        else:
+            results.add_fail("Fallback caching", f"calls={calls}")
+    finally:
+        ai_service.model.generate_content_async = original
+        ai_service_module.ai_cache.clear_memory()
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 AI CACHE TEST")
+    print("="*70)
+
+    await test_keys()
+    await test_lru_and_ttl()
+    await test_single_flight()
+    await test_cancelled_leader()
+    await test_ai_service_uses_cache()
+    await test_unparseable_role_score_not_cached()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,230 @@
+"""
+Test In-Process Character Catalog
+Verify sampling, exclusion and dice picks run from memory
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.character_catalog import CharacterCatalog
+from database.db_manager import DatabaseManager
+from models.character import Character
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+def make_characters(count: int):
+    """Build test characters with IDs 1..count"""
+    return [
+        Character(id=i, name=f"Char{i}", mbti="INTJ", zodiac="Leo", description="")
+        for i in range(1, count + 1)
+    ]
+
+
+async def test_load_and_lookup():
+    """Test loading a snapshot and looking up by ID"""
+    print("\n📚 Test: Load & Lookup")
+    print("-" * 70)
+
+    catalog = CharacterCatalog()
+    catalog.load(make_characters(20))
+
+    if catalog.loaded and len(catalog) == 20:
+        results.add_pass("Catalog loaded with 20 characters")
+    else:
+        results.add_fail("Catalog load", f"loaded={catalog.loaded}, size={len(catalog)}")
+
+    if catalog.get(7) and catalog.get(7).name == "Char7" and catalog.get(99) is None:
+        results.add_pass("Lookup by ID")
+    else:
+        results.add_fail("Lookup by ID", "Unexpected lookup result")
+
+    if catalog.max_id == 20:
+        results.add_pass("max_id tracked")
+    else:
+        results.add_fail("max_id", f"Expected 20, got {catalog.max_id}")
+
+
+async def test_sampling_with_exclusion():
+    """Test random sampling never returns excluded or duplicate IDs"""
+    print("\n🎯 Test: Sampling with Exclusion")
+    print("-" * 70)
+
+    catalog = CharacterCatalog()
+    catalog.load(make_characters(20))
+    excluded = list(range(1, 16))
+
+    ok = True
+    for _ in range(200):
+        picked = catalog.sample(5, exclude_ids=excluded)
+        ids = [c.id for c in picked]
+        if len(ids) != 5 or len(set(ids)) != 5 or any(i in excluded for i in ids):
+            ok = False
+            break
+
+    if ok:
+        results.add_pass("200 samples respect exclusion and uniqueness")
+    else:
+        results.add_fail("Sampling", f"Bad sample: {ids}")
+
+    short = catalog.sample(5, exclude_ids=list(range(1, 18)))
+    if len(short) == 3:
+        results.add_pass("Sample shrinks when pool is too small")
+    else:
+        results.add_fail("Small pool", f"Expected 3, got {len(short)}")
+
+
+async def test_incremental_upsert():
+    """Test incremental refresh adds new rows without reload"""
+    print("\n➕ Test: Incremental Upsert")
+    print("-" * 70)
+
+    catalog = CharacterCatalog()
+    catalog.load(make_characters(3))
+    catalog.upsert(Character(id=10, name="New", mbti="ENFP", zodiac="Aries", description=""))
+    catalog.upsert(Character(id=10, name="New", mbti="ENFP", zodiac="Aries", description=""))
+
+    if len(catalog) == 4 and catalog.max_id == 10:
+        results.add_pass("Upsert adds once and advances max_id")
+    else:
+        results.add_fail("Upsert", f"size={len(catalog)}, max_id={catalog.max_id}")
+
+
+async def test_db_manager_uses_catalog():
+    """Test DatabaseManager reads come from the catalog (no pool needed)"""
+    print("\n🗄️ Test: DatabaseManager Catalog Reads")
+    print("-" * 70)
+
+    manager = DatabaseManager(database_url="postgresql://unused")
+    manager.character_catalog.load(make_characters(10))
+
+    try:
+        chars = await manager.get_random_characters(5, exclude_ids=[1, 2])
+        dice = await manager.get_random_character()
+        single = await manager.get_character(3)
+        everyone = await manager.get_all_characters()
+
+        if len(chars) == 5 and dice is not None and single.name == "Char3" and len(everyone) == 10:
+            results.add_pass("Reads served without database round trips")
+        else:
+            results.add_fail("Catalog reads", "Unexpected results")
+    except Exception as e:
+        results.add_fail("Catalog reads", f"Touched database: {e}")
+
+
+def mock_pool(rows) -> MagicMock:
+    """Pool whose connections return rows from fetch()"""
+    conn = MagicMock()
+    conn.fetch = AsyncMock(return_value=rows)
+    acquire = MagicMock()
+    acquire.__aenter__ = AsyncMock(return_value=conn)
+    acquire.__aexit__ = AsyncMock(return_value=False)
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=acquire)
+    return pool, conn
+
+
+async def test_round_candidates():
+    """Test per-team candidates come from one grouped query and the catalog"""
+    print("\n🎲 Test: Round Candidates")
+    print("-" * 70)
+
+    manager = DatabaseManager(database_url="postgresql://unused")
+    manager.character_catalog.load(make_characters(20))
+    used = {1: [1, 2, 3], 2: [4]}
+    manager.pool, conn = mock_pool([
+        {'team_id': team_id, 'used_ids': ids} for team_id, ids in used.items()
+    ])
+
+    candidates = await manager.get_round_candidates(9, [1, 2, 3], n=4)
+    counts = {team_id: len(chars) for team_id, chars in candidates.items()}
+    leaked = [
+        (team_id, c.id) for team_id, chars in candidates.items()
+        for c in chars if c.id in used.get(team_id, [])
+    ]
+    if counts == {1: 4, 2: 4, 3: 4} and not leaked and conn.fetch.await_count == 1:
+        results.add_pass("Every team gets n candidates without its used characters (1 query)")
+    else:
+        results.add_fail("Round candidates", f"counts={counts}, leaked={leaked}, queries={conn.fetch.await_count}")
+
+    repeats = 0
+    for _ in range(50):
+        picks = await manager.get_round_candidates(9, [1, 2, 3, 4], n=4, disjoint=True)
+        ids = [c.id for chars in picks.values() for c in chars]
+        repeats += len(ids) - len(set(ids))
+    if repeats == 0:
+        results.add_pass("Disjoint mode never offers a character to two teams")
+    else:
+        results.add_fail("Disjoint", f"{repeats} repeated characters over 50 rounds")
+
+    # 20 characters, 4 used by team 1 or 2: 6 teams x 4 disjoint can't all be served
+    short = await manager.get_round_candidates(9, [1, 2, 3, 4, 5, 6], n=4, disjoint=True)
+    short_counts = [len(short[team_id]) for team_id in [1, 2, 3, 4, 5, 6]]
+    manager.pool, _ = mock_pool([{'team_id': 1, 'used_ids': list(range(1, 19))}])
+    exhausted = await manager.get_round_candidates(9, [1], n=4)
+    if (short_counts[:4] == [4, 4, 4, 4] and sum(short_counts) == 20
+            and short_counts[-1] < 4 and len(exhausted[1]) == 2):
+        results.add_pass("Short teams get what is left (caller reports the shortage)")
+    else:
+        results.add_fail("Too few characters", f"disjoint={short_counts}, exhausted={len(exhausted[1])}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 CHARACTER CATALOG TEST")
+    print("="*70)
+
+    await test_load_and_lookup()
+    await test_sampling_with_exclusion()
+    await test_incremental_upsert()
+    await test_db_manager_uses_catalog()
+    await test_round_candidates()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
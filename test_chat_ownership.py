@@ -0,0 +1,401 @@
+"""
+Test Chat Ownership
+Verify multi-worker routing: updates follow their game's chat owner,
+forwarded updates are handled locally and expired leases are taken over
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop
+from database.db_manager import db_manager
+from handlers.game_handler import game_handler
+from handlers.update_router import UpdateRouter, update_router
+from utils.chat_ownership import ChatOwnership, chat_ownership
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+GROUP_CHAT = -1001
+PLAYER = {'id': 101, 'is_bot': False, 'first_name': 'a'}
+
+
+def group_message(update_id: int = 1) -> Update:
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {'message_id': 1, 'date': 1700000000, 'from': PLAYER,
+                    'chat': {'id': GROUP_CHAT, 'type': 'supergroup'}, 'text': '/join'}
+    }, None)
+
+
+def private_message(text: str, update_id: int = 2) -> Update:
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {'message_id': 2, 'date': 1700000000, 'from': PLAYER,
+                    'chat': {'id': PLAYER['id'], 'type': 'private'}, 'text': text}
+    }, None)
+
+
+def vote_callback(game_id: int, update_id: int = 3) -> Update:
+    return Update.de_json({
+        'update_id': update_id,
+        'callback_query': {
+            'id': 'q1', 'chat_instance': 'c', 'from': PLAYER,
+            'data': f'vote_{game_id}_1_1_5',
+            'message': {'message_id': 3, 'date': 1700000000,
+                        'chat': {'id': PLAYER['id'], 'type': 'private'}}
+        }
+    }, None)
+
+
+async def test_resolve_chat():
+    """Test each update is mapped to the chat whose owner must handle it"""
+    print("\n🧪 Testing update -> chat resolution...")
+
+    router = UpdateRouter()
+    game_handler.active_games[77] = {'chat_id': GROUP_CHAT}
+    try:
+        with patch.object(db_manager, 'get_game_chat', AsyncMock(return_value=-2002)), \
+             patch.object(db_manager, 'get_player_game_chat',
+                          AsyncMock(return_value=GROUP_CHAT)) as player_lookup:
+            group = await router.resolve_chat(group_message())
+            vote = await router.resolve_chat(vote_callback(77))
+            vote_db = await router.resolve_chat(vote_callback(88))
+            team_chat = await router.resolve_chat(private_message('hello team'))
+            await router.resolve_chat(private_message('again'))
+            command = await router.resolve_chat(private_message('/start'))
+    finally:
+        game_handler.active_games.pop(77, None)
+
+    if group == GROUP_CHAT:
+        results.add_pass("Group update routed to its group")
+    else:
+        results.add_fail("Group routing", f"got {group}")
+
+    if vote == GROUP_CHAT and vote_db == -2002:
+        results.add_pass("Vote routed to the game's chat (memory, then database)")
+    else:
+        results.add_fail("Vote routing", f"memory={vote}, db={vote_db}")
+
+    if team_chat == GROUP_CHAT and player_lookup.await_count == 1:
+        results.add_pass("Team chat routed to the game's chat with a cached lookup")
+    else:
+        results.add_fail("Team chat routing",
+                         f"got {team_chat}, lookups={player_lookup.await_count}")
+
+    if command == PLAYER['id']:
+        results.add_pass("Private command stays on the private chat")
+    else:
+        results.add_fail("Command routing", f"got {command}")
+
+
+async def test_route():
+    """Test updates owned elsewhere are forwarded and stop local handling"""
+    print("\n🧪 Testing routing decisions...")
+
+    context = MagicMock()
+    with patch.object(chat_ownership, 'enabled', True), \
+         patch.object(chat_ownership, 'forward', AsyncMock(return_value=True)) as forward:
+
+        with patch.object(chat_ownership, 'claim', AsyncMock(return_value='other')):
+            try:
+                await update_router.route(group_message(10), context)
+                results.add_fail("Forward", "handler chain was not stopped")
+            except ApplicationHandlerStop:
+                if forward.await_args.args[0] == 'other':
+                    results.add_pass("Foreign chat forwarded to its owner")
+                else:
+                    results.add_fail("Forward", f"sent to {forward.await_args.args[0]}")
+
+        forward.reset_mock()
+        with patch.object(chat_ownership, 'claim',
+                          AsyncMock(return_value=chat_ownership.worker_id)):
+            await update_router.route(group_message(11), context)
+        if not forward.await_count:
+            results.add_pass("Owned chat handled locally")
+        else:
+            results.add_fail("Local handling", "owned chat was forwarded")
+
+        claim = AsyncMock(return_value='other')
+        with patch.object(chat_ownership, 'claim', claim):
+            chat_ownership._forwarded_in.add(12)
+            await update_router.route(group_message(12), context)
+        if not claim.await_count and 12 not in chat_ownership._forwarded_in:
+            results.add_pass("Forwarded-in update never re-routed")
+        else:
+            results.add_fail("Forward loop", f"claims={claim.await_count}")
+
+        claim = AsyncMock(return_value=chat_ownership.worker_id)
+        game_handler.active_games[77] = {'chat_id': GROUP_CHAT}
+        try:
+            with patch.object(chat_ownership, 'claim', claim):
+                await update_router.route(vote_callback(77, update_id=14), context)
+        finally:
+            game_handler.active_games.pop(77, None)
+        if [call.args for call in claim.await_args_list] == [(GROUP_CHAT,)]:
+            results.add_pass("Vote claims only the game chat, not the voter's private chat")
+        else:
+            results.add_fail("Private claim", f"claims={claim.await_args_list}")
+
+        with patch.object(chat_ownership, 'claim', AsyncMock(side_effect=ConnectionError)):
+            await update_router.route(group_message(13), context)
+        results.add_pass("Ownership store failure falls back to local handling")
+
+
+async def test_claim_and_takeover():
+    """Test foreign owners are cached and expired leases trigger a takeover"""
+    print("\n🧪 Testing lease claims...")
+
+    ownership = ChatOwnership(worker_id='w1', lease_ttl=30, enabled=True)
+    taken_over = []
+
+    async def on_takeover(chat_id):
+        taken_over.append(chat_id)
+
+    ownership.on_takeover = on_takeover
+
+    ownership._claim_lease = AsyncMock(return_value=('w2', 'w2'))
+    first = await ownership.claim(GROUP_CHAT)
+    second = await ownership.claim(GROUP_CHAT)
+    if first == second == 'w2' and ownership._claim_lease.await_count == 1:
+        results.add_pass("Foreign ownership cached between updates")
+    else:
+        results.add_fail("Owner cache",
+                         f"owners={first},{second}, queries={ownership._claim_lease.await_count}")
+
+    ownership._claim_lease = AsyncMock(return_value=('w1', 'dead-worker'))
+    owner = await ownership.claim(-3003)
+    await ownership.claim(-3003)
+    await asyncio.sleep(0)
+    if (owner == 'w1' and -3003 in ownership.owned and taken_over == [-3003]
+            and ownership._claim_lease.await_count == 1):
+        results.add_pass("Expired lease taken over once and game resumed")
+    else:
+        results.add_fail("Takeover", f"owner={owner}, takeovers={taken_over}")
+
+
+async def test_takeover_before_local_handling():
+    """Test updates wait for a running takeover before local handlers run"""
+    print("\n🧪 Testing takeover ordering...")
+
+    ownership = ChatOwnership(worker_id='w1', lease_ttl=30, enabled=True)
+    ownership._claim_lease = AsyncMock(return_value=('w1', 'dead-worker'))
+    restored = asyncio.Event()
+
+    async def on_takeover(chat_id):
+        await asyncio.sleep(0.05)
+        restored.set()
+
+    ownership.on_takeover = on_takeover
+    router = UpdateRouter()
+    seen = []
+
+    async def handle(update):
+        await router.route(update, MagicMock())
+        seen.append((update.update_id, restored.is_set()))
+
+    with patch('handlers.update_router.chat_ownership', ownership):
+        await asyncio.gather(handle(group_message(20)), handle(group_message(21)))
+
+    if sorted(seen) == [(20, True), (21, True)] and not ownership._takeovers:
+        results.add_pass("Triggering and concurrent updates handled after the game is restored")
+    else:
+        results.add_fail("Takeover ordering", f"seen={seen}")
+
+
+def mock_pool(conn) -> MagicMock:
+    """Pool whose acquire() yields conn as an async context manager"""
+    acquire = MagicMock()
+    acquire.__aenter__ = AsyncMock(return_value=conn)
+    acquire.__aexit__ = AsyncMock(return_value=False)
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=acquire)
+    return pool
+
+
+async def test_lease_lifecycle():
+    """Test only active chats are renewed and ended or idle chats are released"""
+    print("\n🧪 Testing lease renewal and release...")
+
+    ownership = ChatOwnership(worker_id='w1', lease_ttl=30, idle_ttl=300, enabled=True)
+    now = time.monotonic()
+    ownership.owned = {1: now - 1000, 2: now - 1000, 3: now, 4: now}
+    ownership.live_chats = lambda: {2}
+
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    # Chat 4's lease was taken by another worker meanwhile
+    conn.fetch = AsyncMock(return_value=[{'chat_id': 2}, {'chat_id': 3}])
+    with patch.object(db_manager, 'pool', mock_pool(conn)):
+        await ownership._renew_leases()
+
+        released = conn.execute.await_args.args
+        renewed = conn.fetch.await_args.args
+        if released[1:] == ('w1', [1]) and sorted(renewed[3]) == [2, 3, 4]:
+            results.add_pass("Idle chat released, live and recent chats renewed")
+        else:
+            results.add_fail("Renewal", f"released={released[1:]}, renewed={renewed[3]}")
+
+        if set(ownership.owned) == {2, 3}:
+            results.add_pass("Lost lease dropped from owned chats")
+        else:
+            results.add_fail("Lost lease", f"owned={sorted(ownership.owned)}")
+
+        conn.execute.reset_mock()
+        await ownership.release(2)
+        live_kept = 2 in ownership.owned and not conn.execute.await_count
+        await ownership.release(3)
+        if live_kept and 3 not in ownership.owned and conn.execute.await_args.args[1:] == (3, 'w1'):
+            results.add_pass("Ended chat released, chat with live state kept")
+        else:
+            results.add_fail("Release", f"owned={sorted(ownership.owned)}")
+
+
+def listen_conn(closed: bool = False) -> MagicMock:
+    conn = MagicMock()
+    conn.add_listener = AsyncMock()
+    conn.remove_listener = AsyncMock()
+    conn.fetchval = AsyncMock(return_value=1)
+    conn.is_closed = MagicMock(return_value=closed)
+    return conn
+
+
+async def test_listener_recovery():
+    """Test a dropped LISTEN connection is re-opened, or leases are given up"""
+    print("\n🧪 Testing LISTEN connection recovery...")
+
+    ownership = ChatOwnership(worker_id='w1', lease_ttl=30, enabled=True)
+    lost_chats = []
+    ownership.on_lost = lost_chats.extend
+
+    dead, fresh = listen_conn(), listen_conn()
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=dead)
+    pool.release = AsyncMock()
+    with patch.object(db_manager, 'pool', pool):
+        await ownership._listen()
+        terminated = dead.add_termination_listener.call_args.args[0]
+        terminated(dead)
+        dead.is_closed.return_value = True
+
+        pool.acquire = AsyncMock(return_value=fresh)
+        ownership._renew_leases = AsyncMock()
+        await ownership._beat()
+        if (ownership._listen_conn is fresh and not ownership._listener_down
+                and fresh.add_listener.await_args.args[0] == ownership.channel_for('w1')
+                and pool.release.await_args.args == (dead,)
+                and ownership._renew_leases.await_count == 1):
+            results.add_pass("Closed LISTEN connection replaced and channel re-subscribed")
+        else:
+            results.add_fail("Reconnect", f"conn={ownership._listen_conn}, down={ownership._listener_down}")
+
+        fresh.fetchval = AsyncMock(side_effect=ConnectionError)
+        pool.acquire = AsyncMock(side_effect=OSError("database unreachable"))
+        ownership._renew_leases.reset_mock()
+        ownership.owned = {1: time.monotonic(), 2: time.monotonic()}
+        await ownership._beat()
+        if (not ownership.owned and sorted(lost_chats) == [1, 2]
+                and not ownership._renew_leases.await_count and ownership._listener_down):
+            results.add_pass("Unreachable listener stops lease renewal and drops local chats")
+        else:
+            results.add_fail("Give up", f"owned={ownership.owned}, lost={lost_chats}")
+
+    ownership._claim_lease = AsyncMock(return_value=('w1', None))
+    ownership._live_owner = AsyncMock(return_value=None)
+    owner = await ownership.claim(-4004)
+    if owner == 'w1' and -4004 not in ownership.owned and not ownership._claim_lease.await_count:
+        results.add_pass("No leases taken while not listening")
+    else:
+        results.add_fail("Claim while down", f"owner={owner}, owned={ownership.owned}")
+
+
+async def test_forwarded_update_queued():
+    """Test a NOTIFY payload is queued as an update marked as forwarded"""
+    print("\n🧪 Testing forwarded update intake...")
+
+    ownership = ChatOwnership(worker_id='w1', enabled=True)
+    application = MagicMock()
+    application.bot = None
+    application.update_queue = asyncio.Queue()
+    ownership._application = application
+
+    payload = json.dumps(vote_callback(77, update_id=42).to_dict())
+    ownership._on_notify(None, 0, ownership.channel_for('w1'), payload)
+    ownership._on_notify(None, 0, ownership.channel_for('w1'), 'not json')
+
+    queued = application.update_queue.get_nowait()
+    if (queued.update_id == 42 and queued.callback_query.data == 'vote_77_1_1_5'
+            and application.update_queue.empty()):
+        results.add_pass("Forwarded update rebuilt and queued, malformed payload dropped")
+    else:
+        results.add_fail("Forwarded intake", f"queued {queued.update_id}")
+
+    if ownership.was_forwarded(queued) and not ownership.was_forwarded(queued):
+        results.add_pass("Forwarded mark consumed once")
+    else:
+        results.add_fail("Forwarded mark", "mark not consumed exactly once")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 CHAT OWNERSHIP TEST")
+    print("="*70)
+
+    await test_resolve_chat()
+    await test_route()
+    await test_claim_and_takeover()
+    await test_takeover_before_local_handling()
+    await test_lease_lifecycle()
+    await test_listener_recovery()
+    await test_forwarded_update_queued()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
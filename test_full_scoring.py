@@ -9,10 +9,14 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 import logging
-from data.themes import THEMES, get_theme_count
+from unittest.mock import AsyncMock, patch
+from data.themes import THEMES, get_theme_count, get_theme_by_id
+from database.db_manager import db_manager
 from data.full_scores import MBTI_SCORES, ZODIAC_SCORES
 from services.scoring_service import scoring_service
 from models.character import Character
+from data import score_matrix
+from utils.constants import MBTI_TYPES, ZODIAC_SIGNS
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
@@ -288,6 +292,124 @@ def test_all_themes(results: TestResults):
     print(f"\nTotal coverage: {covered_roles}/{total_roles} roles")
 
 
+def test_score_matrix(results: TestResults):
+    """Test 8: Precompiled score matrix matches the score tables"""
+    print("\n🧮 Test 8: Precompiled Score Matrix")
+    print("-" * 70)
+    
+    mismatches = 0
+    checked = 0
+    for role in MBTI_SCORES:
+        for mbti in MBTI_TYPES:
+            for zodiac in ZODIAC_SIGNS:
+                mbti_score = MBTI_SCORES[role].get(mbti, 5)
+                zodiac_score = ZODIAC_SCORES.get(role, {}).get(zodiac, 5)
+                expected = max(1, min(10, int((mbti_score * 0.6) + (zodiac_score * 0.4))))
+                checked += 1
+                if score_matrix.lookup(role, mbti, zodiac) != (expected, mbti_score, zodiac_score):
+                    mismatches += 1
+    
+    if mismatches == 0:
+        results.add_pass(f"Matrix matches score tables: {checked} entries")
+    else:
+        results.add_fail("Score matrix", f"{mismatches}/{checked} entries differ")
+    
+    if score_matrix.lookup('Unknown Role', 'XXXX', 'Nowhere') == (5, 5, 5):
+        results.add_pass("Unknown keys fall back to default score")
+    else:
+        results.add_fail("Score matrix defaults", "Unknown keys not scored 5")
+    
+    chars = [
+        Character(1, "Test Leader", "ENTJ", "Leo", ""),
+        Character(2, "Test Mismatch", "INFP", "Pisces", ""),
+        Character(3, "Test Advisor", "INTJ", "Virgo", ""),
+    ]
+    roles = ['ဘုရင်', 'စစ်သူကြီး', 'Unknown Role']
+    matrix = scoring_service.score_many(chars, roles)
+    expected = [
+        [scoring_service.calculate_character_score(c, r)[0] for r in roles]
+        for c in chars
+    ]
+    
+    if matrix == expected:
+        results.add_pass("score_many matches per-pair scoring (3x3)")
+    else:
+        results.add_fail("score_many", f"Expected {expected}, got {matrix}")
+
+
+async def test_score_game_matches_per_row(results: TestResults):
+    """Test 9: Bulk score_game matches the old per-row scoring path"""
+    print("\n🧮 Test 9: Bulk score_game vs per-row scoring")
+    print("-" * 70)
+    
+    theme = get_theme_by_id(2)
+    characters = [
+        Character(1, "Leader", "ENTJ", "Leo", ""),
+        Character(2, "Warrior", "ESTP", "Aries", ""),
+        Character(3, "Advisor", "INTJ", "Virgo", ""),
+        Character(4, "Dreamer", "INFP", "Pisces", ""),
+        Character(5, "Builder", "ISTJ", "Capricorn", ""),
+    ]
+    # team_id -> character index per round (None = no selection that round)
+    picks = {1: [0, 1, 2, 3, 4], 2: [4, 3, None, 1, 0], 3: [2, 2, 2, 2, 2]}
+    rounds = [
+        {
+            'team_id': team_id,
+            'round_number': round_number,
+            'role': theme['roles'][round_number]['name'],
+            'character_id': characters[pick].id if pick is not None else None,
+            'character': characters[pick] if pick is not None else None
+        }
+        for team_id, team_picks in picks.items()
+        for round_number, pick in enumerate(team_picks, start=1)
+    ]
+    teams = {team_id: [{'user_id': team_id * 100, 'username': f"p{team_id}"}] for team_id in picks}
+    
+    # Reference: the per-row path (score each selection, save it, re-read totals)
+    saved_rows = {}
+    for game_round in rounds:
+        if game_round['character']:
+            role_name = theme['roles'][game_round['round_number']]['name']
+            score, explanation = scoring_service.calculate_character_score(game_round['character'], role_name)
+            saved_rows[(game_round['round_number'], game_round['team_id'])] = (score, explanation)
+    expected_totals = {team_id: 0 for team_id in picks}
+    for (_, team_id), (score, _) in saved_rows.items():
+        expected_totals[team_id] += score
+    expected_winner = scoring_service.determine_winner(
+        {team_id: {'total_score': total} for team_id, total in expected_totals.items()}
+    )
+    
+    save_round_scores = AsyncMock()
+    with patch.object(db_manager, 'get_game_selections',
+                      AsyncMock(return_value={'theme_id': theme['id'], 'rounds': rounds})), \
+         patch.object(db_manager, 'get_game_players', AsyncMock(return_value=teams)), \
+         patch.object(db_manager, 'save_round_scores', save_round_scores):
+        game_results = await scoring_service.score_game(42)
+    
+    totals = {team_id: data['total_score'] for team_id, data in game_results.items()}
+    if totals == expected_totals and scoring_service.determine_winner(game_results) == expected_winner:
+        results.add_pass(f"Team totals {totals} and winner {expected_winner} match per-row scoring")
+    else:
+        results.add_fail("Bulk scoring totals", f"Expected {expected_totals}, got {totals}")
+    
+    written = {
+        (entry['round_number'], entry['team_id']): (entry['score'], entry['explanation'])
+        for entry in save_round_scores.await_args.args[1]
+    }
+    if save_round_scores.await_count == 1 and written == saved_rows:
+        results.add_pass(f"One bulk write with the same {len(written)} scores as per-row saves")
+    else:
+        results.add_fail("Bulk score write", f"calls={save_round_scores.await_count}, rows={len(written)}")
+    
+    empty_round = game_results[2]['rounds'][2]
+    if (empty_round['score'] == 0 and empty_round['character_name'] is None
+            and all(len(data['rounds']) == 5 for data in game_results.values())
+            and game_results[1]['players'] == teams[1]):
+        results.add_pass("Unselected rounds score 0 and every round is reported")
+    else:
+        results.add_fail("Round details", f"{empty_round}")
+
+
 async def run_all_tests():
     """Run all tests"""
     print("\n" + "="*70)
@@ -304,6 +426,8 @@ async def run_all_tests():
     test_suitable_mbti_alignment(results)
     test_scoring_calculation(results)
     test_all_themes(results)
+    test_score_matrix(results)
+    await test_score_game_matches_per_row(results)
     
     # Print summary
     success = results.print_summary()
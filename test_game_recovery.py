@@ -0,0 +1,261 @@
+"""
+Test Crash Recovery
+Verify in-progress games are rebuilt from the database and resumed on startup
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.db_manager import db_manager
+from handlers.game_handler import game_handler
+from handlers.voting_handler import voting_handler
+from handlers.game_recovery import game_recovery, plan_resume
+from utils.game_registry import game_registry
+from utils.message_delivery import message_delivery
+import config
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+TEAMS = {
+    1: [{'user_id': 101, 'username': 'a', 'is_leader': True},
+        {'user_id': 102, 'username': 'b', 'is_leader': False}],
+    2: [{'user_id': 201, 'username': 'c', 'is_leader': True},
+        {'user_id': 202, 'username': 'd', 'is_leader': False}],
+}
+
+
+async def test_plan_resume():
+    """Test where a recovered game picks up"""
+    print("\n🧭 Test: Resume Planning")
+    print("-" * 70)
+
+    cases = [
+        ({'current_round': 0, 'finalized_round': 0, 'round_elapsed': None}, (None, 0.0, 1)),
+        ({'current_round': 3, 'finalized_round': 3, 'round_elapsed': 80.0}, (None, 0.0, 4)),
+        ({'current_round': 2, 'finalized_round': 1, 'round_elapsed': 45.0}, (2, 15.0, 3)),
+        ({'current_round': 2, 'finalized_round': 1, 'round_elapsed': 500.0}, (2, 0.0, 3)),
+        ({'current_round': 2, 'finalized_round': 1, 'round_elapsed': None}, (2, 0.0, 3)),
+    ]
+    wrong = [(game, plan_resume(game, 60)) for game, expected in cases
+             if plan_resume(game, 60) != expected]
+    if not wrong:
+        results.add_pass("Fresh, finalized, running, overdue and unknown rounds planned")
+    else:
+        results.add_fail("Resume planning", f"{wrong}")
+
+
+async def test_recover():
+    """Test games, teams, votes and timers are rebuilt with bulk queries"""
+    print("\n♻️ Test: Recover In-Progress Games")
+    print("-" * 70)
+
+    games = [
+        {'id': 701, 'lobby_chat_id': -701, 'lobby_message_id': 1, 'theme_id': 1,
+         'current_round': 2, 'finalized_round': 1, 'round_elapsed': 20.0},
+        {'id': 702, 'lobby_chat_id': -702, 'lobby_message_id': 2, 'theme_id': 1,
+         'current_round': 4, 'finalized_round': 4, 'round_elapsed': 70.0},
+    ]
+    vote_log = {701: {2: {1: {102: 5, 101: 6}}}}
+
+    mocks = {
+        'cancel_stale_games': AsyncMock(return_value=[]),
+        'clear_vote_log': AsyncMock(),
+        'get_in_progress_games': AsyncMock(return_value=games),
+        'get_players_for_games': AsyncMock(return_value={701: TEAMS, 702: TEAMS}),
+        'get_vote_log': AsyncMock(return_value=vote_log),
+    }
+    originals = {name: getattr(db_manager, name) for name in mocks}
+    original_complete = game_handler.complete_round
+    original_run = game_handler.run_all_rounds
+    original_send = message_delivery.send_message_with_retry
+    for name, mock in mocks.items():
+        setattr(db_manager, name, mock)
+    game_handler.complete_round = AsyncMock()
+    game_handler.run_all_rounds = AsyncMock()
+    message_delivery.send_message_with_retry = AsyncMock()
+
+    try:
+        resumed = await game_recovery.recover(MagicMock())
+        votes = dict(voting_handler.active_votes.get(701, {}).get(2, {}).get(1, {}))
+        timer = voting_handler.round_timers.get(701, {}).get(2)
+        timer_elapsed = (datetime.now() - timer).total_seconds() if timer else None
+        teams_ok = game_handler.player_teams.get(202, {}).get('game_id') == 701 or \
+            game_handler.player_teams.get(202, {}).get('game_id') == 702
+        registered = 701 in game_handler.active_games and 702 in game_handler.active_games
+        await asyncio.gather(*game_recovery.tasks.values())
+        complete_calls = game_handler.complete_round.await_args_list
+        run_calls = game_handler.run_all_rounds.await_args_list
+    finally:
+        for name, original in originals.items():
+            setattr(db_manager, name, original)
+        game_handler.complete_round = original_complete
+        game_handler.run_all_rounds = original_run
+        message_delivery.send_message_with_retry = original_send
+        game_registry.release(701)
+        game_registry.release(702)
+
+    if resumed == 2 and registered and teams_ok:
+        results.add_pass("Games and team chat membership rebuilt")
+    else:
+        results.add_fail("Rebuild", f"resumed={resumed}, registered={registered}")
+
+    if list(votes.items()) == [(102, 5), (101, 6)]:
+        results.add_pass("Logged votes replayed in first-vote order")
+    else:
+        results.add_fail("Vote replay", f"{votes}")
+
+    if timer_elapsed and 19 <= timer_elapsed <= 21:
+        results.add_pass("Round timer resumed at its elapsed time")
+    else:
+        results.add_fail("Round timer", f"{timer_elapsed}")
+
+    if all(mock.await_count == 1 for mock in mocks.values()):
+        results.add_pass("One query per table regardless of game count")
+    else:
+        results.add_fail("Bulk queries", f"{[(n, m.await_count) for n, m in mocks.items()]}")
+
+    resumed_rounds = [(call.args[1], call.args[2], call.args[5]) for call in complete_calls]
+    starts = sorted((call.args[1], call.kwargs['start_round']) for call in run_calls)
+    if resumed_rounds == [(701, 2, 40.0)] and starts == [(701, 3), (702, 5)]:
+        results.add_pass("Running round finished with remaining time, then rounds continue")
+    else:
+        results.add_fail("Resume", f"complete={resumed_rounds}, run={starts}")
+
+
+async def test_stale_games_cancelled():
+    """Test games idle past the cutoff are cancelled instead of resumed"""
+    print("\n🗑️ Test: Stale Games Skipped")
+    print("-" * 70)
+
+    mocks = {
+        'cancel_stale_games': AsyncMock(return_value=[801, 802]),
+        'clear_vote_log': AsyncMock(),
+        'get_in_progress_games': AsyncMock(return_value=[]),
+        'get_players_for_games': AsyncMock(return_value={}),
+        'get_vote_log': AsyncMock(return_value={}),
+    }
+    originals = {name: getattr(db_manager, name) for name in mocks}
+    original_send = message_delivery.send_message_with_retry
+    original_run = game_handler.run_all_rounds
+    for name, mock in mocks.items():
+        setattr(db_manager, name, mock)
+    message_delivery.send_message_with_retry = AsyncMock()
+    game_handler.run_all_rounds = AsyncMock()
+
+    try:
+        resumed = await game_recovery.recover(MagicMock())
+        notices = message_delivery.send_message_with_retry.await_count
+        runs = game_handler.run_all_rounds.await_count
+    finally:
+        for name, original in originals.items():
+            setattr(db_manager, name, original)
+        message_delivery.send_message_with_retry = original_send
+        game_handler.run_all_rounds = original_run
+
+    cancel_args = mocks['cancel_stale_games'].await_args
+    load_kwargs = mocks['get_in_progress_games'].await_args.kwargs
+    if (resumed == 0 and notices == 0 and runs == 0
+            and 801 not in game_handler.active_games and 802 not in game_handler.active_games):
+        results.add_pass("Stale games not resumed and no restart notice posted")
+    else:
+        results.add_fail("Stale games", f"resumed={resumed}, notices={notices}, runs={runs}")
+
+    if (cancel_args.args == (config.RECOVERY_MAX_AGE, None)
+            and load_kwargs.get('max_age') == config.RECOVERY_MAX_AGE
+            and mocks['cancel_stale_games'].await_count == 1
+            and mocks['clear_vote_log'].await_count == 1):
+        results.add_pass("Stale games cancelled with the configured cutoff and the load is age-bounded")
+    else:
+        results.add_fail("Stale cutoff", f"cancel={cancel_args}, load={load_kwargs}")
+
+
+async def test_game_timestamps_use_db_clock():
+    """Test game timestamps compared by the staleness cutoff come from the database"""
+    print("\n🕒 Test: Database Clock")
+    print("-" * 70)
+
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=901)
+    conn.execute = AsyncMock()
+    acquire = MagicMock()
+    acquire.__aenter__ = AsyncMock(return_value=conn)
+    acquire.__aexit__ = AsyncMock(return_value=False)
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=acquire)
+
+    original_pool = db_manager.pool
+    db_manager.pool = pool
+    try:
+        game_id = await db_manager.create_game(lobby_chat_id=-1001, theme_id=2)
+        await db_manager.update_game_round(game_id, 1)
+    finally:
+        db_manager.pool = original_pool
+
+    insert_sql, *insert_args = conn.fetchval.await_args.args
+    round_sql = conn.execute.await_args.args[0]
+    host_times = [arg for arg in insert_args if isinstance(arg, datetime)]
+    if 'LOCALTIMESTAMP' in insert_sql and not host_times and 'LOCALTIMESTAMP' in round_sql:
+        results.add_pass("created_at and round_started_at written with the database clock")
+    else:
+        results.add_fail("Timestamps", f"insert={insert_sql!r}, host times={host_times}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 CRASH RECOVERY TEST")
+    print("="*70)
+
+    await test_plan_resume()
+    await test_recover()
+    await test_stale_games_cancelled()
+    await test_game_timestamps_use_db_clock()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,227 @@
+"""
+Test Game Registry
+Verify game state is released from every store, on finish or after going idle
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from handlers.game_handler import game_handler
+from handlers.voting_handler import voting_handler
+from utils.game_registry import GameRegistry, game_registry
+from utils.muted_chats import muted_chats
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+def seed_game(game_id: int, chat_id: int):
+    """Put a game into every in-memory store, as start_game and a round would"""
+    team = [{'user_id': game_id * 10 + i, 'username': f"u{i}", 'is_leader': i == 0} for i in range(2)]
+    game_handler.active_games[game_id] = {'teams': {1: team}, 'chat_id': chat_id, 'round_messages': {}}
+    game_handler.game_themes[game_id] = {'roles': {}}
+    for player in team:
+        game_handler.player_teams[player['user_id']] = {
+            'game_id': game_id, 'team_id': 1, 'team_players': team
+        }
+    muted_chats.mute(chat_id, f'game:{game_id}')
+    voting_handler.set_round_roster(game_id, 1, {1: team})
+    voting_handler.active_votes[game_id][1][1] = {team[0]['user_id']: 3}
+
+
+def holds(game_id: int) -> bool:
+    """Check whether any store still has state for the game"""
+    return (
+        game_id in game_handler.active_games
+        or game_id in game_handler.game_themes
+        or any(data['game_id'] == game_id for data in game_handler.player_teams.values())
+        or game_id in voting_handler.active_votes
+        or game_id in voting_handler.round_timers
+        or game_id in voting_handler.voting_messages
+        or game_id in voting_handler.round_rosters
+        or game_id in voting_handler.round_complete
+    )
+
+
+async def test_release():
+    """Test release() drops a game from every store"""
+    print("\n🧹 Test: Release")
+    print("-" * 70)
+
+    seed_game(901, -901)
+    seed_game(902, -902)
+    game_registry.release(901)
+
+    if not holds(901) and not muted_chats.is_muted(-901):
+        results.add_pass("Released game gone from every store and unmuted")
+    else:
+        results.add_fail("Release", "State left behind")
+
+    if holds(902) and muted_chats.is_muted(-902):
+        results.add_pass("Other games untouched")
+    else:
+        results.add_fail("Release isolation", "Another game was cleared")
+
+    game_registry.release(902)
+
+
+async def test_sweep_reclaims_orphans():
+    """Test idle and untracked games are reclaimed by the sweeper"""
+    print("\n⏳ Test: Idle Sweep")
+    print("-" * 70)
+
+    registry = GameRegistry(ttl=0.1, sweep_interval=60)
+    registry.register_cleanup(voting_handler.clear_game_votes)
+    registry.register_cleanup(game_handler.clear_game)
+    registry.register_source('active_games', lambda: list(game_handler.active_games))
+    registry.register_source('active_votes', lambda: list(voting_handler.active_votes))
+
+    # A crashed round task: state exists but nobody tracked or finished the game
+    seed_game(903, -903)
+    registry.track(904)
+    seed_game(904, -904)
+
+    registry.sweep()
+    if holds(903) and registry.is_tracked(903):
+        results.add_pass("Orphaned game adopted, not dropped immediately")
+    else:
+        results.add_fail("Orphan adoption", "Game dropped before its TTL")
+
+    await asyncio.sleep(0.15)
+    registry.touch(904)
+    expired = registry.sweep()
+    if expired == [903] and not holds(903) and holds(904):
+        results.add_pass("Idle game released, recently touched game kept")
+    else:
+        results.add_fail("Idle sweep", f"Expired {expired}")
+
+    stats = registry.get_stats()
+    if stats['games'] == 1 and stats['active_games'] == 1 and stats['expired_total'] == 1:
+        results.add_pass("Size gauges report live state")
+    else:
+        results.add_fail("Gauges", f"{stats}")
+
+    registry.release(904)
+
+
+async def test_memory_stays_flat():
+    """Test many abandoned games don't accumulate"""
+    print("\n📉 Test: Flat Memory")
+    print("-" * 70)
+
+    registry = GameRegistry(ttl=0, sweep_interval=60)
+    registry.register_cleanup(voting_handler.clear_game_votes)
+    registry.register_cleanup(game_handler.clear_game)
+    registry.register_source('active_games', lambda: list(game_handler.active_games))
+
+    for game_id in range(1000, 1200):
+        seed_game(game_id, -game_id)
+    registry.sweep()
+    await asyncio.sleep(0.01)
+    registry.sweep()
+
+    leftovers = [game_id for game_id in range(1000, 1200) if holds(game_id)]
+    if not leftovers and not game_handler.player_teams:
+        results.add_pass("200 abandoned games fully reclaimed")
+    else:
+        results.add_fail("Flat memory", f"{len(leftovers)} games left")
+
+
+async def test_released_game_stays_released():
+    """Test late touches don't revive a game and release stops its rounds"""
+    print("\n🛑 Test: Cancelled Game Stays Released")
+    print("-" * 70)
+
+    registry = GameRegistry(ttl=60, sweep_interval=60)
+    registry.track(905)
+    registry.release(905)
+    registry.touch(905)
+    if not registry.is_tracked(905):
+        results.add_pass("Late touch ignored for a released game")
+    else:
+        results.add_fail("Touch revival", "Released game tracked again")
+
+    seed_game(906, -906)
+    game_registry.track(906, -906)
+    rounds_started = []
+
+    async def slow_round(context, game_id, round_number, teams, chat_id):
+        rounds_started.append(round_number)
+        game_registry.touch(game_id)
+        await asyncio.sleep(30)
+
+    original_run_round = game_handler.run_round
+    game_handler.run_round = slow_round
+    try:
+        round_task = asyncio.create_task(game_handler.run_all_rounds(MagicMock(), 906))
+        await asyncio.sleep(0.01)
+        # /cancelgame path
+        game_registry.release(906)
+        await asyncio.gather(round_task, return_exceptions=True)
+    finally:
+        game_handler.run_round = original_run_round
+
+    if (round_task.cancelled() and rounds_started == [1] and not holds(906)
+            and not game_registry.is_tracked(906) and 906 not in game_handler.round_tasks):
+        results.add_pass("Releasing a game cancels its round task")
+    else:
+        results.add_fail("Round task", f"cancelled={round_task.cancelled()}, rounds={rounds_started}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 GAME REGISTRY TEST")
+    print("="*70)
+
+    await test_release()
+    await test_sweep_reclaims_orphans()
+    await test_memory_stays_flat()
+    await test_released_game_stays_released()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,170 @@
+"""
+Test Cached Keyboards
+Verify the shared keyboards equal the ones handlers used to build per
+message, and that the URL keyboards follow the bot username
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from utils.constants import MBTI_TYPES, ZODIAC_SIGNS
+from utils.keyboards import BotKeyboards
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+def fake_bot(username: str) -> MagicMock:
+    bot = MagicMock()
+    bot.get_me = AsyncMock(return_value=MagicMock(username=username))
+    return bot
+
+
+def fresh_keyboards(username: str) -> dict:
+    """Keyboards as the handlers built them for every message"""
+    return {
+        # No game in the group
+        'new_game': InlineKeyboardMarkup([
+            [InlineKeyboardButton("🎮 New Game", callback_data="start_newgame")]
+        ]),
+        # Lobby open
+        'lobby': InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("✅ Join Game", callback_data="join_lobby"),
+                InlineKeyboardButton("❌ Quit Game", callback_data="quit_lobby")
+            ]
+        ]),
+        # Game in progress (round announcement)
+        'go_to_bot': InlineKeyboardMarkup([
+            [InlineKeyboardButton("🤖 Go to Bot", url=f"https://t.me/{username}")]
+        ]),
+        # Private /start and group /start without a game
+        'add_to_group': InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Add to Group", url=f"https://t.me/{username}?startgroup=true")],
+            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
+        ]),
+        'add_bot_to_group': InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Add Bot to Group", url=f"https://t.me/{username}?startgroup=true")],
+            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
+        ]),
+        'help_menu': InlineKeyboardMarkup([
+            [InlineKeyboardButton("🎮 ဘယ်လို စတင်မလဲ?", callback_data="help_start")],
+            [InlineKeyboardButton("📜 Game Rules", callback_data="help_rules")],
+            [InlineKeyboardButton("🗳️ Voting System", callback_data="help_voting")],
+            [InlineKeyboardButton("👑 Roles & Characters", callback_data="help_roles")],
+            [InlineKeyboardButton("🏆 Scoring System", callback_data="help_scoring")],
+            [InlineKeyboardButton("⚙️ Commands", callback_data="help_commands")],
+            [InlineKeyboardButton("❓ FAQ", callback_data="help_faq")],
+        ]),
+        'back_to_help': InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔙 Back to Help Menu", callback_data="show_help")]
+        ]),
+        'mbti_picker': InlineKeyboardMarkup([
+            [InlineKeyboardButton(mbti, callback_data=f"mbti_{mbti}") for mbti in MBTI_TYPES[i:i+4]]
+            for i in range(0, len(MBTI_TYPES), 4)
+        ]),
+        'zodiac_picker': InlineKeyboardMarkup([
+            [InlineKeyboardButton(zodiac, callback_data=f"zodiac_{zodiac}") for zodiac in ZODIAC_SIGNS[i:i+3]]
+            for i in range(0, len(ZODIAC_SIGNS), 3)
+        ]),
+    }
+
+
+async def test_cached_matches_fresh():
+    """Test every cached keyboard equals a freshly built one"""
+    print("\n⌨️ Test: Cached vs Fresh Keyboards")
+    print("-" * 70)
+
+    keyboards = BotKeyboards()
+    await keyboards.init(fake_bot("mami_bot"))
+
+    mismatched = [
+        name for name, fresh in fresh_keyboards("mami_bot").items()
+        if getattr(keyboards, name) != fresh
+    ]
+    if not mismatched:
+        results.add_pass("Idle, lobby, in-game, help and picker keyboards match fresh builds")
+    else:
+        results.add_fail("Cached keyboards", f"mismatched: {mismatched}")
+
+
+async def test_rebuilt_on_username_change():
+    """Test URL keyboards follow the bot username and get_me runs once"""
+    print("\n🔁 Test: Keyboard Rebuild")
+    print("-" * 70)
+
+    keyboards = BotKeyboards()
+    first_bot = fake_bot("old_name_bot")
+    await keyboards.ensure(first_bot)
+    await keyboards.ensure(first_bot)
+    if first_bot.get_me.await_count == 1 and keyboards.bot_username == "old_name_bot":
+        results.add_pass("Bot identity fetched once and reused")
+    else:
+        results.add_fail("Identity cache", f"get_me calls={first_bot.get_me.await_count}")
+
+    await keyboards.init(fake_bot("new_name_bot"))
+    fresh = fresh_keyboards("new_name_bot")
+    url_keyboards = ['go_to_bot', 'add_to_group', 'add_bot_to_group']
+    stale = [name for name in url_keyboards if getattr(keyboards, name) != fresh[name]]
+    if not stale:
+        results.add_pass("URL keyboards rebuilt for the new username")
+    else:
+        results.add_fail("Rebuild", f"stale: {stale}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 KEYBOARD CACHE TEST")
+    print("="*70)
+
+    await test_cached_matches_fresh()
+    await test_rebuilt_on_username_change()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
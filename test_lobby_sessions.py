@@ -0,0 +1,182 @@
+"""
+Test Per-Chat Lobby Sessions
+Verify lobbies in different groups fill, cap and close independently
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.db_manager import db_manager
+from handlers.lobby_handler import LobbyHandler
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+def make_join(chat_id: int, user_id: int, data: str = "join_lobby"):
+    """Build a fake callback update and context"""
+    query = MagicMock()
+    query.data = data
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    query.from_user.id = user_id
+    query.from_user.username = f"user{user_id}"
+    query.message.chat_id = chat_id
+    query.message.message_id = 1000 + chat_id
+
+    update = MagicMock()
+    update.callback_query = query
+
+    context = MagicMock()
+    context.bot.send_message = AsyncMock()
+    context.bot.edit_message_text = AsyncMock()
+    return update, context
+
+
+def patch_storage():
+    """Patch lobby storage calls (no database in this test)"""
+    return patch.multiple(
+        db_manager,
+        is_user_in_active_game=AsyncMock(return_value=False),
+        add_to_lobby=AsyncMock(return_value=True),
+        remove_from_lobby=AsyncMock(return_value=True),
+        clear_lobby=AsyncMock(),
+    )
+
+
+async def test_independent_chats():
+    """Test two groups fill lobbies concurrently"""
+    print("\n👥 Test: Independent Chats")
+    print("-" * 70)
+
+    handler = LobbyHandler()
+    with patch_storage():
+        joins = [make_join(-1, uid) for uid in range(1, 5)] + [make_join(-2, uid) for uid in range(11, 14)]
+        await asyncio.gather(*(handler.handle_join(u, c) for u, c in joins))
+
+        if handler.get_player_count(-1) == 4 and handler.get_player_count(-2) == 3:
+            results.add_pass("Each chat keeps its own member set")
+        else:
+            results.add_fail("Independent chats", f"-1={handler.get_player_count(-1)}, -2={handler.get_player_count(-2)}")
+
+        timers = [handler.get_session(c).timer_task for c in (-1, -2)]
+        if all(t is not None for t in timers) and timers[0] is not timers[1]:
+            results.add_pass("Each chat runs its own timer")
+        else:
+            results.add_fail("Per-chat timers", str(timers))
+
+        await handler.clear_lobby(-1)
+        await asyncio.sleep(0.01)
+        if handler.get_session(-1) is None and timers[0].done() and not timers[1].done() and handler.get_player_count(-2) == 3:
+            results.add_pass("Clearing one lobby leaves the other untouched")
+        else:
+            results.add_fail("clear_lobby", "Other lobby affected or timer still running")
+        db_manager.clear_lobby.assert_awaited_with(-1)
+
+        await handler.clear_lobby(-2)
+
+
+async def test_max_players_concurrent():
+    """Test concurrent joins never overfill a lobby"""
+    print("\n🚦 Test: Max Players Under Concurrency")
+    print("-" * 70)
+
+    handler = LobbyHandler()
+    handler.max_players = 6
+    with patch_storage():
+        joins = [make_join(-3, uid) for uid in range(1, 11)]
+        outcomes = await asyncio.gather(*(handler.handle_join(u, c) for u, c in joins))
+
+        if handler.get_player_count(-3) == 6 and outcomes.count(True) == 1:
+            results.add_pass("10 concurrent joins → 6 seated, one start signal")
+        else:
+            results.add_fail("Max players", f"count={handler.get_player_count(-3)}, starts={outcomes.count(True)}")
+
+        await handler.clear_lobby(-3)
+
+
+async def test_quit_and_failed_join():
+    """Test quitting and a join that can't DM the user"""
+    print("\n🚪 Test: Quit & Failed Join")
+    print("-" * 70)
+
+    handler = LobbyHandler()
+    with patch_storage():
+        update, context = make_join(-4, 1)
+        await handler.handle_join(update, context)
+        update, context = make_join(-4, 1, "quit_lobby")
+        await handler.handle_quit(update, context)
+
+        if handler.get_player_count(-4) == 0:
+            results.add_pass("Quit removes member")
+        else:
+            results.add_fail("Quit", f"count={handler.get_player_count(-4)}")
+
+        update, context = make_join(-5, 2)
+        context.bot.send_message = AsyncMock(side_effect=Exception("Forbidden"))
+        await handler.handle_join(update, context)
+
+        if handler.get_session(-5) is None:
+            results.add_pass("Failed first join leaves no empty session behind")
+        else:
+            results.add_fail("Failed join", "Empty session left behind")
+
+        await handler.clear_lobby(-4)
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 PER-CHAT LOBBY TEST")
+    print("="*70)
+
+    await test_independent_chats()
+    await test_max_players_concurrent()
+    await test_quit_and_failed_join()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -174,6 +174,34 @@ async def test_rate_limiting():
         results.add_fail("Rate limit handling", f"Expected message, got {result}")
 
 
+async def test_rate_limit_exhausted():
+    """Test a RetryAfter on the last attempt still reaches the outbox"""
+    print("\n⏳ Test: Rate Limit Exhausted")
+    print("-" * 70)
+    
+    delivery = MessageDelivery()
+    delivery.rate_limiter = MagicMock()
+    delivery.rate_limiter.acquire = AsyncMock()
+    delivery.rate_limiter.get_status.return_value = {'tokens': 0, 'capacity': 30, 'percentage': 0}
+    mock_bot = AsyncMock()
+    mock_bot.send_message = AsyncMock(side_effect=RetryAfter(30))
+    
+    result = await delivery.send_message_with_retry(mock_bot, chat_id=123, text="Test message")
+    detailed = await delivery.send_parallel_detailed(mock_bot, [{'chat_id': 456, 'text': 'Results'}])
+    
+    failed = delivery.get_failed_messages()
+    errors = [(msg['chat_id'], msg['error']) for msg in failed]
+    if result is None and errors == [(123, "RetryAfter 30s"), (456, "RetryAfter 30s")]:
+        results.add_pass("Exhausted RetryAfter stored for the outbox (single and parallel)")
+    else:
+        results.add_fail("RetryAfter exhausted", f"result={result}, stored={errors}")
+    
+    if detailed == [(None, 'rate_limited')]:
+        results.add_pass("Parallel send reports rate_limited")
+    else:
+        results.add_fail("RetryAfter category", f"Got {detailed}")
+
+
 async def test_forbidden_error():
     """Test handling of Forbidden error (user blocked bot)"""
     print("\n🚫 Test: Forbidden Error (User Blocked Bot)")
@@ -295,6 +323,59 @@ async def test_failed_message_tracking():
         results.add_fail("Clear failed", f"Expected 0, got {len(failed_after_clear)}")
 
 
+async def test_parallel_error_categories():
+    """Test parallel send reports why each recipient failed"""
+    print("\n📋 Test: Parallel Error Categories")
+    print("-" * 70)
+    
+    delivery = MessageDelivery()
+    delivery.retry_delays = [0, 0, 0]
+    mock_bot = AsyncMock()
+    mock_message = MagicMock()
+    
+    outcomes = {
+        1: mock_message,
+        2: Forbidden("Forbidden: bot was blocked by the user"),
+        3: Forbidden("Forbidden: bot can't initiate conversation with a user"),
+        4: TimedOut(),
+    }
+    
+    async def send_message(chat_id, text, **kwargs):
+        outcome = outcomes[chat_id]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    mock_bot.send_message = AsyncMock(side_effect=send_message)
+    
+    detailed = await delivery.send_parallel_detailed(
+        mock_bot,
+        [{'chat_id': chat_id, 'text': 'Results'} for chat_id in outcomes]
+    )
+    categories = {chat_id: error for chat_id, (_, error) in zip(outcomes, detailed)}
+    expected = {1: None, 2: 'blocked', 3: 'forbidden', 4: 'timeout'}
+    
+    if categories == expected:
+        results.add_pass("Failures categorized (blocked/forbidden/timeout)")
+    else:
+        results.add_fail("Error categories", f"Expected {expected}, got {categories}")
+    
+    repeated = await delivery.send_parallel_detailed(
+        mock_bot,
+        [{'chat_id': 1, 'text': 'Skipped'}, {'chat_id': 4, 'text': 'Results'}, {'chat_id': 1, 'text': 'Confirmed'}]
+    )
+    if repeated == [(mock_message, None), (None, 'timeout'), (mock_message, None)]:
+        results.add_pass("One result per recipient, in order, for a repeated chat")
+    else:
+        results.add_fail("Repeated chat", f"Got {repeated}")
+    
+    plain = await delivery.send_parallel(mock_bot, [{'chat_id': 1, 'text': 'Results'}])
+    if plain == {1: mock_message}:
+        results.add_pass("send_parallel still returns chat_id -> Message")
+    else:
+        results.add_fail("send_parallel shape", f"Got {plain}")
+
+
 async def main():
     """Run all message delivery tests"""
     print("="*70)
@@ -308,10 +389,12 @@ async def main():
         await test_retry_on_timeout()
         await test_max_retries_exhausted()
         await test_rate_limiting()
+        await test_rate_limit_exhausted()
         await test_forbidden_error()
         await test_network_error_retry()
         await test_bulk_sending()
         await test_failed_message_tracking()
+        await test_parallel_error_categories()
         
         # Show summary
         results.summary()
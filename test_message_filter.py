@@ -17,10 +17,10 @@ print("\n✅ Implementation Details:")
 print("1. Handler registered: group_message_filter()")
 print("2. Filter: filters.TEXT & filters.ChatType.GROUPS & ~filters.COMMAND")
 print("3. Checks:")
-print("   - Active game in chat (game_handler.active_games)")
-print("   - Active lobby (db_manager.get_lobby_count())")
+print("   - muted_chats.is_muted(chat_id) - in-memory, no database query")
+print("   - Muted by lobby join / game start, unmuted when lobby empties or game ends")
 print("4. Action:")
-print("   - Delete user messages if game/lobby active")
+print("   - Delete user messages if game/lobby active (batched via deleteMessages)")
 print("   - Keep bot messages and commands")
 
 print("\n📊 Expected Behavior:")
@@ -0,0 +1,140 @@
+"""
+Test Muted Chats Registry
+Verify mute reasons, lifecycle hooks and batched message deletion
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.muted_chats import MutedChats, muted_chats, MAX_DELETE_BATCH
+from handlers.lobby_handler import LobbySession
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+async def test_reasons():
+    """Test a chat stays muted while any reason remains"""
+    print("\n🔇 Test: Mute Reasons")
+    print("-" * 70)
+
+    registry = MutedChats()
+    registry.mute(-1, 'lobby')
+    registry.mute(-1, 'game:7')
+    registry.unmute(-1, 'lobby')
+    still_muted = registry.is_muted(-1)
+    registry.unmute(-1, 'game:7')
+
+    if still_muted and not registry.is_muted(-1) and not registry.is_muted(-2):
+        results.add_pass("Muted until last reason is removed")
+    else:
+        results.add_fail("Mute reasons", f"still_muted={still_muted}, now={registry.is_muted(-1)}")
+
+
+async def test_lobby_lifecycle():
+    """Test lobby membership drives the registry"""
+    print("\n🚪 Test: Lobby Lifecycle")
+    print("-" * 70)
+
+    session = LobbySession(-50)
+    session.add(1, "a")
+    session.add(2, "b")
+    muted = muted_chats.is_muted(-50)
+    session.remove(1)
+    muted_one_left = muted_chats.is_muted(-50)
+    session.remove(2)
+
+    if muted and muted_one_left and not muted_chats.is_muted(-50):
+        results.add_pass("Chat muted while lobby has members")
+    else:
+        results.add_fail("Lobby lifecycle", f"{muted}, {muted_one_left}, {muted_chats.is_muted(-50)}")
+
+
+async def test_batched_delete():
+    """Test queued deletions go out as one deleteMessages call per chat"""
+    print("\n🗑️ Test: Batched Deletion")
+    print("-" * 70)
+
+    registry = MutedChats(flush_delay=0.05)
+    bot = MagicMock()
+    bot.delete_messages = AsyncMock(return_value=True)
+
+    for message_id in range(1, 11):
+        registry.queue_delete(bot, -1, message_id)
+    registry.queue_delete(bot, -2, 99)
+    await asyncio.sleep(0.1)
+
+    calls = {c.kwargs['chat_id']: c.kwargs['message_ids'] for c in bot.delete_messages.await_args_list}
+    if bot.delete_messages.await_count == 2 and calls[-1] == list(range(1, 11)) and calls[-2] == [99]:
+        results.add_pass("11 messages in 2 chats → 2 API calls")
+    else:
+        results.add_fail("Batched delete", str(calls))
+
+    bot.delete_messages.reset_mock()
+    for message_id in range(MAX_DELETE_BATCH + 5):
+        registry.queue_delete(bot, -3, message_id)
+    await asyncio.sleep(0.1)
+
+    sizes = sorted(len(c.kwargs['message_ids']) for c in bot.delete_messages.await_args_list)
+    if sizes == [5, MAX_DELETE_BATCH]:
+        results.add_pass(f"Batches capped at {MAX_DELETE_BATCH} IDs")
+    else:
+        results.add_fail("Batch cap", str(sizes))
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 MUTED CHATS TEST")
+    print("="*70)
+
+    await test_reasons()
+    await test_lobby_lifecycle()
+    await test_batched_delete()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
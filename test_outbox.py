@@ -0,0 +1,367 @@
+"""
+Test Durable Outbox
+Verify dedup keys, backoff, bounded buffering, expiry, leases and delivery outcomes
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import Forbidden, TimedOut
+from database.db_manager import db_manager
+from utils.outbox import Outbox
+from utils import outbox as outbox_module
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+class FakeConnection:
+    """Records executed statements"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def execute(self, sql, *args):
+        self.pool.statements.append((sql, args))
+        return "UPDATE 1"
+
+    async def fetchrow(self, sql, *args):
+        # Lease renewal: rows in pool.taken were re-claimed by another worker
+        self.pool.renewals.append(args[0])
+        if args[0] in self.pool.taken:
+            return None
+        return {'expired': args[0] in self.pool.expired}
+
+
+class FakePool:
+    def __init__(self):
+        self.statements = []
+        self.renewals = []
+        self.taken = set()
+        self.expired = set()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+
+class OutboxTable:
+    """In-memory message_outbox applying the dedup rule from the outbox's DDL"""
+
+    def __init__(self):
+        self.rows = []
+        # 'all' for a plain UNIQUE column, 'pending' for the partial index
+        self.unique_scope = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def execute(self, sql, *args):
+        if 'CREATE TABLE' in sql:
+            self.unique_scope = 'all' if 'dedup_key TEXT UNIQUE' in sql else None
+        elif 'DROP CONSTRAINT IF EXISTS message_outbox_dedup_key_key' in sql:
+            self.unique_scope = None
+        elif 'CREATE UNIQUE INDEX' in sql and 'dedup_key' in sql:
+            self.unique_scope = 'pending' if "WHERE status = 'pending'" in sql else 'all'
+        elif 'INSERT INTO message_outbox' in sql:
+            for key, chat_id, text in zip(args[0], args[1], args[2]):
+                if any(row['dedup_key'] == key and (self.unique_scope == 'all' or row['status'] == 'pending')
+                       for row in self.rows):
+                    continue
+                self.rows.append({'id': len(self.rows) + 1, 'dedup_key': key,
+                                  'chat_id': chat_id, 'text': text, 'status': 'pending'})
+        elif "SET status = 'dead'" in sql:
+            for row in self.rows:
+                if row['id'] == args[0]:
+                    row['status'] = 'dead'
+        return "UPDATE 1"
+
+
+def make_row(row_id: int, attempts: int = 1, expired: bool = False, kwargs: str = '{}'):
+    return {'id': row_id, 'chat_id': 100 + row_id, 'text': 'hello',
+            'kwargs': kwargs, 'attempts': attempts, 'expired': expired}
+
+
+async def test_backoff_and_keys():
+    """Test backoff growth/jitter and dedup keys"""
+    print("\n🔑 Test: Backoff & Dedup Keys")
+    print("-" * 70)
+
+    box = Outbox(workers=1, max_attempts=5, base_delay=2.0, max_delay=30.0)
+    delays_ok = all(
+        min(30.0, 2.0 * 2 ** (n - 1)) / 2 <= box.backoff_delay(n) <= min(30.0, 2.0 * 2 ** (n - 1))
+        for n in range(1, 10) for _ in range(20)
+    )
+    if delays_ok:
+        results.add_pass("Backoff doubles per attempt with jitter, capped at max_delay")
+    else:
+        results.add_fail("Backoff", "Delay outside expected bounds")
+
+    keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Vote", callback_data="vote_1")]])
+    first = box._make_entry(1, "hi", {'reply_markup': keyboard}, None)
+    second = box._make_entry(1, "hi", {'reply_markup': keyboard}, "other error")
+    third = box._make_entry(2, "hi", {'reply_markup': keyboard}, None)
+    if first['dedup_key'] == second['dedup_key'] != third['dedup_key']:
+        results.add_pass("Same chat + content share a dedup key")
+    else:
+        results.add_fail("Dedup key", "Keys don't match content")
+
+    decoded = Outbox._decode_kwargs(first['kwargs'], None)
+    markup = decoded.get('reply_markup')
+    if isinstance(markup, InlineKeyboardMarkup) and markup.inline_keyboard[0][0].callback_data == "vote_1":
+        results.add_pass("Keyboards survive serialization")
+    else:
+        results.add_fail("Kwargs round trip", f"Got {decoded}")
+
+
+async def test_bounded_buffer():
+    """Test messages are buffered (bounded) while the database is unavailable"""
+    print("\n📦 Test: Bounded Buffer")
+    print("-" * 70)
+
+    box = Outbox(workers=1, memory_limit=3)
+    original_pool = db_manager.pool
+    db_manager.pool = None
+    try:
+        stored = [await box.enqueue(1, f"msg {i}") for i in range(5)]
+    finally:
+        db_manager.pool = original_pool
+
+    if not any(stored) and [e['text'] for e in box._buffer] == ["msg 2", "msg 3", "msg 4"]:
+        results.add_pass("Buffer keeps the newest messages up to its limit")
+    else:
+        results.add_fail("Buffer", f"Buffered {[e['text'] for e in box._buffer]}")
+
+
+async def test_delivery_outcomes():
+    """Test sent rows are deleted, hopeless ones dead-lettered, others rescheduled"""
+    print("\n📬 Test: Delivery Outcomes")
+    print("-" * 70)
+
+    box = Outbox(workers=1, max_attempts=3)
+    bot = MagicMock()
+    outcomes = {
+        101: MagicMock(),
+        102: Forbidden("Forbidden: bot was blocked by the user"),
+        103: TimedOut(),
+        104: TimedOut(),
+        105: MagicMock(),
+    }
+
+    async def send_message(chat_id, text, **kwargs):
+        outcome = outcomes[chat_id]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    bot.send_message = AsyncMock(side_effect=send_message)
+    box._bot = bot
+
+    pool = FakePool()
+    original_pool = db_manager.pool
+    db_manager.pool = pool
+    try:
+        await asyncio.gather(
+            box._deliver(make_row(1)),
+            box._deliver(make_row(2)),
+            box._deliver(make_row(3, attempts=1)),
+            box._deliver(make_row(4, attempts=3)),
+            box._deliver(make_row(5, expired=True)),
+        )
+    finally:
+        db_manager.pool = original_pool
+
+    actions = {}
+    for sql, args in pool.statements:
+        if 'DELETE' in sql:
+            actions[args[0]] = 'sent'
+        elif "status = 'dead'" in sql:
+            actions[args[0]] = 'dead'
+        elif 'next_attempt_at' in sql:
+            actions[args[0]] = 'retry'
+
+    expected = {1: 'sent', 2: 'dead', 3: 'retry', 4: 'dead', 5: 'dead'}
+    if actions == expected:
+        results.add_pass("Sent/blocked/transient/exhausted/expired rows handled")
+    else:
+        results.add_fail("Outcomes", f"Expected {expected}, got {actions}")
+
+    if 105 not in [call.kwargs['chat_id'] for call in bot.send_message.await_args_list]:
+        results.add_pass("Expired message not sent")
+    else:
+        results.add_fail("Expiry", "Stale message was sent")
+
+
+async def test_resend_after_dead_letter():
+    """Test a message can be queued again once its earlier copy is dead-lettered"""
+    print("\n♻️ Test: Resend After Dead Letter")
+    print("-" * 70)
+
+    box = Outbox(workers=1)
+    table = OutboxTable()
+    original_pool = db_manager.pool
+    db_manager.pool = table
+    try:
+        await box.init_outbox_table()
+        await box.enqueue(1, "Round 2 ballot")
+        await box.enqueue(1, "Round 2 ballot")
+        pending_copies = len(table.rows)
+        await box._dead_letter(table.rows[0]['id'], "Forbidden")
+        stored = await box.enqueue(1, "Round 2 ballot")
+    finally:
+        db_manager.pool = original_pool
+
+    if pending_copies == 1:
+        results.add_pass("Duplicate of a pending message ignored")
+    else:
+        results.add_fail("Pending dedup", f"{pending_copies} pending copies")
+
+    statuses = [row['status'] for row in table.rows]
+    if stored and statuses == ['dead', 'pending']:
+        results.add_pass("Same message queued again after its copy was dead-lettered")
+    else:
+        results.add_fail("Resend after dead letter", f"stored={stored}, rows={statuses}")
+
+
+async def test_message_expiry():
+    """Test each message carries its own expiry, counted from enqueue"""
+    print("\n⌛ Test: Per-Message Expiry")
+    print("-" * 70)
+
+    box = Outbox(workers=1, max_age=60)
+    pool = FakePool()
+    original_pool = db_manager.pool
+    try:
+        db_manager.pool = None
+        await box.enqueue(1, "Round 3 ballot", ttl=0.1)
+        await asyncio.sleep(0.15)
+        db_manager.pool = pool
+        await box.enqueue(2, "Round 3 ballot", ttl=20)
+        await box.enqueue(3, "Lobby notice")
+        await box._flush_buffer()
+    finally:
+        db_manager.pool = original_pool
+
+    ttls = {}
+    for sql, args in pool.statements:
+        if 'INSERT INTO message_outbox' in sql:
+            ttls.update(zip(args[1], args[6]))
+
+    if 19 < ttls.get(2, 0) <= 20 and 59 < ttls.get(3, 0) <= 60:
+        results.add_pass("Senders set their own expiry; others get max_age")
+    else:
+        results.add_fail("Expiry", f"ttls={ttls}")
+
+    if ttls.get(1) == 0:
+        results.add_pass("Time spent in the memory buffer counts toward expiry")
+    else:
+        results.add_fail("Buffered expiry", f"ttl={ttls.get(1)}")
+
+
+async def test_lease_renewed_after_limiter():
+    """Test a row re-claimed during the limiter wait is not sent twice"""
+    print("\n🔐 Test: Lease After Limiter Wait")
+    print("-" * 70)
+
+    box = Outbox(workers=1)
+    bot = MagicMock()
+    bot.send_message = AsyncMock(return_value=MagicMock())
+    box._bot = bot
+
+    limiter = MagicMock()
+
+    async def slow_acquire(chat_id, priority=None):
+        await asyncio.sleep(0.05)
+
+    limiter.acquire = AsyncMock(side_effect=slow_acquire)
+
+    pool = FakePool()
+    pool.taken.add(1)
+    pool.expired.add(3)
+    original_pool = db_manager.pool
+    db_manager.pool = pool
+    try:
+        with patch.object(outbox_module, 'rate_limiter', limiter):
+            await asyncio.gather(
+                box._deliver(make_row(1)),
+                box._deliver(make_row(2)),
+                box._deliver(make_row(3)),
+            )
+    finally:
+        db_manager.pool = original_pool
+
+    sent = [call.kwargs['chat_id'] for call in bot.send_message.await_args_list]
+    touched = [args[0] for _, args in pool.statements]
+    if sent == [102] and 1 not in touched:
+        results.add_pass("Re-claimed row skipped; still-leased row sent")
+    else:
+        results.add_fail("Lease fencing", f"sent={sent}, touched={touched}")
+
+    if sorted(pool.renewals) == [1, 2, 3] and 3 in touched and 103 not in sent:
+        results.add_pass("Lease renewed after the limiter; expiry rechecked")
+    else:
+        results.add_fail("Lease renewal", f"renewals={pool.renewals}, touched={touched}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 OUTBOX TEST")
+    print("="*70)
+
+    await test_backoff_and_keys()
+    await test_bounded_buffer()
+    await test_delivery_outcomes()
+    await test_resend_after_dead_letter()
+    await test_message_expiry()
+    await test_lease_renewed_after_limiter()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
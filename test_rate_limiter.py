@@ -0,0 +1,259 @@
+"""
+Test Rate Limiter
+Verify FIFO/priority token hand-out and throughput under many waiters
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.rate_limiter import (
+    TokenBucketRateLimiter,
+    HierarchicalRateLimiter,
+    PRIORITY_BALLOT,
+    PRIORITY_NOTIFICATION,
+    PRIORITY_CHAT,
+)
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+async def test_throughput():
+    """Test 1,000 concurrent waiters are served at the configured rate"""
+    print("\n🚀 Test: Throughput Under 1,000 Waiters")
+    print("-" * 70)
+
+    limiter = TokenBucketRateLimiter(rate=500.0, capacity=10.0)
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(1000)))
+    elapsed = time.monotonic() - start
+
+    # 10 burst tokens, then 990 at 500/s ≈ 1.98s
+    expected = (1000 - 10) / 500.0
+    if expected * 0.9 <= elapsed <= expected * 1.3:
+        results.add_pass(f"1,000 acquires in {elapsed:.2f}s (expected ~{expected:.2f}s)")
+    else:
+        results.add_fail("Throughput", f"Took {elapsed:.2f}s, expected ~{expected:.2f}s")
+
+    histogram = limiter.get_wait_histogram()
+    recorded = sum(histogram['normal'].values())
+    if recorded == 1000:
+        results.add_pass("Every acquire recorded in wait histogram")
+    else:
+        results.add_fail("Histogram", f"Recorded {recorded}, expected 1000")
+
+
+async def test_fifo_order():
+    """Test waiters in one class are served in arrival order"""
+    print("\n📋 Test: FIFO Order")
+    print("-" * 70)
+
+    limiter = TokenBucketRateLimiter(rate=200.0, capacity=1.0)
+    order = []
+
+    async def worker(i: int):
+        await limiter.acquire()
+        order.append(i)
+
+    tasks = []
+    for i in range(50):
+        tasks.append(asyncio.create_task(worker(i)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    if order == list(range(50)):
+        results.add_pass("Waiters served in FIFO order")
+    else:
+        results.add_fail("FIFO", f"Order: {order}")
+
+
+async def test_priority():
+    """Test ballots overtake queued notifications and team chat"""
+    print("\n👑 Test: Priority Classes")
+    print("-" * 70)
+
+    limiter = TokenBucketRateLimiter(rate=100.0, capacity=1.0)
+    await limiter.acquire()  # Drain the bucket so everything queues
+    order = []
+
+    async def worker(name: str, priority: int):
+        await limiter.acquire(priority=priority)
+        order.append(name)
+
+    tasks = [asyncio.create_task(worker(f"chat{i}", PRIORITY_CHAT)) for i in range(5)]
+    tasks += [asyncio.create_task(worker(f"note{i}", PRIORITY_NOTIFICATION)) for i in range(5)]
+    tasks += [asyncio.create_task(worker(f"ballot{i}", PRIORITY_BALLOT)) for i in range(5)]
+    await asyncio.gather(*tasks)
+
+    kinds = [name.rstrip("0123456789") for name in order]
+    if kinds == ["ballot"] * 5 + ["note"] * 5 + ["chat"] * 5:
+        results.add_pass("Ballots, then notifications, then team chat")
+    else:
+        results.add_fail("Priority", f"Order: {order}")
+
+
+async def test_cancelled_waiter():
+    """Test a cancelled waiter doesn't consume a token or stall the queue"""
+    print("\n🛑 Test: Cancelled Waiter")
+    print("-" * 70)
+
+    limiter = TokenBucketRateLimiter(rate=50.0, capacity=1.0)
+    await limiter.acquire()
+
+    first = asyncio.create_task(limiter.acquire())
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    first.cancel()
+
+    try:
+        await asyncio.wait_for(second, timeout=1)
+        results.add_pass("Queue continues past cancelled waiter")
+    except asyncio.TimeoutError:
+        results.add_fail("Cancelled waiter", "Second waiter never served")
+
+    if limiter.get_status()['waiting'] == 0:
+        results.add_pass("No waiters left behind")
+    else:
+        results.add_fail("Cleanup", f"{limiter.get_status()['waiting']} waiters left")
+
+
+async def test_per_chat_buckets():
+    """Test chats are limited independently under one global bucket"""
+    print("\n💬 Test: Per-Chat Buckets")
+    print("-" * 70)
+
+    limiter = HierarchicalRateLimiter(
+        global_rate=1000.0, global_capacity=1000.0,
+        private_rate=10.0, private_capacity=2.0,
+        group_rate=2.0, group_capacity=1.0
+    )
+
+    # Two private chats: each gets its own 2-token burst
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire(chat_id) for chat_id in (1, 1, 2, 2)))
+    if time.monotonic() - start < 0.05:
+        results.add_pass("Private chats don't throttle each other")
+    else:
+        results.add_fail("Chat isolation", f"Took {time.monotonic() - start:.2f}s")
+
+    # Group: 1 burst token, then 2/s
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire(-100) for _ in range(3)))
+    elapsed = time.monotonic() - start
+    if 0.9 <= elapsed <= 1.3:
+        results.add_pass(f"Group paced at its own rate ({elapsed:.2f}s for 3)")
+    else:
+        results.add_fail("Group rate", f"Took {elapsed:.2f}s, expected ~1.0s")
+
+    if not limiter.try_acquire(-100):
+        results.add_pass("try_acquire refuses a throttled chat")
+    else:
+        results.add_fail("try_acquire", "Throttled chat handed a token")
+
+
+async def test_retry_after_feedback():
+    """Test RetryAfter pauses and slows the chat, then recovers"""
+    print("\n⏸️ Test: RetryAfter Feedback")
+    print("-" * 70)
+
+    limiter = HierarchicalRateLimiter(
+        global_rate=1000.0, global_capacity=1000.0,
+        private_rate=10.0, private_capacity=5.0
+    )
+    await limiter.acquire(7)
+    limiter.report_retry_after(7, 0.5)
+    bucket = limiter._chat_bucket(7)
+
+    start = time.monotonic()
+    await limiter.acquire(7)
+    elapsed = time.monotonic() - start
+    if elapsed >= 0.5 and bucket.rate < bucket.base_rate:
+        results.add_pass(f"Chat paused {elapsed:.2f}s and slowed to {bucket.rate:.1f}/s")
+    else:
+        results.add_fail("RetryAfter", f"Waited {elapsed:.2f}s, rate {bucket.rate}")
+
+    for _ in range(20):
+        limiter.report_success(7)
+    if bucket.rate == bucket.base_rate:
+        results.add_pass("Rate recovers after successful sends")
+    else:
+        results.add_fail("Recovery", f"Rate stuck at {bucket.rate}")
+
+
+async def test_idle_eviction():
+    """Test idle chat buckets are dropped"""
+    print("\n🧹 Test: Idle Eviction")
+    print("-" * 70)
+
+    limiter = HierarchicalRateLimiter(idle_timeout=0.2)
+    for chat_id in range(1, 11):
+        await limiter.acquire(chat_id)
+    await asyncio.sleep(3.5)  # Private buckets refill (1/s) and go idle
+    await limiter.acquire(99)
+
+    if list(limiter._chat_buckets) == [99]:
+        results.add_pass("Idle chat buckets evicted")
+    else:
+        results.add_fail("Eviction", f"{len(limiter._chat_buckets)} buckets left")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 RATE LIMITER TEST")
+    print("="*70)
+
+    await test_throughput()
+    await test_fifo_order()
+    await test_priority()
+    await test_cancelled_waiter()
+    await test_per_chat_buckets()
+    await test_retry_after_feedback()
+    await test_idle_eviction()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,387 @@
+"""
+Test Event-Driven Round Engine
+Verify rounds close as soon as every team has voted, or at the deadline
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from handlers.voting_handler import VotingHandler
+from handlers.game_handler import game_handler
+from handlers.voting_handler import voting_handler
+from database.db_manager import db_manager
+from models.character import Character
+from utils.message_delivery import message_delivery
+from utils.game_registry import game_registry
+from data.themes import get_theme_by_id
+import config
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+TEAMS = {
+    1: [{'user_id': 101, 'username': 'a', 'is_leader': True},
+        {'user_id': 102, 'username': 'b', 'is_leader': False}],
+    2: [{'user_id': 201, 'username': 'c', 'is_leader': True},
+        {'user_id': 202, 'username': 'd', 'is_leader': False}],
+}
+
+
+def make_vote(game_id: int, round_number: int, team_id: int, user_id: int, char_id: int = 7):
+    """Build a fake vote callback"""
+    query = MagicMock()
+    query.data = f"vote_{game_id}_{round_number}_{team_id}_{char_id}"
+    query.from_user.id = user_id
+    query.from_user.username = f"user{user_id}"
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    update = MagicMock()
+    update.callback_query = query
+    return update, query
+
+
+async def test_early_close():
+    """Test the round finishes when the last player votes"""
+    print("\n⚡ Test: Early Close")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    game_registry.track(1)
+    handler.set_round_roster(1, 1, TEAMS)
+    context = MagicMock()
+
+    async def vote_all():
+        for team_id, players in TEAMS.items():
+            for player in players:
+                await asyncio.sleep(0.01)
+                update, _ = make_vote(1, 1, team_id, player['user_id'])
+                await handler.handle_vote(update, context)
+
+    start = time.perf_counter()
+    voter = asyncio.create_task(vote_all())
+    closed_early = await handler.wait_for_round(1, 1, timeout=5)
+    elapsed = time.perf_counter() - start
+    await voter
+    game_registry.release(1)
+
+    if closed_early and elapsed < 1:
+        results.add_pass(f"Round closed {elapsed:.2f}s after start (deadline 5s)")
+    else:
+        results.add_fail("Early close", f"closed_early={closed_early}, elapsed={elapsed:.2f}s")
+
+
+async def test_deadline():
+    """Test an incomplete round waits for the deadline"""
+    print("\n⏱️ Test: Deadline")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    game_registry.track(2)
+    handler.set_round_roster(2, 1, TEAMS)
+    update, _ = make_vote(2, 1, 1, 101)
+    await handler.handle_vote(update, MagicMock())
+    game_registry.release(2)
+
+    start = time.perf_counter()
+    closed_early = await handler.wait_for_round(2, 1, timeout=0.2)
+    elapsed = time.perf_counter() - start
+
+    if not closed_early and elapsed >= 0.19:
+        results.add_pass("Incomplete round runs to the deadline")
+    else:
+        results.add_fail("Deadline", f"closed_early={closed_early}, elapsed={elapsed:.2f}s")
+
+
+async def test_closed_round_rejects_votes():
+    """Test votes after close are rejected and not recorded"""
+    print("\n🔒 Test: Closed Round")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    game_registry.track(3)
+    handler.set_round_roster(3, 1, TEAMS)
+    handler.close_round(3, 1)
+
+    update, query = make_vote(3, 1, 1, 101)
+    recorded = await handler.handle_vote(update, MagicMock())
+    game_registry.release(3)
+
+    if not recorded and 101 not in handler.get_team_votes(3, 1, 1):
+        results.add_pass("Vote after close rejected")
+    else:
+        results.add_fail("Closed round", "Late vote was recorded")
+
+    handler.clear_game_votes(3)
+    if 3 not in handler.round_rosters and 3 not in handler.round_complete and 3 not in handler.closed_rounds:
+        results.add_pass("clear_game_votes drops round engine state")
+    else:
+        results.add_fail("Cleanup", "Round engine state left behind")
+
+
+async def test_vote_log_in_background():
+    """Test a vote is counted before its slow log write finishes"""
+    print("\n📝 Test: Background Vote Log")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    game_registry.track(4)
+    handler.set_round_roster(4, 1, TEAMS)
+    written = []
+    release = asyncio.Event()
+
+    async def slow_record(game_id, round_number, team_id, user_id, character_id):
+        await release.wait()
+        written.append(character_id)
+
+    original_record = db_manager.record_vote
+    db_manager.record_vote = slow_record
+    try:
+        update, _ = make_vote(4, 1, 1, 101, char_id=7)
+        await asyncio.wait_for(handler.handle_vote(update, MagicMock()), timeout=1)
+        counted = handler.get_team_votes(4, 1, 1).get(101)
+        update, _ = make_vote(4, 1, 1, 101, char_id=9)
+        await handler.handle_vote(update, MagicMock())
+
+        if counted == 7 and not written:
+            results.add_pass("Vote counted without waiting for the log write")
+        else:
+            results.add_fail("Background log", f"counted={counted}, written={written}")
+
+        release.set()
+        await handler.flush_vote_log(4)
+        if written == [7, 9] and not handler.vote_log_writes:
+            results.add_pass("Changed vote written last; flush waits for pending writes")
+        else:
+            results.add_fail("Log order", f"written={written}, pending={len(handler.vote_log_writes)}")
+    finally:
+        db_manager.record_vote = original_record
+        game_registry.release(4)
+
+
+async def test_untracked_game_rejects_votes():
+    """Test a ballot for a finished or unknown game builds no state and logs nothing"""
+    print("\n🚫 Test: Untracked Game")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    original_record = db_manager.record_vote
+    db_manager.record_vote = AsyncMock()
+    try:
+        update, query = make_vote(5, 2, 1, 101)
+        recorded = await handler.handle_vote(update, MagicMock())
+        await asyncio.sleep(0)
+        logged = db_manager.record_vote.await_count
+    finally:
+        db_manager.record_vote = original_record
+
+    alert = query.answer.await_args.kwargs.get('show_alert') if query.answer.await_args else None
+    if not recorded and alert and logged == 0:
+        results.add_pass("Vote for an untracked game rejected with an alert")
+    else:
+        results.add_fail("Untracked vote", f"recorded={recorded}, alert={alert}, logged={logged}")
+
+    if 5 not in handler.active_votes and 5 not in handler.round_timers and not handler.vote_log_writes:
+        results.add_pass("No voting state rebuilt for the untracked game")
+    else:
+        results.add_fail("Untracked state", "Voting state created")
+
+
+async def test_round_fanout():
+    """Test all teams' ballots go out in one delivery batch"""
+    print("\n📨 Test: Round Fan-out")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    game_handler.game_themes[4] = get_theme_by_id(1)
+    candidates = {
+        team_id: [Character(id=i, name=f"Char{i}", mbti="INTJ", zodiac="Leo", description="")
+                  for i in range(1, 4)]
+        for team_id in TEAMS
+    }
+    context = MagicMock()
+
+    async def fake_send_parallel(bot, recipients, **kwargs):
+        return {r['chat_id']: MagicMock(message_id=r['chat_id'] * 10) for r in recipients}
+
+    original = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(side_effect=fake_send_parallel)
+    try:
+        delivered = await handler.send_round_voting(context, 4, 1, TEAMS, candidates)
+        calls = message_delivery.send_parallel.await_args_list
+    finally:
+        message_delivery.send_parallel = original
+        game_handler.game_themes.pop(4, None)
+
+    if len(calls) == 1 and len(calls[0].args[1]) == 4:
+        results.add_pass("All teams sent in a single send_parallel batch")
+    else:
+        results.add_fail("Fan-out batch", f"{len(calls)} calls")
+
+    keyboards_ok = all(
+        'reply_markup' in r['kwargs'] for r in calls[0].args[1]
+    ) if calls else False
+    stored = handler.voting_messages[4][1]
+    if keyboards_ok and delivered == {1: 2, 2: 2} and stored[2][202] == 2020:
+        results.add_pass("Per-team keyboards attached and message IDs stored")
+    else:
+        results.add_fail("Fan-out bookkeeping", f"delivered={delivered}, stored={stored}")
+
+    ttl = calls[0].kwargs.get('ttl') if calls else None
+    if ttl is not None and config.ROUND_TIME - 1 < ttl <= config.ROUND_TIME:
+        results.add_pass("Ballot retries expire at the round deadline")
+    else:
+        results.add_fail("Ballot ttl", f"ttl={ttl}")
+
+
+async def test_round_results_builder():
+    """Test round results render from in-memory votes and the catalog"""
+    print("\n📋 Test: Round Results Builder")
+    print("-" * 70)
+
+    catalog = db_manager.character_catalog
+    catalog.load([
+        Character(id=i, name=f"Char{i}", mbti="INTJ", zodiac="Leo", description="")
+        for i in range(1, 4)
+    ])
+    game_handler.game_themes[5] = get_theme_by_id(1)
+    voting_handler.active_votes[5] = {1: {1: {101: 1, 102: 2}, 2: {201: 3}}}
+    # Any database access would fail: the pool isn't connected in tests
+    original_pool = db_manager.pool
+    db_manager.pool = None
+    try:
+        message = await game_handler.build_round_results(5, 1, {1: 1, 2: 3}, TEAMS)
+    except Exception as e:
+        message = ""
+        results.add_fail("Results builder", f"Raised {e!r}")
+    finally:
+        db_manager.pool = original_pool
+        voting_handler.active_votes.pop(5, None)
+        game_handler.game_themes.pop(5, None)
+        catalog.load([])
+        catalog.loaded = False
+
+    if "a 👑 → Char1" in message and "b → Char2" in message and "c 👑 → Char3" in message:
+        results.add_pass("Results built without database queries")
+    elif message:
+        results.add_fail("Results builder", message)
+
+
+async def test_finalize_round_batched():
+    """Test finalization saves in bulk and sends one delivery wave"""
+    print("\n🏁 Test: Batched Finalization")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    catalog = db_manager.character_catalog
+    catalog.load([
+        Character(id=i, name=f"Char{i}", mbti="INTJ", zodiac="Leo", description="")
+        for i in range(1, 4)
+    ])
+    game_handler.game_themes[6] = get_theme_by_id(1)
+    handler.active_votes[6] = {1: {1: {101: 1, 102: 2}}}
+    context = MagicMock()
+    context.bot.send_message = AsyncMock()
+
+    original_send = message_delivery.send_parallel
+    original_save = db_manager.save_round_selections
+    message_delivery.send_parallel = AsyncMock(return_value={})
+    db_manager.save_round_selections = AsyncMock()
+    try:
+        selections = await handler.finalize_round_voting(6, 1, TEAMS, context)
+        sends = message_delivery.send_parallel.await_args_list
+        saves = db_manager.save_round_selections.await_args_list
+    finally:
+        message_delivery.send_parallel = original_send
+        db_manager.save_round_selections = original_save
+        game_handler.game_themes.pop(6, None)
+        catalog.load([])
+        catalog.loaded = False
+
+    if selections == {1: 1, 2: None}:
+        results.add_pass("Leader's vote wins a split team, silent team is Optional")
+    else:
+        results.add_fail("Selections", f"{selections}")
+
+    if len(saves) == 1 and saves[0].args[3] == {1: (1, {101: 1, 102: 2})}:
+        results.add_pass("Selections saved in one bulk call")
+    else:
+        results.add_fail("Bulk save", f"{saves}")
+
+    recipients = sends[0].args[1] if len(sends) == 1 else []
+    skips = [r['chat_id'] for r in recipients if 'Skipped' in r['text']]
+    confirmations = [r for r in recipients if 'Skipped' not in r['text']]
+    if (len(sends) == 1 and sorted(skips) == [201, 202] and len(confirmations) == 4
+            and not context.bot.send_message.await_count):
+        results.add_pass("Skip notices and confirmations sent in one wave")
+    else:
+        results.add_fail("Delivery wave", f"{len(sends)} waves, skips={skips}")
+
+    team1 = next((r['text'] for r in confirmations if r['chat_id'] == 101), "")
+    if "Char1 ကို ရွေးချယ်ပြီးပါပြီ" in team1 and "b → Char2" in team1:
+        results.add_pass("Confirmation built from the catalog")
+    else:
+        results.add_fail("Confirmation text", team1)
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 ROUND ENGINE TEST")
+    print("="*70)
+
+    await test_early_close()
+    await test_deadline()
+    await test_closed_round_rejects_votes()
+    await test_vote_log_in_background()
+    await test_untracked_game_rejects_votes()
+    await test_round_fanout()
+    await test_round_results_builder()
+    await test_finalize_round_batched()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,240 @@
+"""
+Test Write-behind State Manager
+Verify memory reads, coalesced upserts and recovery from the database
+"""
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.db_manager import db_manager
+from utils.state_manager import StateManager, GameState, UserState
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+class FakeConnection:
+    """Records statements and keeps upserted rows in dicts"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, sql, *args):
+        self.pool.statements.append(sql)
+        if 'INSERT INTO game_states' in sql:
+            for chat_id, state, metadata in zip(*args):
+                self.pool.game_rows[chat_id] = {'state': state, 'metadata': metadata}
+        elif 'INSERT INTO user_states' in sql:
+            for user_id, chat_id, state, metadata in zip(*args):
+                self.pool.user_rows[(user_id, chat_id)] = {'state': state, 'metadata': metadata}
+        elif 'DELETE FROM game_states' in sql:
+            self.pool.game_rows.pop(args[0], None)
+        elif 'DELETE FROM user_states' in sql:
+            for key in [k for k in self.pool.user_rows if k[1] == args[0]]:
+                del self.pool.user_rows[key]
+        return "OK"
+
+    async def fetchrow(self, sql, *args):
+        self.pool.statements.append(sql)
+        if 'FROM game_states' in sql:
+            return self.pool.game_rows.get(args[0])
+        return self.pool.user_rows.get(tuple(args))
+
+
+class FakePool:
+    def __init__(self):
+        self.statements = []
+        self.game_rows = {}
+        self.user_rows = {}
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+
+async def test_coalesced_writes():
+    """Test rapid transitions become one upsert with the latest value"""
+    print("\n✍️ Test: Coalesced Writes")
+    print("-" * 70)
+
+    pool = FakePool()
+    db_manager.pool = pool
+    manager = StateManager(flush_delay=0.05)
+
+    for state in (GameState.LOBBY_OPEN, GameState.TEAMS_FORMING, GameState.ROUND_VOTING):
+        await manager.set_game_state(-100, state, {'round': 1})
+    await manager.set_user_state(1, -100, UserState.PLAYING)
+    await manager.set_user_state(1, -100, UserState.VOTING, {'team': 2})
+
+    read = await manager.get_game_state(-100)
+    if read['state'] == GameState.ROUND_VOTING and not pool.statements:
+        results.add_pass("Reads served from memory before any flush")
+    else:
+        results.add_fail("Memory reads", f"state={read['state']}, statements={len(pool.statements)}")
+
+    await asyncio.sleep(0.15)
+
+    upserts = [sql for sql in pool.statements if 'INSERT' in sql]
+    if len(upserts) == 2 and all('ON CONFLICT' in sql for sql in upserts):
+        results.add_pass("5 writes flushed as 2 single-statement upserts")
+    else:
+        results.add_fail("Coalescing", f"{len(upserts)} upserts: {pool.statements}")
+
+    if (pool.game_rows[-100]['state'] == 'round_voting'
+            and json.loads(pool.user_rows[(1, -100)]['metadata']) == {'team': 2}):
+        results.add_pass("Latest value persisted")
+    else:
+        results.add_fail("Persisted value", f"{pool.game_rows} / {pool.user_rows}")
+
+
+async def test_recovery_after_restart():
+    """Test a fresh manager loads state from the database"""
+    print("\n🔄 Test: Recovery After Restart")
+    print("-" * 70)
+
+    pool = FakePool()
+    pool.game_rows[-200] = {'state': 'round_results', 'metadata': '{"round": 3}'}
+    pool.user_rows[(5, -200)] = {'state': 'waiting', 'metadata': {}}
+    db_manager.pool = pool
+
+    manager = StateManager(flush_delay=0.05)
+    game = await manager.get_game_state(-200)
+    user = await manager.get_user_state(5, -200)
+    await manager.get_game_state(-200)
+    reads = len(pool.statements)
+
+    if game == {'state': GameState.ROUND_RESULTS, 'metadata': {'round': 3}} and user['state'] == UserState.WAITING:
+        results.add_pass("State recovered from database")
+    else:
+        results.add_fail("Recovery", f"game={game}, user={user}")
+
+    if reads == 2:
+        results.add_pass("Recovered state cached after first read")
+    else:
+        results.add_fail("Recovery caching", f"{reads} database reads")
+
+
+async def test_clear_and_close():
+    """Test clears drop pending writes and close flushes the rest"""
+    print("\n🧹 Test: Clear & Close")
+    print("-" * 70)
+
+    pool = FakePool()
+    db_manager.pool = pool
+    manager = StateManager(flush_delay=10)
+
+    await manager.set_game_state(-300, GameState.LOBBY_OPEN)
+    await manager.set_user_state(7, -300, UserState.IN_LOBBY)
+    await manager.clear_user_states(-300)
+    await manager.set_user_state(8, -400, UserState.IN_LOBBY)
+    await manager.close()
+
+    if -300 in pool.game_rows and (7, -300) not in pool.user_rows and (8, -400) in pool.user_rows:
+        results.add_pass("close() flushes pending writes, cleared keys stay deleted")
+    else:
+        results.add_fail("Clear/close", f"{pool.game_rows} / {pool.user_rows}")
+
+    default = await manager.get_user_state(7, -300)
+    if default['state'] == UserState.MENU:
+        results.add_pass("Cleared user falls back to default state")
+    else:
+        results.add_fail("Cleared default", str(default))
+
+
+async def test_bulk_transition():
+    """Test a 15-player transition is one round trip"""
+    print("\n👥 Test: Bulk Transition")
+    print("-" * 70)
+
+    pool = FakePool()
+    db_manager.pool = pool
+    manager = StateManager(flush_delay=10)
+
+    players = list(range(1, 16))
+    ok = await manager.set_players_state(-500, players, UserState.PLAYING, {'round': 1}, flush_now=True)
+
+    if ok and len(pool.statements) == 1 and len(pool.user_rows) == 15:
+        results.add_pass("15 players written with a single statement")
+    else:
+        results.add_fail("Bulk transition", f"ok={ok}, statements={len(pool.statements)}, rows={len(pool.user_rows)}")
+
+    await manager.set_user_states_bulk(-500, {
+        1: (UserState.VOTING, {'team': 1}),
+        2: (UserState.WAITING, None),
+    })
+    first = await manager.get_user_state(1, -500)
+    second = await manager.get_user_state(2, -500)
+    await manager.close()
+
+    if (first['state'] == UserState.VOTING and second['state'] == UserState.WAITING
+            and pool.user_rows[(2, -500)]['state'] == 'waiting'):
+        results.add_pass("Per-user bulk states readable and persisted")
+    else:
+        results.add_fail("Bulk per-user", f"{first} / {second}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 STATE MANAGER TEST")
+    print("="*70)
+
+    try:
+        await test_coalesced_writes()
+        await test_recovery_after_restart()
+        await test_clear_and_close()
+        await test_bulk_transition()
+    finally:
+        db_manager.pool = None
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
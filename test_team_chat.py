@@ -0,0 +1,203 @@
+"""
+Test Team Chat Relay
+Verify bursts from one sender are merged and relayed to teammates concurrently
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.message_delivery import message_delivery
+from utils.rate_limiter import PRIORITY_CHAT
+from utils.team_chat import MAX_BATCH_CHARS, TELEGRAM_MAX_CHARS, TeamChatRelay
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+TEAM_A = [{'user_id': 1}, {'user_id': 2}, {'user_id': 3}]
+TEAM_B = [{'user_id': 4}, {'user_id': 5}]
+
+
+async def test_burst_batching():
+    """Test a burst from one sender becomes one relay message"""
+    print("\n💬 Test: Burst Batching")
+    print("-" * 70)
+
+    relay = TeamChatRelay(batch_delay=0.1)
+    original_send = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(return_value={})
+    try:
+        for text in ("hi", "who do we pick?", "I say Alpha"):
+            relay.relay(MagicMock(), 1, "alice", "Team A", TEAM_A, text)
+        await asyncio.sleep(0.3)
+        calls = message_delivery.send_parallel.await_args_list
+    finally:
+        message_delivery.send_parallel = original_send
+
+    if len(calls) == 1:
+        results.add_pass("Three messages -> one relay batch")
+    else:
+        results.add_fail("Burst batching", f"{len(calls)} batches")
+        return
+
+    recipients = calls[0].args[1]
+    if sorted(r['chat_id'] for r in recipients) == [2, 3]:
+        results.add_pass("Sender excluded from relay")
+    else:
+        results.add_fail("Recipients", f"{recipients}")
+
+    text = recipients[0]['text']
+    if text.startswith("💬 Team A - by alice") and text.endswith("hi\nwho do we pick?\nI say Alpha"):
+        results.add_pass("Merged message keeps order")
+    else:
+        results.add_fail("Merged text", text)
+
+    if calls[0].kwargs.get('priority') == PRIORITY_CHAT:
+        results.add_pass("Relay uses chat priority")
+    else:
+        results.add_fail("Priority", f"{calls[0].kwargs}")
+
+
+async def test_teams_relay_in_parallel():
+    """Test senders in different teams are relayed concurrently"""
+    print("\n⚡ Test: Parallel Team Fan-out")
+    print("-" * 70)
+
+    relay = TeamChatRelay(batch_delay=0.05)
+    in_flight = 0
+    peak = 0
+
+    async def slow_send(bot, recipients, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.2)
+        in_flight -= 1
+        return {}
+
+    original_send = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(side_effect=slow_send)
+    try:
+        relay.relay(MagicMock(), 1, "alice", "Team A", TEAM_A, "a")
+        relay.relay(MagicMock(), 4, "dave", "Team B", TEAM_B, "b")
+        await asyncio.sleep(0.4)
+    finally:
+        message_delivery.send_parallel = original_send
+
+    if peak == 2:
+        results.add_pass("Two teams relayed concurrently")
+    else:
+        results.add_fail("Parallel fan-out", f"Peak concurrency {peak}")
+
+
+async def test_batch_size_limit():
+    """Test an oversized burst is split before hitting Telegram's limit"""
+    print("\n📏 Test: Batch Size Limit")
+    print("-" * 70)
+
+    relay = TeamChatRelay(batch_delay=0.05)
+    original_send = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(return_value={})
+    try:
+        chunk = "x" * (MAX_BATCH_CHARS // 3)
+        for _ in range(4):
+            relay.relay(MagicMock(), 1, "alice", "Team A", TEAM_A, chunk)
+        await asyncio.sleep(0.2)
+        calls = message_delivery.send_parallel.await_args_list
+    finally:
+        message_delivery.send_parallel = original_send
+
+    longest = max(len(call.args[1][0]['text']) for call in calls) if calls else 0
+    if len(calls) == 2 and longest < 4096:
+        results.add_pass("Oversized burst split into two relays")
+    else:
+        results.add_fail("Batch size", f"{len(calls)} batches, longest {longest}")
+
+
+async def test_long_single_message():
+    """Test one message over the limit is split and every relay fits"""
+    print("\n✂️ Test: Long Single Message")
+    print("-" * 70)
+
+    relay = TeamChatRelay(batch_delay=0.05)
+    original_send = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(return_value={})
+    try:
+        text = "".join(str(i % 10) for i in range(5000))
+        relay.relay(MagicMock(), 1, "alice", "Team A", TEAM_A, text)
+        await asyncio.sleep(0.2)
+        calls = message_delivery.send_parallel.await_args_list
+        pending_sends = len(relay._sending)
+    finally:
+        message_delivery.send_parallel = original_send
+
+    header = "💬 Team A - by alice\n\n"
+    texts = [call.args[1][0]['text'] for call in calls]
+    bodies = sorted((t[len(header):] for t in texts), key=len, reverse=True)
+    if len(texts) == 2 and all(len(t) <= TELEGRAM_MAX_CHARS for t in texts) and "".join(bodies) == text:
+        results.add_pass("5000-character message relayed in two parts under the limit")
+    else:
+        results.add_fail("Long message", f"{len(texts)} relays, lengths {[len(t) for t in texts]}")
+
+    if pending_sends == 0:
+        results.add_pass("Finished sends dropped from the tracked set")
+    else:
+        results.add_fail("Send tracking", f"{pending_sends} sends still tracked")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 TEAM CHAT RELAY TEST")
+    print("="*70)
+
+    await test_burst_batching()
+    await test_teams_relay_in_parallel()
+    await test_batch_size_limit()
+    await test_long_single_message()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+"""
+Test Timer Wheel
+Verify deadlines fire on time from one scheduler, with cancel, reschedule and introspection
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from handlers.voting_handler import VotingHandler
+from utils.timer_wheel import TimerWheel, timer_wheel
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+
+async def test_fires_in_order_never_early():
+    """Test many timers fire once, in deadline order, never before their deadline"""
+    print("\n⏱️ Test: Firing")
+    print("-" * 70)
+
+    wheel = TimerWheel(tick=0.005)
+    start = time.monotonic()
+    fired = []
+    delays = [0.3, 0.05, 0.2, 0.01, 0.15, 0.1, 0.25]
+    for delay in delays:
+        wheel.schedule(delay, lambda d=delay: fired.append((d, time.monotonic() - start)))
+    await asyncio.sleep(0.4)
+
+    if [d for d, _ in fired] == sorted(delays):
+        results.add_pass("Timers fired once each, in deadline order")
+    else:
+        results.add_fail("Firing order", f"{fired}")
+
+    if all(at >= d for d, at in fired) and max(at - d for d, at in fired) < 0.05:
+        results.add_pass("No timer fired early or much late")
+    else:
+        results.add_fail("Firing time", f"{fired}")
+
+
+async def test_cancel_and_reschedule():
+    """Test cancelling, rescheduling and named timers"""
+    print("\n🔁 Test: Cancel & Reschedule")
+    print("-" * 70)
+
+    wheel = TimerWheel(tick=0.005)
+    fired = []
+    cancelled = wheel.schedule(0.05, fired.append, 'cancelled')
+    moved = wheel.schedule(0.05, fired.append, 'moved')
+    wheel.schedule(0.05, fired.append, 'named', key='round:1:1')
+    wheel.schedule(0.3, fired.append, 'replaced', key='lobby:-1')
+    wheel.schedule(0.1, fired.append, 'replacement', key='lobby:-1')
+
+    cancelled.cancel()
+    wheel.reschedule(moved, 0.15)
+    pending = wheel.pending('lobby:')
+
+    await asyncio.sleep(0.08)
+    early = list(fired)
+    await asyncio.sleep(0.12)
+
+    if early == ['named'] and sorted(fired) == ['moved', 'named', 'replacement']:
+        results.add_pass("Cancelled timer skipped, rescheduled timer moved, key replaced")
+    else:
+        results.add_fail("Cancel/reschedule", f"early={early}, fired={fired}")
+
+    if list(pending) == ['lobby:-1'] and 0.05 < pending['lobby:-1'] <= 0.1:
+        results.add_pass("Pending deadlines listed by key with time left")
+    else:
+        results.add_fail("Introspection", f"{pending}")
+
+    stats = wheel.get_stats()
+    if stats['pending'] == 0 and stats['fired_total'] == 3 and stats['cancelled_total'] == 2:
+        results.add_pass("Gauges count fired and cancelled timers")
+    else:
+        results.add_fail("Gauges", f"{stats}")
+
+
+async def test_round_deadline_on_wheel():
+    """Test round deadlines register on the shared wheel and are cancelled on early close"""
+    print("\n🎯 Test: Round Deadline")
+    print("-" * 70)
+
+    handler = VotingHandler()
+    teams = {1: [{'user_id': 1}, {'user_id': 2}]}
+    handler.set_round_roster(11, 1, teams)
+
+    waiter = asyncio.create_task(handler.wait_for_round(11, 1, timeout=30))
+    await asyncio.sleep(0.01)
+    listed = timer_wheel.pending('round:11:')
+
+    handler.active_votes[11][1][1] = {1: 5, 2: 5}
+    handler._check_round_complete(11, 1)
+    closed_early = await waiter
+
+    if list(listed) == ['round:11:1'] and closed_early and not timer_wheel.pending('round:11:'):
+        results.add_pass("Deadline listed while waiting, removed on early close")
+    else:
+        results.add_fail("Round deadline", f"listed={listed}, closed_early={closed_early}")
+
+    handler.clear_game_votes(11)
+
+
+async def test_sleep_cancellation():
+    """Test a cancelled wheel sleep leaves no timer behind"""
+    print("\n💤 Test: Sleep Cancellation")
+    print("-" * 70)
+
+    wheel = TimerWheel(tick=0.005)
+    sleeper = asyncio.create_task(wheel.sleep(10))
+    await asyncio.sleep(0.01)
+    sleeper.cancel()
+    await asyncio.gather(sleeper, return_exceptions=True)
+
+    if wheel.get_stats()['pending'] == 0:
+        results.add_pass("Cancelled sleep removed its timer")
+    else:
+        results.add_fail("Sleep cancellation", f"{wheel.get_stats()}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 TIMER WHEEL TEST")
+    print("="*70)
+
+    await test_fires_in_order_never_early()
+    await test_cancel_and_reschedule()
+    await test_round_deadline_on_wheel()
+    await test_sleep_cancellation()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
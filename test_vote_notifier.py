@@ -0,0 +1,150 @@
+"""
+Test Vote Notification Aggregator
+Verify votes are debounced into one status message per teammate, edited in place
+"""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.message_delivery import message_delivery
+from utils.vote_notifier import VoteNotifier
+
+
+class TestResults:
+    def __init__(self):
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name: str):
+        self.total += 1
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name: str, reason: str):
+        self.total += 1
+        self.failed += 1
+        self.errors.append((test_name, reason))
+        print(f"❌ FAIL: {test_name}")
+        print(f"   Reason: {reason}")
+
+    def summary(self):
+        print("\n" + "="*70)
+        print("📊 TEST SUMMARY")
+        print("="*70)
+        print(f"Total Tests: {self.total}")
+        print(f"✅ Passed: {self.passed}")
+        print(f"❌ Failed: {self.failed}")
+        print(f"Success Rate: {(self.passed/self.total)*100:.1f}%")
+
+        if self.errors:
+            print("\n❌ Failed Tests:")
+            for test_name, reason in self.errors:
+                print(f"  - {test_name}: {reason}")
+
+        print("="*70)
+
+
+results = TestResults()
+
+TEAM = [
+    {'user_id': 1, 'username': 'a', 'is_leader': True},
+    {'user_id': 2, 'username': 'b', 'is_leader': False},
+    {'user_id': 3, 'username': 'c', 'is_leader': False},
+]
+
+
+async def test_debounce_and_edit():
+    """Test a burst of votes sends once, later votes edit in place"""
+    print("\n📢 Test: Debounced Status Messages")
+    print("-" * 70)
+
+    notifier = VoteNotifier(flush_delay=0.1)
+    bot = MagicMock()
+
+    async def fake_send_parallel(bot, recipients, **kwargs):
+        return {r['chat_id']: MagicMock(message_id=r['chat_id'] * 10) for r in recipients}
+
+    original_send = message_delivery.send_parallel
+    original_edit = message_delivery.edit_message_text
+    message_delivery.send_parallel = AsyncMock(side_effect=fake_send_parallel)
+    message_delivery.edit_message_text = AsyncMock(return_value=MagicMock())
+    try:
+        for user_id, char in ((1, "Alpha"), (2, "Beta"), (3, "Alpha")):
+            notifier.notify(bot, 1, 1, 1, TEAM, "Team A", "King", user_id, f"user{user_id}", char)
+        await asyncio.sleep(0.3)
+        sends = message_delivery.send_parallel.await_args_list
+
+        if len(sends) == 1 and len(sends[0].args[1]) == 3:
+            results.add_pass("Three votes -> one batch of 3 status messages (was 6 DMs)")
+        else:
+            results.add_fail("Debounce", f"{len(sends)} send batches")
+
+        text = sends[0].args[1][0]['text'] if sends else ""
+        if "user1" in text and "user2" in text and "Beta" in text and "⏳" not in text:
+            results.add_pass("Status lists every vote")
+        else:
+            results.add_fail("Status text", text)
+
+        # Vote change -> edits only
+        notifier.notify(bot, 1, 1, 1, TEAM, "Team A", "King", 2, "user2", "Gamma")
+        await asyncio.sleep(0.3)
+        edits = message_delivery.edit_message_text.await_args_list
+        edited = sorted(call.kwargs['chat_id'] for call in edits)
+        if len(message_delivery.send_parallel.await_args_list) == 1 and edited == [1, 2, 3]:
+            results.add_pass("Vote change edits existing messages in place")
+        else:
+            results.add_fail("Edit in place", f"edited={edited}")
+
+        if all(call.kwargs['message_id'] == call.kwargs['chat_id'] * 10 for call in edits):
+            results.add_pass("Edits target each teammate's own status message")
+        else:
+            results.add_fail("Edit targets", "Wrong message IDs")
+    finally:
+        message_delivery.send_parallel = original_send
+        message_delivery.edit_message_text = original_edit
+        notifier.clear_game(1)
+
+
+async def test_first_vote_skips_voter():
+    """Test the voter isn't notified about their own vote"""
+    print("\n🙈 Test: Voter Not Notified")
+    print("-" * 70)
+
+    notifier = VoteNotifier(flush_delay=0.05)
+    original_send = message_delivery.send_parallel
+    message_delivery.send_parallel = AsyncMock(return_value={})
+    try:
+        notifier.notify(MagicMock(), 2, 1, 1, TEAM, "Team A", "King", 1, "user1", "Alpha")
+        await asyncio.sleep(0.2)
+        recipients = [r['chat_id'] for r in message_delivery.send_parallel.await_args.args[1]]
+    finally:
+        message_delivery.send_parallel = original_send
+        notifier.clear_game(2)
+
+    if sorted(recipients) == [2, 3]:
+        results.add_pass("Only teammates receive the first vote")
+    else:
+        results.add_fail("Recipients", f"Got {recipients}")
+
+
+async def main():
+    """Run all tests"""
+    print("\n" + "="*70)
+    print("🧪 VOTE NOTIFIER TEST")
+    print("="*70)
+
+    await test_debounce_and_edit()
+    await test_first_vote_skips_voter()
+
+    results.summary()
+    return results.failed == 0
+
+
+if __name__ == "__main__":
+    success = asyncio.run(main())
+    sys.exit(0 if success else 1)
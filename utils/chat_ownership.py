@@ -0,0 +1,435 @@
+"""
+Chat Ownership for Multi-Worker Mode
+Each chat (lobby and game) is owned by exactly one bot process through a
+Postgres lease; updates reaching another process are forwarded to the
+owner with LISTEN/NOTIFY
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from telegram import Update
+from database.db_manager import db_manager
+import config
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+class ChatOwnership:
+    """Lease-based chat ownership and update forwarding between workers
+
+    A worker claims a chat the first time it sees an update for it; the
+    lease is renewed by a heartbeat while the chat has a live game or lobby
+    here, or saw an update within idle_ttl. Idle chats and chats whose game
+    ended are released so they don't stay pinned to one worker. When a worker
+    dies its leases expire after lease_ttl and the next update for one of
+    its chats lets another worker take over (and resume the chat's game via
+    the on_takeover callback). Each worker LISTENs on its own channel for
+    updates forwarded by the others.
+    """
+
+    def __init__(self, worker_id: str = None, lease_ttl: int = None,
+                 idle_ttl: float = None, owner_cache_ttl: float = 5.0, enabled: bool = None):
+        """
+        Args:
+            worker_id: Unique name of this process
+            lease_ttl: Seconds a lease lasts without renewal
+            idle_ttl: Seconds a chat without live state stays owned after its last update
+            owner_cache_ttl: Seconds another worker's ownership is cached locally
+            enabled: Multi-worker mode on/off (default from config)
+        """
+        self.worker_id = worker_id or config.WORKER_ID
+        self.lease_ttl = lease_ttl if lease_ttl is not None else config.CHAT_LEASE_TTL
+        self.idle_ttl = idle_ttl if idle_ttl is not None else config.CHAT_IDLE_TTL
+        self.owner_cache_ttl = owner_cache_ttl
+        self.enabled = enabled if enabled is not None else config.MULTI_WORKER
+
+        # Chats this worker holds a lease for -> monotonic time of their last update
+        self.owned: Dict[int, float] = {}
+        # chat_id -> (owner worker_id, cached until monotonic time)
+        self._owner_cache: Dict[int, Tuple[str, float]] = {}
+        # Update IDs received from another worker (handled here, never re-forwarded)
+        self._forwarded_in: Set[int] = set()
+        self._claim_locks: Dict[int, asyncio.Lock] = {}
+        # Running takeovers: chat_id -> task restoring the chat's game
+        self._takeovers: Dict[int, asyncio.Task] = {}
+
+        self._application = None
+        self._listen_conn = None
+        # Set while the LISTEN connection is down: forwarded updates can't
+        # reach this worker, so it takes no leases and renews none
+        self._listener_down = False
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.on_takeover: Optional[Callable[[int], Any]] = None
+        # Returns the chats with a game or lobby in this process (never idle)
+        self.live_chats: Optional[Callable[[], Set[int]]] = None
+        # Called with chats this worker lost to another one (drop their local state)
+        self.on_lost: Optional[Callable[[List[int]], Any]] = None
+
+        self.forwarded_out = 0
+        self.forwarded_in_total = 0
+        self.takeovers = 0
+
+    @staticmethod
+    def channel_for(worker_id: str) -> str:
+        """NOTIFY channel a worker listens on"""
+        return f"bot_worker_{worker_id}"
+
+    async def init_ownership_table(self):
+        """Create the chat_leases table"""
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS chat_leases (
+                    chat_id BIGINT PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    expires_at TIMESTAMP NOT NULL
+                )
+            ''')
+            await conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_chat_leases_worker
+                ON chat_leases(worker_id)
+            ''')
+        logger.info("Chat lease table initialized")
+
+    # ==================== Ownership ====================
+
+    async def claim(self, chat_id: int) -> str:
+        """Get a chat's owner, taking the lease if it is free or expired
+
+        Returns:
+            worker_id of the owner (this worker's ID if the claim succeeded)
+        """
+        if chat_id in self.owned:
+            self.owned[chat_id] = time.monotonic()
+            return self.worker_id
+
+        cached = self._owner_cache.get(chat_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        if self._listener_down:
+            # Defer to a live owner, otherwise handle here without a lease
+            return await self._live_owner(chat_id) or self.worker_id
+
+        lock = self._claim_locks.setdefault(chat_id, asyncio.Lock())
+        try:
+            async with lock:
+                if chat_id in self.owned:
+                    return self.worker_id
+                owner, previous = await self._claim_lease(chat_id)
+        finally:
+            if not lock.locked():
+                self._claim_locks.pop(chat_id, None)
+
+        if owner != self.worker_id:
+            now = time.monotonic()
+            if len(self._owner_cache) > 10000:
+                self._owner_cache = {
+                    cid: entry for cid, entry in self._owner_cache.items() if entry[1] > now
+                }
+            self._owner_cache[chat_id] = (owner, now + self.owner_cache_ttl)
+            return owner
+
+        self.owned[chat_id] = time.monotonic()
+        self._owner_cache.pop(chat_id, None)
+        if previous and previous != self.worker_id:
+            # Lease expired: the previous owner died, pick up its game
+            self.takeovers += 1
+            logger.warning(f"Chat {chat_id} taken over from {previous}")
+            if self.on_takeover:
+                task = asyncio.create_task(self._run_takeover(chat_id))
+                self._takeovers[chat_id] = task
+                task.add_done_callback(lambda _, chat_id=chat_id: self._takeovers.pop(chat_id, None))
+        return owner
+
+    async def _claim_lease(self, chat_id: int) -> Tuple[str, Optional[str]]:
+        """Insert or steal an expired lease in one statement
+
+        Returns:
+            (current owner, previous owner if the lease existed)
+        """
+        async with db_manager.pool.acquire() as conn:
+            row = await conn.fetchrow('''
+                WITH previous AS (
+                    SELECT worker_id FROM chat_leases WHERE chat_id = $1
+                ), claimed AS (
+                    INSERT INTO chat_leases (chat_id, worker_id, expires_at)
+                    VALUES ($1, $2, LOCALTIMESTAMP + make_interval(secs => $3))
+                    ON CONFLICT (chat_id) DO UPDATE
+                    SET worker_id = EXCLUDED.worker_id, expires_at = EXCLUDED.expires_at
+                    WHERE chat_leases.expires_at < LOCALTIMESTAMP
+                       OR chat_leases.worker_id = EXCLUDED.worker_id
+                    RETURNING worker_id
+                )
+                SELECT
+                    COALESCE((SELECT worker_id FROM claimed),
+                             (SELECT worker_id FROM previous)) AS owner,
+                    (SELECT worker_id FROM previous) AS previous
+            ''', chat_id, self.worker_id, float(self.lease_ttl))
+        return row['owner'], row['previous']
+
+    async def _live_owner(self, chat_id: int) -> Optional[str]:
+        """Get another worker holding an unexpired lease on a chat"""
+        async with db_manager.pool.acquire() as conn:
+            return await conn.fetchval(
+                '''SELECT worker_id FROM chat_leases
+                   WHERE chat_id = $1 AND worker_id != $2 AND expires_at >= LOCALTIMESTAMP''',
+                chat_id, self.worker_id
+            )
+
+    async def wait_takeover(self, chat_id: int):
+        """Wait until a running takeover of the chat has restored its game
+
+        Updates for the chat must not be handled before that: a vote would
+        land in an empty round that the restore then replaces.
+        """
+        task = self._takeovers.get(chat_id)
+        if task is not None:
+            await asyncio.wait({task})
+
+    async def _run_takeover(self, chat_id: int):
+        try:
+            result = self.on_takeover(chat_id)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Takeover of chat {chat_id} failed: {e}", exc_info=True)
+
+    async def release(self, chat_id: int):
+        """Give up a chat whose game or lobby ended
+
+        The lease row is deleted (not expired), so the next worker to see
+        the chat claims it without treating it as a takeover.
+        """
+        if not self.enabled or chat_id not in self.owned:
+            return
+        if self.live_chats and chat_id in self.live_chats():
+            # Another game or lobby of the chat is still running here
+            return
+        self.owned.pop(chat_id, None)
+        try:
+            async with db_manager.pool.acquire() as conn:
+                await conn.execute(
+                    'DELETE FROM chat_leases WHERE chat_id = $1 AND worker_id = $2',
+                    chat_id, self.worker_id
+                )
+            logger.debug(f"Released chat {chat_id}")
+        except Exception as e:
+            # The lease simply expires after lease_ttl
+            logger.error(f"Failed to release chat {chat_id}: {e}")
+
+    def _idle_chats(self) -> List[int]:
+        """Owned chats with no live state and no recent update"""
+        live = self.live_chats() if self.live_chats else set()
+        cutoff = time.monotonic() - self.idle_ttl
+        return [
+            chat_id for chat_id, last_seen in self.owned.items()
+            if chat_id not in live and last_seen < cutoff
+        ]
+
+    async def _renew_leases(self):
+        """Extend the leases of active chats, release idle ones, drop chats it lost"""
+        idle = self._idle_chats()
+        for chat_id in idle:
+            self.owned.pop(chat_id, None)
+        active = list(self.owned)
+
+        async with db_manager.pool.acquire() as conn:
+            if idle:
+                await conn.execute(
+                    'DELETE FROM chat_leases WHERE worker_id = $1 AND chat_id = ANY($2::bigint[])',
+                    self.worker_id, idle
+                )
+            rows = await conn.fetch('''
+                UPDATE chat_leases
+                SET expires_at = LOCALTIMESTAMP + make_interval(secs => $2)
+                WHERE worker_id = $1 AND chat_id = ANY($3::bigint[])
+                RETURNING chat_id
+            ''', self.worker_id, float(self.lease_ttl), active)
+        if idle:
+            logger.debug(f"Released {len(idle)} idle chats")
+
+        held = {row['chat_id'] for row in rows}
+        lost = [chat_id for chat_id in active if chat_id not in held]
+        if lost:
+            logger.error(f"Lost leases for chats {sorted(lost)} (heartbeat too slow?)")
+            self._drop_chats(lost)
+
+    def _drop_chats(self, chat_ids: List[int]):
+        """Forget chats another worker now owns and drop their local state"""
+        for chat_id in chat_ids:
+            self.owned.pop(chat_id, None)
+        if self.on_lost and chat_ids:
+            try:
+                self.on_lost(chat_ids)
+            except Exception as e:
+                logger.error(f"Dropping state of lost chats failed: {e}")
+
+    async def _beat(self):
+        """One heartbeat: check the listener, then renew leases"""
+        if not await self._check_listener():
+            if self.owned:
+                # Stop renewing: live workers take the chats over once the leases lapse
+                logger.error(
+                    f"Not listening for forwarded updates, giving up {len(self.owned)} chats"
+                )
+                self._drop_chats(list(self.owned))
+            return
+        await self._renew_leases()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.lease_ttl / 3))
+            try:
+                await self._beat()
+            except Exception as e:
+                logger.error(f"Chat lease heartbeat failed: {e}")
+
+    # ==================== Forwarding ====================
+
+    def was_forwarded(self, update: Update) -> bool:
+        """Check whether an update came from another worker (consumes the mark)"""
+        if update.update_id in self._forwarded_in:
+            self._forwarded_in.discard(update.update_id)
+            return True
+        return False
+
+    async def forward(self, owner: str, update: Update) -> bool:
+        """Send an update to the worker owning its chat
+
+        Returns:
+            False if the update is too large for NOTIFY (handle it locally)
+        """
+        payload = json.dumps(update.to_dict(), separators=(',', ':'))
+        if len(payload.encode('utf-8')) > MAX_NOTIFY_PAYLOAD:
+            logger.warning(f"Update {update.update_id} too large to forward, handling locally")
+            return False
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('SELECT pg_notify($1, $2)', self.channel_for(owner), payload)
+        self.forwarded_out += 1
+        logger.debug(f"Update {update.update_id} forwarded to {owner}")
+        return True
+
+    def _on_notify(self, connection, pid, channel, payload):
+        """LISTEN callback: queue a forwarded update for local handling"""
+        try:
+            update = Update.de_json(json.loads(payload), self._application.bot)
+        except Exception as e:
+            logger.error(f"Dropping malformed forwarded update: {e}")
+            return
+        self._forwarded_in.add(update.update_id)
+        self.forwarded_in_total += 1
+        self._application.update_queue.put_nowait(update)
+
+    # ==================== Listener ====================
+
+    async def _listen(self):
+        """Open a dedicated connection and LISTEN on this worker's channel"""
+        conn = await db_manager.pool.acquire()
+        try:
+            await conn.add_listener(self.channel_for(self.worker_id), self._on_notify)
+            conn.add_termination_listener(self._on_listener_terminated)
+        except Exception:
+            await db_manager.pool.release(conn)
+            raise
+        self._listen_conn = conn
+        self._listener_down = False
+
+    def _on_listener_terminated(self, connection):
+        """Termination callback: the LISTEN connection was closed under us"""
+        if connection is self._listen_conn:
+            self._listener_down = True
+            logger.error("LISTEN connection closed, forwarded updates paused until reconnect")
+
+    async def _close_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is None:
+            return
+        try:
+            conn.remove_termination_listener(self._on_listener_terminated)
+            if not conn.is_closed():
+                await conn.remove_listener(self.channel_for(self.worker_id), self._on_notify)
+        except Exception as e:
+            logger.debug(f"Closing LISTEN connection: {e}")
+        finally:
+            try:
+                await db_manager.pool.release(conn)
+            except Exception as e:
+                logger.debug(f"Releasing LISTEN connection: {e}")
+
+    async def _check_listener(self) -> bool:
+        """Ping the LISTEN connection; reconnect and re-LISTEN if it is gone
+
+        Returns:
+            True if this worker can receive forwarded updates
+        """
+        conn = self._listen_conn
+        if not self._listener_down and conn is not None and not conn.is_closed():
+            try:
+                await asyncio.wait_for(conn.fetchval('SELECT 1'), timeout=5)
+                return True
+            except Exception as e:
+                logger.error(f"LISTEN connection unhealthy: {e}")
+
+        self._listener_down = True
+        await self._close_listener()
+        try:
+            await self._listen()
+        except Exception as e:
+            logger.error(f"LISTEN reconnect failed: {e}")
+            return False
+        logger.info(f"LISTEN re-established on {self.channel_for(self.worker_id)}")
+        return True
+
+    # ==================== Lifecycle ====================
+
+    async def start(self, application):
+        """Listen for forwarded updates and start the lease heartbeat"""
+        if not self.enabled:
+            return
+        self._application = application
+        await self.init_ownership_table()
+        await self._listen()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Multi-worker mode: worker {self.worker_id}, lease {self.lease_ttl}s")
+
+    async def stop(self):
+        """Stop listening and let other workers take over owned chats immediately"""
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        await self._close_listener()
+        if self.enabled and self.owned:
+            # Expire rather than delete, so the next owner sees a takeover and resumes games
+            try:
+                async with db_manager.pool.acquire() as conn:
+                    await conn.execute(
+                        '''UPDATE chat_leases SET expires_at = LOCALTIMESTAMP - INTERVAL '1 second'
+                           WHERE worker_id = $1''',
+                        self.worker_id
+                    )
+            except Exception as e:
+                logger.error(f"Failed to release chat leases: {e}")
+            self.owned.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get ownership and forwarding counters"""
+        return {
+            'worker_id': self.worker_id,
+            'enabled': self.enabled,
+            'owned_chats': len(self.owned),
+            'listening': self._listen_conn is not None and not self._listener_down,
+            'forwarded_out': self.forwarded_out,
+            'forwarded_in': self.forwarded_in_total,
+            'takeovers': self.takeovers
+        }
+
+
+# Global chat ownership instance
+chat_ownership = ChatOwnership()
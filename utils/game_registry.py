@@ -0,0 +1,154 @@
+"""
+Game Registry
+Tracks the lifetime of in-memory game state and reclaims it when a game
+ends, or when it goes idle because its round task crashed or was cancelled
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class GameRecord:
+    """Lifetime bookkeeping for one game"""
+
+    __slots__ = ('game_id', 'chat_id', 'created_at', 'last_seen')
+
+    def __init__(self, game_id: int, chat_id: Optional[int] = None):
+        now = time.monotonic()
+        self.game_id = game_id
+        self.chat_id = chat_id
+        self.created_at = now
+        self.last_seen = now
+
+
+class GameRegistry:
+    """Single owner of game lifetimes for every game-scoped in-memory store
+
+    Handlers register a cleanup callback (drops one game's state) and
+    sources (report the game IDs a store holds, used for size gauges and
+    to spot orphans). release() runs every cleanup exactly once; a periodic
+    sweep releases games idle for longer than the TTL, including games only
+    a store still knows about.
+    """
+
+    def __init__(self, ttl: float = None, sweep_interval: float = None):
+        """
+        Args:
+            ttl: Seconds without touch() before a game is released
+            sweep_interval: Seconds between background sweeps
+        """
+        self.ttl = ttl if ttl is not None else config.GAME_STATE_TTL
+        self.sweep_interval = sweep_interval if sweep_interval is not None else config.GAME_SWEEP_INTERVAL
+        self._games: Dict[int, GameRecord] = {}
+        self._cleanups: List[Callable[[int], None]] = []
+        # gauge name -> callable returning one game ID per stored entry
+        self._sources: Dict[str, Callable[[], Iterable[int]]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.released_total = 0
+        self.expired_total = 0
+
+    def register_cleanup(self, cleanup: Callable[[int], None]):
+        """Register a callback that drops one game's state from a store"""
+        self._cleanups.append(cleanup)
+
+    def register_source(self, name: str, source: Callable[[], Iterable[int]]):
+        """Register a store to measure; source yields a game ID per entry"""
+        self._sources[name] = source
+
+    def track(self, game_id: int, chat_id: Optional[int] = None):
+        """Start tracking a game (idempotent)"""
+        record = self._games.get(game_id)
+        if record is None:
+            self._games[game_id] = GameRecord(game_id, chat_id)
+        else:
+            record.last_seen = time.monotonic()
+            if chat_id is not None:
+                record.chat_id = chat_id
+
+    def touch(self, game_id: int):
+        """Mark a tracked game as active so the sweeper keeps it
+
+        Unknown IDs are ignored: a late callback for a released game must
+        not bring its record back.
+        """
+        record = self._games.get(game_id)
+        if record is not None:
+            record.last_seen = time.monotonic()
+
+    def is_tracked(self, game_id: int) -> bool:
+        return game_id in self._games
+
+    def release(self, game_id: int):
+        """Drop a game's state from every registered store"""
+        self._games.pop(game_id, None)
+        for cleanup in self._cleanups:
+            try:
+                cleanup(game_id)
+            except Exception as e:
+                logger.error(f"Cleanup of game {game_id} failed in {cleanup}: {e}")
+        self.released_total += 1
+        logger.debug(f"Game {game_id} released from memory")
+
+    def sweep(self) -> List[int]:
+        """Release games idle for longer than the TTL
+
+        Games found in a store but not tracked (e.g. left behind by an
+        aborted code path) start tracking now and expire a TTL later.
+
+        Returns:
+            Released game IDs
+        """
+        for source in self._sources.values():
+            for game_id in set(source()):
+                if game_id not in self._games:
+                    self.track(game_id)
+
+        now = time.monotonic()
+        expired = [
+            game_id for game_id, record in self._games.items()
+            if now - record.last_seen > self.ttl
+        ]
+        for game_id in expired:
+            logger.warning(f"Game {game_id} idle for over {self.ttl}s, releasing its state")
+            self.release(game_id)
+        self.expired_total += len(expired)
+        return expired
+
+    def start(self):
+        """Start the periodic sweeper"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+            logger.info(f"Game registry sweeper started (ttl {self.ttl}s)")
+
+    async def stop(self):
+        """Stop the periodic sweeper"""
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+                logger.debug(f"Game registry gauges: {self.get_stats()}")
+            except Exception as e:
+                logger.error(f"Game registry sweep failed: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get size gauges: tracked games, entries per store, lifetime counters"""
+        stats = {'games': len(self._games)}
+        for name, source in self._sources.items():
+            stats[name] = sum(1 for _ in source())
+        stats['released_total'] = self.released_total
+        stats['expired_total'] = self.expired_total
+        return stats
+
+
+# Global game registry instance
+game_registry = GameRegistry()
@@ -0,0 +1,88 @@
+"""
+Bot Identity & Static Keyboards
+Bot username and prebuilt inline keyboards, created once at startup
+and shared by handlers instead of rebuilt per message
+"""
+import logging
+from typing import Optional
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from utils.constants import MBTI_TYPES, ZODIAC_SIGNS
+
+logger = logging.getLogger(__name__)
+
+
+class BotKeyboards:
+    """Cache of the bot's identity and keyboards that never change
+
+    InlineKeyboardMarkup objects are immutable, so one instance can be
+    attached to any number of messages. Keyboards with URLs need the
+    bot username and are built by init() in post_init.
+    """
+
+    def __init__(self):
+        self.bot_username: Optional[str] = None
+
+        self.lobby = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("✅ Join Game", callback_data="join_lobby"),
+                InlineKeyboardButton("❌ Quit Game", callback_data="quit_lobby")
+            ]
+        ])
+        self.new_game = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🎮 New Game", callback_data="start_newgame")]
+        ])
+        self.help_menu = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🎮 ဘယ်လို စတင်မလဲ?", callback_data="help_start")],
+            [InlineKeyboardButton("📜 Game Rules", callback_data="help_rules")],
+            [InlineKeyboardButton("🗳️ Voting System", callback_data="help_voting")],
+            [InlineKeyboardButton("👑 Roles & Characters", callback_data="help_roles")],
+            [InlineKeyboardButton("🏆 Scoring System", callback_data="help_scoring")],
+            [InlineKeyboardButton("⚙️ Commands", callback_data="help_commands")],
+            [InlineKeyboardButton("❓ FAQ", callback_data="help_faq")],
+        ])
+        self.back_to_help = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔙 Back to Help Menu", callback_data="show_help")]
+        ])
+
+        # /addcharacter pickers: MBTI 4x4 grid, zodiac 3x4 grid
+        self.mbti_picker = InlineKeyboardMarkup([
+            [InlineKeyboardButton(mbti, callback_data=f"mbti_{mbti}") for mbti in MBTI_TYPES[i:i+4]]
+            for i in range(0, len(MBTI_TYPES), 4)
+        ])
+        self.zodiac_picker = InlineKeyboardMarkup([
+            [InlineKeyboardButton(zodiac, callback_data=f"zodiac_{zodiac}") for zodiac in ZODIAC_SIGNS[i:i+3]]
+            for i in range(0, len(ZODIAC_SIGNS), 3)
+        ])
+
+        # Built by init() once the bot username is known
+        self.go_to_bot: Optional[InlineKeyboardMarkup] = None
+        self.add_to_group: Optional[InlineKeyboardMarkup] = None
+        self.add_bot_to_group: Optional[InlineKeyboardMarkup] = None
+
+    async def init(self, bot: Bot):
+        """Fetch the bot identity once and build the URL keyboards"""
+        me = await bot.get_me()
+        self.bot_username = me.username
+
+        bot_url = f"https://t.me/{self.bot_username}"
+        self.go_to_bot = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🤖 Go to Bot", url=bot_url)]
+        ])
+        self.add_to_group = InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Add to Group", url=f"{bot_url}?startgroup=true")],
+            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
+        ])
+        self.add_bot_to_group = InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Add Bot to Group", url=f"{bot_url}?startgroup=true")],
+            [InlineKeyboardButton("❓ Help", callback_data="show_help")]
+        ])
+        logger.info(f"Bot identity cached: @{self.bot_username}")
+
+    async def ensure(self, bot: Bot):
+        """Initialize on first use if post_init didn't run (scripts, tests)"""
+        if self.bot_username is None:
+            await self.init(bot)
+
+
+# Global keyboards instance
+bot_keyboards = BotKeyboards()
@@ -5,13 +5,19 @@ Supports parallel sending with rate limiting for scalability
 """
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List, Callable, Coroutine
+from collections import deque
+from typing import Optional, Dict, Any, List, Callable, Coroutine, Deque, Tuple
 from datetime import datetime
 from telegram import Bot, Message
-from telegram.error import TelegramError, TimedOut, NetworkError, RetryAfter
+from telegram.error import TelegramError, TimedOut, NetworkError, RetryAfter, Forbidden, BadRequest
+from utils.rate_limiter import PRIORITY_NORMAL
+from utils.outbox import outbox
 
 logger = logging.getLogger(__name__)
 
+# Failed messages kept in memory for inspection
+MAX_FAILED_MESSAGES = 500
+
 
 class MessageDelivery:
     """Handle reliable message delivery with retry logic and parallel sending"""
@@ -19,7 +25,8 @@ class MessageDelivery:
     def __init__(self):
         self.max_retries = 3
         self.retry_delays = [1, 2, 5]  # Fast retries (rate limiter handles pacing)
-        self.failed_messages: List[Dict[str, Any]] = []
+        # Recent failures for inspection (bounded; the outbox holds the durable copy)
+        self.failed_messages: Deque[Dict[str, Any]] = deque(maxlen=MAX_FAILED_MESSAGES)
         
         # Import rate limiter here to avoid circular imports
         from utils.rate_limiter import rate_limiter
@@ -30,6 +37,8 @@ class MessageDelivery:
         bot: Bot,
         chat_id: int,
         text: str,
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
         **kwargs
     ) -> Optional[Any]:
         """Send message with retry logic
@@ -38,6 +47,9 @@ class MessageDelivery:
             bot: Telegram Bot instance
             chat_id: Target chat ID
             text: Message text
+            priority: Rate limiter priority class
+            ttl: Seconds the outbox may keep retrying if this send fails
+                (defaults to the outbox's max_age)
             **kwargs: Additional parameters for send_message
             
         Returns:
@@ -45,11 +57,15 @@ class MessageDelivery:
         """
         for attempt in range(self.max_retries):
             try:
+                # Per-chat and global rate limits (RetryAfter pauses show up here)
+                await self.rate_limiter.acquire(chat_id, priority=priority)
+                
                 message = await bot.send_message(
                     chat_id=chat_id,
                     text=text,
                     **kwargs
                 )
+                self.rate_limiter.report_success(chat_id)
                 
                 if attempt > 0:
                     logger.info(f"Message delivered to {chat_id} after {attempt + 1} attempts")
@@ -57,10 +73,13 @@ class MessageDelivery:
                 return message
                 
             except RetryAfter as e:
-                # Rate limited - wait as told by Telegram
-                wait_time = e.retry_after + 1
-                logger.warning(f"Rate limited. Waiting {wait_time}s before retry")
-                await asyncio.sleep(wait_time)
+                # Rate limited - the limiter holds this chat back for retry_after
+                self.rate_limiter.report_retry_after(chat_id, e.retry_after)
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"Rate limited in {chat_id}. Retrying after {e.retry_after}s")
+                else:
+                    logger.error(f"All retries exhausted for {chat_id} (RetryAfter)")
+                    self._store_failed_message(chat_id, text, f"RetryAfter {e.retry_after}s", kwargs, ttl)
                 
             except TimedOut as e:
                 # Network timeout
@@ -73,7 +92,7 @@ class MessageDelivery:
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"All retries exhausted for {chat_id} (Timeout)")
-                    self._store_failed_message(chat_id, text, "Timeout", kwargs)
+                    self._store_failed_message(chat_id, text, "Timeout", kwargs, ttl)
                     
             except NetworkError as e:
                 # Network error
@@ -86,7 +105,7 @@ class MessageDelivery:
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"All retries exhausted for {chat_id} (NetworkError)")
-                    self._store_failed_message(chat_id, text, "NetworkError", kwargs)
+                    self._store_failed_message(chat_id, text, "NetworkError", kwargs, ttl)
                     
             except TelegramError as e:
                 # Other Telegram errors (Forbidden, BadRequest, etc.)
@@ -106,16 +125,64 @@ class MessageDelivery:
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"All retries exhausted for {chat_id}: {e}")
-                    self._store_failed_message(chat_id, text, str(e), kwargs)
+                    self._store_failed_message(chat_id, text, str(e), kwargs, ttl)
                     
             except Exception as e:
                 # Unexpected error
                 logger.error(f"Unexpected error sending to {chat_id}: {e}", exc_info=True)
-                self._store_failed_message(chat_id, text, f"Unexpected: {e}", kwargs)
+                self._store_failed_message(chat_id, text, f"Unexpected: {e}", kwargs, ttl)
                 break
         
         return None
     
+    async def edit_message_text(
+        self,
+        bot: Bot,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        priority: int = PRIORITY_NORMAL,
+        skip_if_throttled: bool = False,
+        **kwargs
+    ) -> Optional[Any]:
+        """Edit a message under the chat's rate limit
+        
+        Args:
+            bot: Telegram Bot instance
+            chat_id: Chat containing the message
+            message_id: Message to edit
+            text: New message text
+            priority: Rate limiter priority class
+            skip_if_throttled: Skip the edit instead of waiting when the
+                chat has no tokens (for periodic, best-effort updates)
+            **kwargs: Additional parameters for edit_message_text
+            
+        Returns:
+            Edited message, or None if skipped or rate limited.
+            Other Telegram errors are raised to the caller.
+        """
+        if skip_if_throttled:
+            if not self.rate_limiter.try_acquire(chat_id):
+                logger.debug(f"Chat {chat_id} throttled, skipping edit of {message_id}")
+                return None
+        else:
+            await self.rate_limiter.acquire(chat_id, priority=priority)
+        
+        try:
+            message = await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                **kwargs
+            )
+        except RetryAfter as e:
+            logger.warning(f"Edit rate limited in {chat_id}: retry after {e.retry_after}s")
+            self.rate_limiter.report_retry_after(chat_id, e.retry_after)
+            return None
+        
+        self.rate_limiter.report_success(chat_id)
+        return message
+    
     async def send_bulk_messages(
         self,
         bot: Bot,
@@ -176,27 +243,30 @@ class MessageDelivery:
         chat_id: int,
         text: str,
         error: str,
-        kwargs: Dict[str, Any]
+        kwargs: Dict[str, Any],
+        ttl: Optional[float] = None
     ):
-        """Store failed message for later retry or logging"""
+        """Record a failed message and hand it to the durable outbox for retry"""
         failed_msg = {
             'chat_id': chat_id,
             'text': text,
             'error': error,
             'kwargs': kwargs,
             'timestamp': datetime.now(),
-            'retry_count': self.max_retries
+            'retry_count': self.max_retries,
+            'ttl': ttl
         }
         
         self.failed_messages.append(failed_msg)
+        outbox.enqueue_nowait(chat_id, text, kwargs, error, ttl=ttl)
         logger.error(
             f"Failed message stored: chat_id={chat_id}, "
             f"error={error}, retry_count={self.max_retries}"
         )
     
     def get_failed_messages(self) -> List[Dict[str, Any]]:
-        """Get all failed messages"""
-        return self.failed_messages.copy()
+        """Get recent failed messages"""
+        return list(self.failed_messages)
     
     def clear_failed_messages(self):
         """Clear failed messages list"""
@@ -205,7 +275,9 @@ class MessageDelivery:
         logger.info(f"Cleared {count} failed messages")
     
     async def retry_failed_messages(self, bot: Bot) -> Dict[str, int]:
-        """Retry all failed messages
+        """Retry all recent failed messages now (concurrently, rate limited)
+        
+        Messages that fail again are recorded again by send_message_with_retry.
         
         Returns:
             Dict with 'sent', 'failed' counts
@@ -214,59 +286,55 @@ class MessageDelivery:
             logger.info("No failed messages to retry")
             return {'sent': 0, 'failed': 0}
         
-        logger.info(f"Retrying {len(self.failed_messages)} failed messages...")
-        
-        sent_count = 0
-        still_failed = []
+        pending = list(self.failed_messages)
+        self.failed_messages.clear()
+        logger.info(f"Retrying {len(pending)} failed messages...")
         
-        for msg in self.failed_messages:
-            result = await self.send_message_with_retry(
+        results = await asyncio.gather(*(
+            self.send_message_with_retry(
                 bot,
                 msg['chat_id'],
                 msg['text'],
+                ttl=msg.get('ttl'),
                 **msg['kwargs']
             )
-            
-            if result:
-                sent_count += 1
-            else:
-                still_failed.append(msg)
+            for msg in pending
+        ))
         
-        # Update failed messages list
-        self.failed_messages = still_failed
+        sent_count = sum(1 for result in results if result)
+        failed_count = len(pending) - sent_count
         
         logger.info(
-            f"Retry complete: {sent_count} sent, {len(still_failed)} still failed"
+            f"Retry complete: {sent_count} sent, {failed_count} still failed"
         )
         
-        return {'sent': sent_count, 'failed': len(still_failed)}
+        return {'sent': sent_count, 'failed': failed_count}
     
-    async def send_parallel(
+    async def send_parallel_detailed(
         self,
         bot: Bot,
         recipients: List[Dict[str, Any]],
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
         **common_kwargs
-    ) -> Dict[int, Optional[Message]]:
-        """Send messages to multiple recipients in parallel with rate limiting
+    ) -> List[Tuple[Optional[Message], Optional[str]]]:
+        """Send messages to multiple recipients in parallel, reporting why sends failed
         
-        This is the SCALABLE method used for 100s or 1000s of users.
-        Uses token bucket rate limiter to send fast while staying within limits.
+        Same pipeline as send_parallel (token bucket pacing, retries), but each
+        result carries an error category so callers can build delivery reports.
         
         Args:
             bot: Telegram Bot instance
             recipients: List of dicts with 'chat_id', 'text', and optional kwargs
+            priority: Rate limiter priority class for the whole batch
+            ttl: Seconds the outbox may keep retrying failed sends
             **common_kwargs: Common parameters for all messages
             
         Returns:
-            Dict mapping chat_id to Message (or None if failed)
-            
-        Example:
-            recipients = [
-                {'chat_id': 123, 'text': 'Hello User 1'},
-                {'chat_id': 456, 'text': 'Hello User 2'},
-                ...
-            ]
-            results = await send_parallel(bot, recipients, parse_mode='Markdown')
+            List of (Message or None, error category or None), one per
+            recipient in input order, so a chat listed twice keeps both results.
+            Categories: 'forbidden' (user hasn't started the bot), 'blocked',
+            'bad_request', 'timeout', 'network', 'rate_limited', 'other'
         """
         logger.info(f"Parallel send starting: {len(recipients)} recipients")
         
@@ -277,79 +345,89 @@ class MessageDelivery:
             
             if not text:
                 logger.warning(f"No text for recipient {chat_id}, skipping")
-                return (chat_id, None)
+                return (None, 'other')
             
             # Merge recipient-specific kwargs with common kwargs
             kwargs = {**common_kwargs, **recipient.get('kwargs', {})}
             
-            # Acquire rate limit token
-            await self.rate_limiter.acquire()
+            error_type = 'other'
             
             # Send with retry logic
             for attempt in range(self.max_retries):
                 try:
+                    # Acquire per-chat and global rate limit tokens
+                    await self.rate_limiter.acquire(chat_id, priority=priority)
+                    
                     message = await bot.send_message(
                         chat_id=chat_id,
                         text=text,
                         **kwargs
                     )
+                    self.rate_limiter.report_success(chat_id)
                     
                     if attempt > 0:
                         logger.debug(f"Delivered to {chat_id} after {attempt + 1} attempts")
                     
-                    return (chat_id, message)
+                    return (message, None)
                     
                 except RetryAfter as e:
-                    # Rate limited - wait and retry
-                    wait_time = e.retry_after + 0.5
-                    logger.warning(f"RetryAfter for {chat_id}: waiting {wait_time}s")
-                    await asyncio.sleep(wait_time)
+                    # Rate limited - the limiter holds this chat back before the retry
+                    self.rate_limiter.report_retry_after(chat_id, e.retry_after)
+                    error_type = 'rate_limited'
+                    if attempt < self.max_retries - 1:
+                        logger.warning(f"RetryAfter for {chat_id}: retrying after {e.retry_after}s")
+                    else:
+                        logger.warning(f"Still rate limited in {chat_id} after all retries")
+                        self._store_failed_message(chat_id, text, f"RetryAfter {e.retry_after}s", kwargs, ttl)
+                        return (None, error_type)
                     
                 except (TimedOut, NetworkError) as e:
                     # Transient errors - retry with backoff
+                    error_type = 'timeout' if isinstance(e, TimedOut) else 'network'
                     if attempt < self.max_retries - 1:
                         wait_time = self.retry_delays[attempt]
                         logger.debug(f"Retry {chat_id} in {wait_time}s: {type(e).__name__}")
                         await asyncio.sleep(wait_time)
                     else:
                         logger.warning(f"Failed to send to {chat_id} after all retries: {e}")
-                        self._store_failed_message(chat_id, text, str(e), kwargs)
-                        return (chat_id, None)
+                        self._store_failed_message(chat_id, text, str(e), kwargs, ttl)
+                        return (None, error_type)
                         
                 except TelegramError as e:
                     # Other errors (Forbidden, BadRequest, etc.)
                     error_msg = str(e).lower()
                     
-                    if "blocked" in error_msg or "forbidden" in error_msg:
+                    if "blocked" in error_msg:
                         logger.debug(f"User {chat_id} blocked bot")
-                        return (chat_id, None)
+                        return (None, 'blocked')
+                    if isinstance(e, Forbidden) or "forbidden" in error_msg:
+                        logger.debug(f"User {chat_id} hasn't started the bot")
+                        return (None, 'forbidden')
                     
+                    error_type = 'bad_request' if isinstance(e, BadRequest) else 'other'
                     if attempt < self.max_retries - 1:
                         wait_time = self.retry_delays[attempt]
                         logger.debug(f"TelegramError for {chat_id}, retry in {wait_time}s")
                         await asyncio.sleep(wait_time)
                     else:
                         logger.warning(f"Failed {chat_id}: {e}")
-                        self._store_failed_message(chat_id, text, str(e), kwargs)
-                        return (chat_id, None)
+                        self._store_failed_message(chat_id, text, str(e), kwargs, ttl)
+                        return (None, error_type)
                         
                 except Exception as e:
                     logger.error(f"Unexpected error sending to {chat_id}: {e}", exc_info=True)
-                    self._store_failed_message(chat_id, text, f"Unexpected: {e}", kwargs)
-                    return (chat_id, None)
+                    self._store_failed_message(chat_id, text, f"Unexpected: {e}", kwargs, ttl)
+                    return (None, 'other')
             
-            return (chat_id, None)
+            return (None, error_type)
         
         # Send all messages in parallel
         tasks = [send_one(recipient) for recipient in recipients]
         results = await asyncio.gather(*tasks, return_exceptions=False)
         
-        # Convert to dict
-        results_dict = dict(results)
-        
         # Log summary
-        success_count = sum(1 for msg in results_dict.values() if msg is not None)
-        failed_count = len(results_dict) - success_count
+        success_count = sum(1 for msg, _ in results if msg is not None)
+        failed_count = len(results) - success_count
         
         logger.info(
             f"Parallel send complete: {success_count}/{len(recipients)} delivered, "
@@ -363,9 +441,48 @@ class MessageDelivery:
             f"({status['percentage']:.1f}%)"
         )
         
-        return results_dict
+        return results
+    
+    async def send_parallel(
+        self,
+        bot: Bot,
+        recipients: List[Dict[str, Any]],
+        priority: int = PRIORITY_NORMAL,
+        ttl: Optional[float] = None,
+        **common_kwargs
+    ) -> Dict[int, Optional[Message]]:
+        """Send messages to multiple recipients in parallel with rate limiting
+        
+        This is the SCALABLE method used for 100s or 1000s of users.
+        Uses token bucket rate limiter to send fast while staying within limits.
+        
+        Args:
+            bot: Telegram Bot instance
+            recipients: List of dicts with 'chat_id', 'text', and optional kwargs
+            priority: Rate limiter priority class (PRIORITY_BALLOT goes first)
+            ttl: Seconds the outbox may keep retrying failed sends (e.g. the
+                time left in a round for ballots)
+            **common_kwargs: Common parameters for all messages
+            
+        Returns:
+            Dict mapping chat_id to Message (or None if failed). A chat listed
+            more than once keeps its last result; use send_parallel_detailed
+            for one result per recipient.
+            
+        Example:
+            recipients = [
+                {'chat_id': 123, 'text': 'Hello User 1'},
+                {'chat_id': 456, 'text': 'Hello User 2'},
+                ...
+            ]
+            results = await send_parallel(bot, recipients, parse_mode='Markdown')
+        """
+        results = await self.send_parallel_detailed(bot, recipients, priority, ttl, **common_kwargs)
+        return {
+            recipient['chat_id']: message
+            for recipient, (message, _) in zip(recipients, results)
+        }
 
 
 # Global message delivery instance
 message_delivery = MessageDelivery()
-
@@ -0,0 +1,95 @@
+"""
+Muted Chats Registry
+In-memory index of group chats where player messages are deleted
+(open lobby or running game), plus batched message deletion
+"""
+import asyncio
+import logging
+from typing import Dict, List, Set
+from telegram import Bot
+from telegram.error import BadRequest
+
+logger = logging.getLogger(__name__)
+
+# Telegram accepts at most 100 message IDs per deleteMessages call
+MAX_DELETE_BATCH = 100
+
+
+class MutedChats:
+    """Tracks why each chat is muted and batches message deletions
+
+    Lobby and game lifecycle code calls mute()/unmute() with a reason
+    ('lobby', 'game:<id>'); a chat stays muted while any reason remains,
+    so the group message filter is a dict lookup with no I/O.
+    """
+
+    def __init__(self, flush_delay: float = 0.5):
+        """
+        Args:
+            flush_delay: Seconds to gather messages before one deleteMessages call
+        """
+        self.flush_delay = flush_delay
+        # chat_id -> reasons the chat is muted
+        self._reasons: Dict[int, Set[str]] = {}
+        # chat_id -> message IDs waiting to be deleted
+        self._pending: Dict[int, List[int]] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+
+    def mute(self, chat_id: int, reason: str):
+        """Mute a chat for the given reason"""
+        reasons = self._reasons.setdefault(chat_id, set())
+        if reason not in reasons:
+            reasons.add(reason)
+            logger.debug(f"Chat {chat_id} muted ({reason})")
+
+    def unmute(self, chat_id: int, reason: str):
+        """Remove one reason; the chat is unmuted once none remain"""
+        reasons = self._reasons.get(chat_id)
+        if not reasons or reason not in reasons:
+            return
+        reasons.discard(reason)
+        if not reasons:
+            del self._reasons[chat_id]
+            logger.debug(f"Chat {chat_id} unmuted")
+
+    def is_muted(self, chat_id: int) -> bool:
+        """Check whether player messages in a chat should be deleted"""
+        return chat_id in self._reasons
+
+    def queue_delete(self, bot: Bot, chat_id: int, message_id: int):
+        """Queue a message for deletion; queued IDs go out in one batch per chat"""
+        pending = self._pending.setdefault(chat_id, [])
+        pending.append(message_id)
+
+        if len(pending) >= MAX_DELETE_BATCH:
+            self._pending[chat_id] = []
+            asyncio.create_task(self._delete_batch(bot, chat_id, pending))
+        elif chat_id not in self._flush_tasks:
+            self._flush_tasks[chat_id] = asyncio.create_task(self._delayed_flush(bot, chat_id))
+
+    async def _delayed_flush(self, bot: Bot, chat_id: int):
+        try:
+            await asyncio.sleep(self.flush_delay)
+        finally:
+            self._flush_tasks.pop(chat_id, None)
+        message_ids = self._pending.pop(chat_id, [])
+        if message_ids:
+            await self._delete_batch(bot, chat_id, message_ids)
+
+    async def _delete_batch(self, bot: Bot, chat_id: int, message_ids: List[int]):
+        """Delete up to MAX_DELETE_BATCH messages with one API call"""
+        try:
+            await bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+            logger.debug(f"Deleted {len(message_ids)} message(s) in chat {chat_id} (game/lobby active)")
+        except BadRequest as e:
+            # Bot doesn't have delete permissions or messages are too old
+            if "can't be deleted" in str(e).lower():
+                logger.debug(f"Cannot delete messages in chat {chat_id} (missing permissions)")
+            else:
+                logger.warning(f"Failed to delete messages in chat {chat_id}: {e}")
+        except Exception as e:
+            logger.warning(f"Failed to delete messages in chat {chat_id}: {e}")
+
+
+# Global muted chats registry
+muted_chats = MutedChats()
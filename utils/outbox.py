@@ -0,0 +1,430 @@
+"""
+Durable Outbox
+Failed sends are written to a Postgres table and retried by background
+workers, so they survive restarts and redeploys
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, RetryAfter
+from database.db_manager import db_manager
+from utils.rate_limiter import rate_limiter, PRIORITY_NORMAL
+import config
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Postgres-backed retry queue for outgoing messages
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and a short lease, so any
+    number of workers (or bot processes) can drain the table without sending
+    a message twice; a worker that dies mid-send just lets its lease expire.
+    Retries back off exponentially with jitter and rows that keep failing
+    (or can never succeed) are dead-lettered instead of retried forever.
+    """
+
+    def __init__(self, workers: int = None, max_attempts: int = None,
+                 batch_size: int = 20, base_delay: float = 2.0,
+                 max_delay: float = 300.0, max_age: float = None,
+                 poll_interval: float = 5.0, lease: int = 60,
+                 memory_limit: int = 1000):
+        """
+        Args:
+            workers: Number of background drain tasks
+            max_attempts: Attempts before a message is dead-lettered
+            batch_size: Rows claimed per worker iteration
+            base_delay: First retry delay in seconds (doubles per attempt)
+            max_delay: Upper bound for the retry delay
+            max_age: Default seconds a message stays deliverable; senders with
+                their own deadline (e.g. round ballots) pass a ttl instead
+            poll_interval: Seconds an idle worker waits before polling again
+            lease: Seconds a claimed row stays invisible to other workers
+            memory_limit: Messages buffered in memory while the database is down
+        """
+        self.workers = workers if workers is not None else config.OUTBOX_WORKERS
+        self.max_attempts = max_attempts if max_attempts is not None else config.OUTBOX_MAX_ATTEMPTS
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_age = max_age if max_age is not None else config.OUTBOX_MAX_AGE
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+        # Messages that couldn't be written yet (bounded; oldest dropped)
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=memory_limit)
+        self._tasks: List[asyncio.Task] = []
+        self._pending_writes: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._bot: Optional[Bot] = None
+
+    @staticmethod
+    def make_key(chat_id: int, text: str, encoded_kwargs: str) -> str:
+        """Build the dedup key for a message (same chat + content = same send)"""
+        digest = hashlib.sha256()
+        for part in (str(chat_id), text, encoded_kwargs):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def backoff_delay(self, attempts: int) -> float:
+        """Exponential backoff with equal jitter for the given attempt count"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    @staticmethod
+    def _encode_kwargs(kwargs: Dict[str, Any]) -> str:
+        """Serialize send_message kwargs (keyboards become plain dicts)"""
+        encoded = {}
+        for key, value in kwargs.items():
+            if key == 'reply_markup' and hasattr(value, 'to_dict'):
+                value = value.to_dict()
+            encoded[key] = value
+        return json.dumps(encoded, sort_keys=True, default=str)
+
+    @staticmethod
+    def _decode_kwargs(data: str, bot: Bot) -> Dict[str, Any]:
+        kwargs = json.loads(data) if data else {}
+        if isinstance(kwargs.get('reply_markup'), dict):
+            kwargs['reply_markup'] = InlineKeyboardMarkup.de_json(kwargs['reply_markup'], bot)
+        return kwargs
+
+    async def init_outbox_table(self):
+        """Create the message_outbox table"""
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS message_outbox (
+                    id BIGSERIAL PRIMARY KEY,
+                    dedup_key TEXT NOT NULL,
+                    chat_id BIGINT NOT NULL,
+                    text TEXT NOT NULL,
+                    kwargs JSONB,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            await conn.execute('''
+                ALTER TABLE message_outbox ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP
+            ''')
+            # Only one pending copy per message; dead rows don't block a resend
+            await conn.execute('''
+                ALTER TABLE message_outbox DROP CONSTRAINT IF EXISTS message_outbox_dedup_key_key
+            ''')
+            await conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_message_outbox_pending_key
+                ON message_outbox(dedup_key) WHERE status = 'pending'
+            ''')
+            await conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_message_outbox_due
+                ON message_outbox(status, next_attempt_at)
+            ''')
+        logger.info("Message outbox table initialized")
+
+    # ==================== Enqueue ====================
+
+    def _make_entry(self, chat_id: int, text: str, kwargs: Optional[Dict[str, Any]],
+                    error: Optional[str], dedup_key: str = None,
+                    ttl: float = None) -> Dict[str, Any]:
+        encoded = self._encode_kwargs(kwargs or {})
+        return {
+            'dedup_key': dedup_key or self.make_key(chat_id, text, encoded),
+            'chat_id': chat_id,
+            'text': text,
+            'kwargs': encoded,
+            'error': error,
+            # Absolute deadline, so time spent in the memory buffer counts
+            'deadline': time.time() + (ttl if ttl is not None else self.max_age),
+        }
+
+    async def enqueue(self, chat_id: int, text: str, kwargs: Dict[str, Any] = None,
+                      error: str = None, dedup_key: str = None, ttl: float = None) -> bool:
+        """Persist a message for background delivery
+
+        Args:
+            chat_id: Target chat ID
+            text: Message text
+            kwargs: send_message keyword arguments
+            error: Error from the failed attempt that led here
+            dedup_key: Key that identifies duplicates (defaults to a content hash)
+            ttl: Seconds the message stays deliverable (defaults to max_age)
+
+        Returns:
+            True if stored in the database, False if buffered in memory
+        """
+        entry = self._make_entry(chat_id, text, kwargs, error, dedup_key, ttl)
+
+        if not db_manager.pool:
+            self._buffer.append(entry)
+            return False
+
+        try:
+            await self._write([entry])
+        except Exception as e:
+            logger.warning(f"Outbox write failed, buffering message for {chat_id}: {e}")
+            self._buffer.append(entry)
+            return False
+
+        self._wakeup.set()
+        return True
+
+    def enqueue_nowait(self, chat_id: int, text: str, kwargs: Dict[str, Any] = None,
+                       error: str = None, ttl: float = None):
+        """Schedule enqueue() from synchronous code"""
+        try:
+            task = asyncio.get_running_loop().create_task(
+                self.enqueue(chat_id, text, kwargs, error, ttl=ttl)
+            )
+        except RuntimeError:
+            # No event loop (e.g. called from a plain script) - buffer only
+            self._buffer.append(self._make_entry(chat_id, text, kwargs, error, ttl=ttl))
+            return
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def _write(self, entries: List[Dict[str, Any]]):
+        """Insert entries in one statement
+
+        An entry whose dedup key matches a pending row is ignored; a key that
+        only matches dead-lettered rows is inserted as a new pending row.
+        """
+        first_delay = self.backoff_delay(1)
+        now = time.time()
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO message_outbox
+                    (dedup_key, chat_id, text, kwargs, last_error, next_attempt_at, expires_at)
+                SELECT t.dedup_key, t.chat_id, t.text, t.kwargs::jsonb, t.last_error,
+                       NOW() + make_interval(secs => $6),
+                       NOW() + make_interval(secs => t.ttl)
+                FROM UNNEST($1::text[], $2::bigint[], $3::text[], $4::text[], $5::text[], $7::float8[])
+                    AS t(dedup_key, chat_id, text, kwargs, last_error, ttl)
+                ON CONFLICT (dedup_key) WHERE status = 'pending' DO NOTHING
+            ''',
+                [e['dedup_key'] for e in entries],
+                [e['chat_id'] for e in entries],
+                [e['text'] for e in entries],
+                [e['kwargs'] for e in entries],
+                [e['error'] for e in entries],
+                first_delay,
+                [max(0.0, e['deadline'] - now) for e in entries]
+            )
+
+    async def _flush_buffer(self):
+        """Move messages buffered while the database was unavailable into the table"""
+        if not self._buffer or not db_manager.pool or self._flush_lock.locked():
+            return
+        async with self._flush_lock:
+            entries = list(self._buffer)
+            try:
+                await self._write(entries)
+            except Exception as e:
+                logger.warning(f"Outbox buffer flush failed ({len(entries)} messages kept): {e}")
+                return
+            for _ in entries:
+                self._buffer.popleft()
+            logger.info(f"Outbox buffer flushed: {len(entries)} messages")
+
+    # ==================== Workers ====================
+
+    def start(self, bot: Bot):
+        """Start the background drain workers"""
+        if self._tasks:
+            return
+        self._bot = bot
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Outbox started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers and persist anything still buffered"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        await self._flush_buffer()
+
+    async def _worker(self, worker_id: int):
+        """Claim due rows and deliver them until cancelled"""
+        while True:
+            try:
+                await self._flush_buffer()
+                rows = await self._claim()
+                if rows:
+                    await asyncio.gather(*(self._deliver(row) for row in rows))
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {worker_id} error: {e}")
+
+            # Nothing due - sleep until polled again or a new message arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[Any]:
+        """Lease a batch of due rows to this worker"""
+        async with db_manager.pool.acquire() as conn:
+            return await conn.fetch('''
+                UPDATE message_outbox
+                SET next_attempt_at = NOW() + make_interval(secs => $2),
+                    attempts = attempts + 1,
+                    updated_at = NOW()
+                WHERE id IN (
+                    SELECT id FROM message_outbox
+                    WHERE status = 'pending' AND next_attempt_at <= NOW()
+                    ORDER BY next_attempt_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, chat_id, text, kwargs, attempts,
+                          COALESCE(expires_at, created_at + make_interval(secs => $3)) <= NOW() AS expired
+            ''', self.batch_size, self.lease, self.max_age)
+
+    async def _deliver(self, row):
+        """Send one claimed row and record the outcome"""
+        chat_id = row['chat_id']
+
+        if row['expired']:
+            await self._dead_letter(row['id'], "Expired before delivery")
+            return
+
+        await rate_limiter.acquire(chat_id, priority=PRIORITY_NORMAL)
+        # A RetryAfter backoff can hold us in the limiter past the lease;
+        # only send if no other worker has re-claimed the row meanwhile
+        lease = await self._renew_lease(row)
+        if lease is None:
+            logger.debug(f"Outbox message {row['id']} re-claimed while rate limited, skipping")
+            return
+        if lease['expired']:
+            await self._dead_letter(row['id'], "Expired before delivery")
+            return
+
+        try:
+            await self._bot.send_message(
+                chat_id=chat_id,
+                text=row['text'],
+                **self._decode_kwargs(row['kwargs'], self._bot)
+            )
+        except RetryAfter as e:
+            rate_limiter.report_retry_after(chat_id, e.retry_after)
+            await self._reschedule(row['id'], e.retry_after, f"RetryAfter {e.retry_after}s")
+            return
+        except (Forbidden, BadRequest) as e:
+            # Blocked bot, deleted chat, malformed message: retrying can't help
+            await self._dead_letter(row['id'], str(e))
+            return
+        except Exception as e:
+            if row['attempts'] >= self.max_attempts:
+                await self._dead_letter(row['id'], str(e))
+            else:
+                await self._reschedule(row['id'], self.backoff_delay(row['attempts']), str(e))
+            return
+
+        rate_limiter.report_success(chat_id)
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('DELETE FROM message_outbox WHERE id = $1', row['id'])
+        logger.info(f"Outbox delivered message {row['id']} to {chat_id} (attempt {row['attempts']})")
+
+    async def _renew_lease(self, row) -> Optional[Any]:
+        """Extend a claimed row's lease if this claim still holds it
+
+        The claim's attempt count acts as a fencing token: a re-claim by
+        another worker bumps it, so the update matches nothing.
+
+        Returns:
+            Row with an 'expired' flag, or None if the row was re-claimed or removed
+        """
+        async with db_manager.pool.acquire() as conn:
+            return await conn.fetchrow('''
+                UPDATE message_outbox
+                SET next_attempt_at = NOW() + make_interval(secs => $3),
+                    updated_at = NOW()
+                WHERE id = $1 AND attempts = $2 AND status = 'pending'
+                RETURNING COALESCE(expires_at, created_at + make_interval(secs => $4)) <= NOW() AS expired
+            ''', row['id'], row['attempts'], self.lease, self.max_age)
+
+    async def _reschedule(self, row_id: int, delay: float, error: str):
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE message_outbox
+                SET next_attempt_at = NOW() + make_interval(secs => $2),
+                    last_error = $3, updated_at = NOW()
+                WHERE id = $1
+            ''', row_id, delay, error)
+        logger.debug(f"Outbox message {row_id} retry in {delay:.1f}s: {error}")
+
+    async def _dead_letter(self, row_id: int, error: str):
+        async with db_manager.pool.acquire() as conn:
+            await conn.execute('''
+                UPDATE message_outbox
+                SET status = 'dead', last_error = $2, updated_at = NOW()
+                WHERE id = $1
+            ''', row_id, error)
+        logger.warning(f"Outbox message {row_id} dead-lettered: {error}")
+
+    # ==================== Maintenance ====================
+
+    async def requeue_dead(self) -> int:
+        """Give every dead-lettered message another round of attempts
+
+        Messages already pending again (re-sent since they died) are skipped,
+        and only the newest dead copy of a message is requeued.
+
+        Returns:
+            Number of messages requeued
+        """
+        async with db_manager.pool.acquire() as conn:
+            result = await conn.execute('''
+                UPDATE message_outbox
+                SET status = 'pending', attempts = 0, created_at = NOW(),
+                    expires_at = NOW() + make_interval(secs => $1),
+                    next_attempt_at = NOW(), updated_at = NOW()
+                WHERE id IN (
+                    SELECT DISTINCT ON (dedup_key) id FROM message_outbox AS dead
+                    WHERE status = 'dead' AND NOT EXISTS (
+                        SELECT 1 FROM message_outbox AS pending
+                        WHERE pending.status = 'pending' AND pending.dedup_key = dead.dedup_key
+                    )
+                    ORDER BY dedup_key, id DESC
+                )
+            ''', self.max_age)
+        count = int(result.split()[-1])
+        if count:
+            self._wakeup.set()
+        logger.info(f"Requeued {count} dead-lettered messages")
+        return count
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Get message counts per status plus the in-memory buffer size"""
+        stats = {'pending': 0, 'dead': 0, 'buffered': len(self._buffer)}
+        if db_manager.pool:
+            async with db_manager.pool.acquire() as conn:
+                rows = await conn.fetch(
+                    'SELECT status, COUNT(*) AS count FROM message_outbox GROUP BY status'
+                )
+            for row in rows:
+                stats[row['status']] = row['count']
+        return stats
+
+
+# Global outbox instance
+outbox = Outbox()
@@ -5,10 +5,34 @@ Allows burst sending while maintaining safe long-term rate
 import time
 import asyncio
 import logging
-from typing import Optional
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import config
 
 logger = logging.getLogger(__name__)
 
+# Priority classes (lower value is served first)
+PRIORITY_BALLOT = 0        # Voting ballots, round-critical messages
+PRIORITY_NORMAL = 1        # Default for everything else
+PRIORITY_NOTIFICATION = 2  # Vote notifications
+PRIORITY_CHAT = 3          # Team chat relay
+
+PRIORITY_NAMES = {
+    PRIORITY_BALLOT: 'ballot',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_NOTIFICATION: 'notification',
+    PRIORITY_CHAT: 'chat',
+}
+
+# Upper bounds (seconds) of the wait-time histogram buckets; last bucket is open
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Adaptive rate: halve on RetryAfter (never below MIN_RATE_FACTOR of the
+# configured rate), win back RECOVERY_STEP of it per successful send
+MIN_RATE_FACTOR = 0.25
+RECOVERY_STEP = 0.1
+
 
 class TokenBucketRateLimiter:
     """
@@ -16,79 +40,304 @@ class TokenBucketRateLimiter:
     
     Telegram limits: ~30 msg/s official, but ~20 msg/s safe in practice
     We use conservative 15 msg/s to avoid any issues
+    
+    Callers that can't be served immediately join a FIFO queue per priority
+    class. A single dispatcher task refills the bucket on a monotonic clock
+    and hands tokens to the head waiters, so nobody sleeps while holding a
+    lock and throughput stays at ``rate`` regardless of how many wait.
     """
     
     def __init__(
-        self, 
+        self,
         rate: float = 15.0,  # messages per second
         capacity: float = 20.0  # bucket capacity (allows small bursts)
     ):
         self.rate = rate  # tokens added per second
+        self.base_rate = rate  # configured rate that adaptive backoff recovers to
         self.capacity = capacity  # max tokens in bucket
         self.tokens = capacity  # current tokens
-        self.last_update = time.time()
-        self.lock = asyncio.Lock()
-        
+        self.last_update = time.monotonic()
+    
+        # priority -> FIFO of (tokens, future, enqueued_at)
+        self._waiters: Dict[int, Deque[Tuple[int, asyncio.Future, float]]] = {
+            priority: deque() for priority in PRIORITY_NAMES
+        }
+        self._dispatcher: Optional[asyncio.Task] = None
+    
+        # priority -> counts per WAIT_BUCKETS bucket (+1 open bucket)
+        self._wait_histogram: Dict[int, List[int]] = {
+            priority: [0] * (len(WAIT_BUCKETS) + 1) for priority in PRIORITY_NAMES
+        }
+    
         logger.info(
             f"Rate limiter initialized: {rate} msg/s, "
             f"burst capacity: {capacity} messages"
         )
     
-    async def acquire(self, tokens: int = 1) -> bool:
+    def _refill(self):
+        """Add tokens for the time passed since the last refill"""
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.tokens = min(
+            self.capacity,
+            self.tokens + elapsed * self.rate
+        )
+        self.last_update = now
+    
+    def _record_wait(self, priority: int, waited: float):
+        """Count one acquire in the wait-time histogram"""
+        self._wait_histogram[priority][bisect_left(WAIT_BUCKETS, waited)] += 1
+    
+    def _waiting_count(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+    
+    def _next_waiter(self) -> Optional[Tuple[int, Deque[Tuple[int, asyncio.Future, float]]]]:
+        """Get the head of the highest-priority queue, dropping cancelled waiters"""
+        for priority in sorted(self._waiters):
+            queue = self._waiters[priority]
+            while queue and queue[0][1].done():
+                queue.popleft()
+            if queue:
+                return priority, queue
+        return None
+    
+    async def acquire(self, tokens: int = 1, priority: int = PRIORITY_NORMAL) -> bool:
         """
         Acquire tokens to send messages
-        
+    
         Args:
             tokens: Number of tokens needed (usually 1 per message)
-            
+            priority: Priority class (PRIORITY_BALLOT is served first)
+    
         Returns:
             True when tokens acquired (after waiting if needed)
         """
-        async with self.lock:
+        if priority not in self._waiters:
+            priority = PRIORITY_NORMAL
+    
+        # Fast path: nobody queued and enough tokens
+        self._refill()
+        if self.tokens >= tokens and not self._waiting_count():
+            self.tokens -= tokens
+            self._record_wait(priority, 0.0)
+            return True
+    
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append((tokens, future, time.monotonic()))
+    
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+    
+        await future
+        return True
+    
+    async def _dispatch(self):
+        """Hand out tokens to queued waiters, sleeping until the next token is due"""
+        while True:
+            self._refill()
+    
+            # Serve as many head waiters as the bucket allows
             while True:
-                # Refill tokens based on time passed
-                now = time.time()
-                elapsed = now - self.last_update
-                self.tokens = min(
-                    self.capacity,
-                    self.tokens + elapsed * self.rate
-                )
-                self.last_update = now
-                
-                # Check if we have enough tokens
-                if self.tokens >= tokens:
-                    self.tokens -= tokens
-                    return True
-                
-                # Calculate wait time needed
-                tokens_needed = tokens - self.tokens
-                wait_time = tokens_needed / self.rate
-                
-                logger.debug(
-                    f"Rate limit: waiting {wait_time:.2f}s "
-                    f"(have {self.tokens:.1f}, need {tokens})"
-                )
-                
-                # Wait outside the lock to allow other tasks
-                await asyncio.sleep(wait_time)
+                head = self._next_waiter()
+                if head is None:
+                    return
+                priority, queue = head
+                needed, future, enqueued_at = queue[0]
+                if self.tokens < needed:
+                    break
+                queue.popleft()
+                self.tokens -= needed
+                self._record_wait(priority, time.monotonic() - enqueued_at)
+                future.set_result(True)
+    
+            wait_time = (needed - self.tokens) / self.rate
+            logger.debug(
+                f"Rate limit: waiting {wait_time:.3f}s "
+                f"(have {self.tokens:.1f}, {self._waiting_count()} queued)"
+            )
+            await asyncio.sleep(wait_time)
+    
+    def backoff(self, retry_after: float = 0, factor: float = 0.5):
+        """Slow down after Telegram answered RetryAfter
+        
+        Args:
+            retry_after: Seconds Telegram asked us to wait; no token is
+                handed out before then
+            factor: Multiplier applied to the current rate
+        """
+        self._refill()
+        self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate * factor)
+        if retry_after > 0:
+            self.tokens = min(self.tokens, 0) - retry_after * self.rate
+        logger.warning(
+            f"Rate limiter backing off: {self.rate:.2f} msg/s"
+            + (f", paused {retry_after}s" if retry_after > 0 else "")
+        )
+    
+    def recover(self):
+        """Step the rate back toward the configured rate after a success"""
+        if self.rate < self.base_rate:
+            self._refill()
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+    
+    def is_idle(self) -> bool:
+        """Check whether the bucket is full, unpenalized and nobody waits on it"""
+        self._refill()
+        return (self.tokens >= self.capacity and self.rate >= self.base_rate
+                and not self._waiting_count())
+    
+    def get_wait_histogram(self) -> Dict[str, Dict[str, int]]:
+        """Get acquire wait times per priority class
+    
+        Returns:
+            Dict mapping priority name to {bucket label: count}, where the
+            label is the bucket's upper bound ('<=0.1s') or '>10.0s'
+        """
+        labels = [f"<={bound}s" for bound in WAIT_BUCKETS] + [f">{WAIT_BUCKETS[-1]}s"]
+        return {
+            PRIORITY_NAMES[priority]: dict(zip(labels, counts))
+            for priority, counts in self._wait_histogram.items()
+        }
     
     def get_status(self) -> dict:
         """Get current rate limiter status"""
-        now = time.time()
+        now = time.monotonic()
         elapsed = now - self.last_update
         current_tokens = min(
             self.capacity,
             self.tokens + elapsed * self.rate
         )
-        
+    
         return {
             'tokens': current_tokens,
             'capacity': self.capacity,
             'rate': self.rate,
-            'percentage': (current_tokens / self.capacity) * 100
+            'percentage': (current_tokens / self.capacity) * 100,
+            'waiting': self._waiting_count()
         }
 
 
-# Global rate limiter instance
-rate_limiter = TokenBucketRateLimiter(rate=15.0, capacity=20.0)
+class HierarchicalRateLimiter:
+    """
+    Global bucket plus one bucket per chat, matching Telegram's limits
+    
+    A send first waits for its chat's bucket (private chats and groups have
+    different rates), then for the global bucket, so a throttled chat never
+    holds a global token. Chat buckets are created on first use and evicted
+    once idle. RetryAfter answers are fed back through report_retry_after()
+    to pause and slow the offending chat.
+    """
+    
+    def __init__(
+        self,
+        global_rate: float = 25.0,
+        global_capacity: float = 30.0,
+        private_rate: float = 1.0,
+        private_capacity: float = 3.0,
+        group_rate: float = 20.0 / 60,
+        group_capacity: float = 5.0,
+        idle_timeout: float = 300.0
+    ):
+        self.global_bucket = TokenBucketRateLimiter(global_rate, global_capacity)
+        self.private_rate = private_rate
+        self.private_capacity = private_capacity
+        self.group_rate = group_rate
+        self.group_capacity = group_capacity
+        self.idle_timeout = idle_timeout
+        
+        self._chat_buckets: Dict[int, TokenBucketRateLimiter] = {}
+        self._last_sweep = time.monotonic()
+    
+    def _chat_bucket(self, chat_id: int) -> TokenBucketRateLimiter:
+        """Get or lazily create a chat's bucket (negative IDs are groups)"""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                bucket = TokenBucketRateLimiter(self.group_rate, self.group_capacity)
+            else:
+                bucket = TokenBucketRateLimiter(self.private_rate, self.private_capacity)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+    
+    def _sweep_idle(self):
+        """Drop chat buckets nobody has used for idle_timeout seconds"""
+        now = time.monotonic()
+        if now - self._last_sweep < self.idle_timeout:
+            return
+        self._last_sweep = now
+        
+        stale = [
+            chat_id for chat_id, bucket in self._chat_buckets.items()
+            if now - bucket.last_update >= self.idle_timeout and bucket.is_idle()
+        ]
+        for chat_id in stale:
+            del self._chat_buckets[chat_id]
+        if stale:
+            logger.debug(f"Evicted {len(stale)} idle chat rate buckets")
+    
+    async def acquire(self, chat_id: Optional[int] = None, tokens: int = 1,
+                      priority: int = PRIORITY_NORMAL) -> bool:
+        """
+        Acquire tokens for one message to a chat
+        
+        Args:
+            chat_id: Target chat (None = global bucket only)
+            tokens: Number of tokens needed (usually 1 per message)
+            priority: Priority class (PRIORITY_BALLOT is served first)
+            
+        Returns:
+            True when tokens acquired (after waiting if needed)
+        """
+        self._sweep_idle()
+        if chat_id is not None:
+            await self._chat_bucket(chat_id).acquire(tokens, priority)
+        return await self.global_bucket.acquire(tokens, priority)
+    
+    def try_acquire(self, chat_id: int, tokens: int = 1) -> bool:
+        """Take tokens only if both buckets can serve them right now
+        
+        Used for best-effort updates (e.g. lobby countdown edits) that
+        should be skipped rather than queued when a chat is throttled.
+        """
+        bucket = self._chat_bucket(chat_id)
+        for limiter in (bucket, self.global_bucket):
+            limiter._refill()
+            if limiter.tokens < tokens or limiter._waiting_count():
+                return False
+        bucket.tokens -= tokens
+        self.global_bucket.tokens -= tokens
+        return True
+    
+    def report_retry_after(self, chat_id: Optional[int], retry_after: float):
+        """Feed a RetryAfter back: pause and slow the chat, nudge the global rate down"""
+        if chat_id is not None:
+            self._chat_bucket(chat_id).backoff(retry_after)
+            self.global_bucket.backoff(factor=0.9)
+        else:
+            self.global_bucket.backoff(retry_after)
+    
+    def report_success(self, chat_id: Optional[int]):
+        """Let rates recover after a successful send"""
+        if chat_id is not None:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket:
+                bucket.recover()
+        self.global_bucket.recover()
+    
+    def get_wait_histogram(self) -> Dict[str, Dict[str, int]]:
+        """Get global acquire wait times per priority class"""
+        return self.global_bucket.get_wait_histogram()
+    
+    def get_status(self) -> dict:
+        """Get current rate limiter status (global bucket plus chat count)"""
+        status = self.global_bucket.get_status()
+        status['chats'] = len(self._chat_buckets)
+        return status
 
+
+# Global rate limiter instance
+rate_limiter = HierarchicalRateLimiter(
+    global_rate=config.TELEGRAM_GLOBAL_RATE,
+    private_rate=config.TELEGRAM_PRIVATE_RATE,
+    group_rate=config.TELEGRAM_GROUP_RATE_PER_MIN / 60
+)
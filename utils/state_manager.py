@@ -1,12 +1,14 @@
 """
 State Management System
-Persistent state management with database backend
+Persistent state management with in-memory hot state and write-behind to the database
 """
+import asyncio
 import logging
 import json
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Tuple
 from database.db_manager import db_manager
+import config
 
 logger = logging.getLogger(__name__)
 
@@ -32,10 +34,151 @@ class UserState(Enum):
 
 
 class StateManager:
-    """Manages game and user states with database persistence"""
+    """Manages game and user states with database persistence
     
-    def __init__(self):
+    Hot state lives in memory and reads are served from there. Writes mark
+    the key dirty and a debounced flush persists the latest value per key
+    with a single INSERT ... ON CONFLICT, so rapid transitions coalesce.
+    Keys missing from memory (e.g. after a restart) are loaded from Postgres.
+    """
+    
+    def __init__(self, flush_delay: float = None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.flush_delay = config.STATE_FLUSH_DELAY if flush_delay is None else flush_delay
+        
+        # chat_id -> {'state': GameState, 'metadata': dict}
+        self._game_states: Dict[int, Dict[str, Any]] = {}
+        # (user_id, chat_id) -> {'state': UserState, 'metadata': dict}
+        self._user_states: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        
+        # Keys written since the last flush
+        self._dirty_games: Set[int] = set()
+        self._dirty_users: Set[Tuple[int, int]] = set()
+        
+        self._flush_task: Optional[asyncio.Task] = None
+        # Serializes flushes and deletes so a DELETE never races a stale upsert
+        self._flush_lock = asyncio.Lock()
+    
+    # ==================== Write-behind ====================
+    
+    def _schedule_flush(self):
+        """Start the debounced flush if one isn't already pending"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+    
+    async def _delayed_flush(self):
+        # Keep going while writes arrive during a flush (or a flush failed)
+        while True:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+            if not db_manager.pool or not (self._dirty_games or self._dirty_users):
+                break
+    
+    async def flush(self) -> bool:
+        """Persist all dirty game and user states
+        
+        Returns:
+            bool: True if everything pending was written
+        """
+        async with self._flush_lock:
+            if not self._dirty_games and not self._dirty_users:
+                return True
+            if not db_manager.pool:
+                return False
+            
+            game_keys, self._dirty_games = self._dirty_games, set()
+            user_keys, self._dirty_users = self._dirty_users, set()
+            
+            game_rows = [
+                (chat_id, self._game_states[chat_id])
+                for chat_id in game_keys if chat_id in self._game_states
+            ]
+            user_rows = [
+                (key, self._user_states[key])
+                for key in user_keys if key in self._user_states
+            ]
+            
+            try:
+                async with db_manager.pool.acquire() as conn:
+                    if game_rows and user_rows:
+                        async with conn.transaction():
+                            await self._upsert_game_rows(conn, game_rows)
+                            await self._upsert_user_rows(conn, user_rows)
+                    elif game_rows:
+                        await self._upsert_game_rows(conn, game_rows)
+                    else:
+                        await self._upsert_user_rows(conn, user_rows)
+                
+                self.logger.debug(
+                    f"State flush: {len(game_rows)} game state(s), {len(user_rows)} user state(s)"
+                )
+                return True
+                
+            except Exception as e:
+                # Keep the keys dirty so the next flush retries them
+                self._dirty_games |= game_keys
+                self._dirty_users |= user_keys
+                self.logger.error(f"Error flushing states: {e}", exc_info=True)
+                return False
+    
+    @staticmethod
+    async def _upsert_game_rows(conn, rows: List[Tuple[int, Dict[str, Any]]]):
+        """Upsert (chat_id, entry) rows in one statement"""
+        await conn.execute(
+            """
+            INSERT INTO game_states (chat_id, state, metadata, updated_at)
+            SELECT t.chat_id, t.state, t.metadata::jsonb, NOW()
+            FROM UNNEST($1::bigint[], $2::text[], $3::text[])
+                AS t(chat_id, state, metadata)
+            ON CONFLICT (chat_id) DO UPDATE
+            SET state = EXCLUDED.state,
+                metadata = EXCLUDED.metadata,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [chat_id for chat_id, _ in rows],
+            [entry['state'].value for _, entry in rows],
+            [json.dumps(entry['metadata']) for _, entry in rows]
+        )
+    
+    @staticmethod
+    async def _upsert_user_rows(conn, rows: List[Tuple[Tuple[int, int], Dict[str, Any]]]):
+        """Upsert ((user_id, chat_id), entry) rows in one statement"""
+        await conn.execute(
+            """
+            INSERT INTO user_states (user_id, chat_id, state, metadata, updated_at)
+            SELECT t.user_id, t.chat_id, t.state, t.metadata::jsonb, NOW()
+            FROM UNNEST($1::bigint[], $2::bigint[], $3::text[], $4::text[])
+                AS t(user_id, chat_id, state, metadata)
+            ON CONFLICT (user_id, chat_id) DO UPDATE
+            SET state = EXCLUDED.state,
+                metadata = EXCLUDED.metadata,
+                updated_at = EXCLUDED.updated_at
+            """,
+            [user_id for (user_id, _), _ in rows],
+            [chat_id for (_, chat_id), _ in rows],
+            [entry['state'].value for _, entry in rows],
+            [json.dumps(entry['metadata']) for _, entry in rows]
+        )
+    
+    async def close(self):
+        """Cancel the pending timer and write everything still dirty"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+    
+    @staticmethod
+    def _parse_metadata(metadata) -> Dict[str, Any]:
+        """Parse JSON string back to dict"""
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        return metadata or {}
+    
+    # ==================== Game State ====================
     
     async def set_game_state(self, chat_id: int, state: GameState, metadata: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -49,49 +192,12 @@ class StateManager:
         Returns:
             bool: Success status
         """
-        try:
-            # Store state in database
-            conn = await db_manager.pool.acquire()
-            try:
-                # Check if state record exists
-                existing = await conn.fetchval(
-                    "SELECT chat_id FROM game_states WHERE chat_id = $1",
-                    chat_id
-                )
-                
-                if existing:
-                    # Update existing state
-                    await conn.execute(
-                        """
-                        UPDATE game_states 
-                        SET state = $1, metadata = $2::jsonb, updated_at = NOW()
-                        WHERE chat_id = $3
-                        """,
-                        state.value,
-                        json.dumps(metadata or {}),
-                        chat_id
-                    )
-                else:
-                    # Insert new state
-                    await conn.execute(
-                        """
-                        INSERT INTO game_states (chat_id, state, metadata, updated_at)
-                        VALUES ($1, $2, $3::jsonb, NOW())
-                        """,
-                        chat_id,
-                        state.value,
-                        json.dumps(metadata or {})
-                    )
-                
-                self.logger.info(f"Game state set: chat_id={chat_id}, state={state.value}")
-                return True
-                
-            finally:
-                await db_manager.pool.release(conn)
-                
-        except Exception as e:
-            self.logger.error(f"Error setting game state for chat {chat_id}: {e}", exc_info=True)
-            return False
+        self._game_states[chat_id] = {'state': state, 'metadata': dict(metadata or {})}
+        self._dirty_games.add(chat_id)
+        self._schedule_flush()
+        
+        self.logger.info(f"Game state set: chat_id={chat_id}, state={state.value}")
+        return True
     
     async def get_game_state(self, chat_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -100,33 +206,31 @@ class StateManager:
         Returns:
             Dict with 'state' and 'metadata' or None
         """
-        try:
-            conn = await db_manager.pool.acquire()
+        entry = self._game_states.get(chat_id)
+        if entry is None:
             try:
-                result = await conn.fetchrow(
-                    "SELECT state, metadata FROM game_states WHERE chat_id = $1",
-                    chat_id
-                )
-                
-                if result:
-                    # Parse JSON string back to dict
-                    metadata = result['metadata']
-                    if isinstance(metadata, str):
-                        metadata = json.loads(metadata)
-                    return {
-                        'state': GameState(result['state']),
-                        'metadata': metadata or {}
-                    }
-                
+                async with db_manager.pool.acquire() as conn:
+                    result = await conn.fetchrow(
+                        "SELECT state, metadata FROM game_states WHERE chat_id = $1",
+                        chat_id
+                    )
+            except Exception as e:
+                self.logger.error(f"Error getting game state for chat {chat_id}: {e}", exc_info=True)
+                return {'state': GameState.ERROR, 'metadata': {}}
+            
+            if not result:
                 # Default state if not found
                 return {'state': GameState.IDLE, 'metadata': {}}
-                
-            finally:
-                await db_manager.pool.release(conn)
-                
-        except Exception as e:
-            self.logger.error(f"Error getting game state for chat {chat_id}: {e}", exc_info=True)
-            return {'state': GameState.ERROR, 'metadata': {}}
+            
+            # A write may have landed while we were reading
+            entry = self._game_states.setdefault(chat_id, {
+                'state': GameState(result['state']),
+                'metadata': self._parse_metadata(result['metadata'])
+            })
+        
+        return {'state': entry['state'], 'metadata': dict(entry['metadata'])}
+    
+    # ==================== User State ====================
     
     async def set_user_state(self, user_id: int, chat_id: int, state: UserState, 
                             metadata: Optional[Dict[str, Any]] = None) -> bool:
@@ -142,50 +246,61 @@ class StateManager:
         Returns:
             bool: Success status
         """
-        try:
-            conn = await db_manager.pool.acquire()
-            try:
-                # Check if state record exists
-                existing = await conn.fetchval(
-                    "SELECT user_id FROM user_states WHERE user_id = $1 AND chat_id = $2",
-                    user_id, chat_id
-                )
-                
-                if existing:
-                    # Update existing state
-                    await conn.execute(
-                        """
-                        UPDATE user_states 
-                        SET state = $1, metadata = $2::jsonb, updated_at = NOW()
-                        WHERE user_id = $3 AND chat_id = $4
-                        """,
-                        state.value,
-                        json.dumps(metadata or {}),
-                        user_id,
-                        chat_id
-                    )
-                else:
-                    # Insert new state
-                    await conn.execute(
-                        """
-                        INSERT INTO user_states (user_id, chat_id, state, metadata, updated_at)
-                        VALUES ($1, $2, $3, $4::jsonb, NOW())
-                        """,
-                        user_id,
-                        chat_id,
-                        state.value,
-                        json.dumps(metadata or {})
-                    )
-                
-                self.logger.debug(f"User state set: user_id={user_id}, chat_id={chat_id}, state={state.value}")
-                return True
-                
-            finally:
-                await db_manager.pool.release(conn)
-                
-        except Exception as e:
-            self.logger.error(f"Error setting user state: user_id={user_id}, chat_id={chat_id}: {e}", exc_info=True)
-            return False
+        key = (user_id, chat_id)
+        self._user_states[key] = {'state': state, 'metadata': dict(metadata or {})}
+        self._dirty_users.add(key)
+        self._schedule_flush()
+        
+        self.logger.debug(f"User state set: user_id={user_id}, chat_id={chat_id}, state={state.value}")
+        return True
+    
+    async def set_user_states_bulk(self, chat_id: int,
+                                   states: Dict[int, Tuple[UserState, Optional[Dict[str, Any]]]],
+                                   flush_now: bool = False) -> bool:
+        """
+        Set state for many users in a chat at once (e.g. a whole team or game)
+        
+        All users are written by the same UNNEST upsert on the next flush.
+        
+        Args:
+            chat_id: Telegram chat ID
+            states: {user_id: (UserState, metadata or None)}
+            flush_now: Persist immediately instead of waiting for the debounce
+        
+        Returns:
+            bool: Success status (False only if flush_now and the write failed)
+        """
+        for user_id, (state, metadata) in states.items():
+            key = (user_id, chat_id)
+            self._user_states[key] = {'state': state, 'metadata': dict(metadata or {})}
+            self._dirty_users.add(key)
+        
+        self.logger.debug(f"User states set in bulk: chat_id={chat_id}, users={len(states)}")
+        
+        if flush_now:
+            return await self.flush()
+        self._schedule_flush()
+        return True
+    
+    async def set_players_state(self, chat_id: int, user_ids: List[int], state: UserState,
+                                metadata: Optional[Dict[str, Any]] = None,
+                                flush_now: bool = False) -> bool:
+        """
+        Move every listed player to the same state
+        
+        Args:
+            chat_id: Telegram chat ID
+            user_ids: Players to update
+            state: UserState enum
+            metadata: Optional metadata shared by all players
+            flush_now: Persist immediately instead of waiting for the debounce
+        
+        Returns:
+            bool: Success status
+        """
+        return await self.set_user_states_bulk(
+            chat_id, {user_id: (state, metadata) for user_id in user_ids}, flush_now=flush_now
+        )
     
     async def get_user_state(self, user_id: int, chat_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -194,67 +309,66 @@ class StateManager:
         Returns:
             Dict with 'state' and 'metadata' or None
         """
-        try:
-            conn = await db_manager.pool.acquire()
+        key = (user_id, chat_id)
+        entry = self._user_states.get(key)
+        if entry is None:
             try:
-                result = await conn.fetchrow(
-                    "SELECT state, metadata FROM user_states WHERE user_id = $1 AND chat_id = $2",
-                    user_id, chat_id
-                )
-                
-                if result:
-                    # Parse JSON string back to dict
-                    metadata = result['metadata']
-                    if isinstance(metadata, str):
-                        metadata = json.loads(metadata)
-                    return {
-                        'state': UserState(result['state']),
-                        'metadata': metadata or {}
-                    }
-                
+                async with db_manager.pool.acquire() as conn:
+                    result = await conn.fetchrow(
+                        "SELECT state, metadata FROM user_states WHERE user_id = $1 AND chat_id = $2",
+                        user_id, chat_id
+                    )
+            except Exception as e:
+                self.logger.error(f"Error getting user state: user_id={user_id}, chat_id={chat_id}: {e}", exc_info=True)
+                return {'state': UserState.MENU, 'metadata': {}}
+            
+            if not result:
                 # Default state if not found
                 return {'state': UserState.MENU, 'metadata': {}}
-                
-            finally:
-                await db_manager.pool.release(conn)
-                
-        except Exception as e:
-            self.logger.error(f"Error getting user state: user_id={user_id}, chat_id={chat_id}: {e}", exc_info=True)
-            return {'state': UserState.MENU, 'metadata': {}}
+            
+            entry = self._user_states.setdefault(key, {
+                'state': UserState(result['state']),
+                'metadata': self._parse_metadata(result['metadata'])
+            })
+        
+        return {'state': entry['state'], 'metadata': dict(entry['metadata'])}
+    
+    # ==================== Cleanup ====================
     
     async def clear_game_state(self, chat_id: int) -> bool:
         """Clear game state (after game ends or cancellation)"""
-        try:
-            conn = await db_manager.pool.acquire()
+        async with self._flush_lock:
+            self._game_states.pop(chat_id, None)
+            self._dirty_games.discard(chat_id)
             try:
-                await conn.execute(
-                    "DELETE FROM game_states WHERE chat_id = $1",
-                    chat_id
-                )
+                async with db_manager.pool.acquire() as conn:
+                    await conn.execute(
+                        "DELETE FROM game_states WHERE chat_id = $1",
+                        chat_id
+                    )
                 self.logger.info(f"Game state cleared for chat_id={chat_id}")
                 return True
-            finally:
-                await db_manager.pool.release(conn)
-        except Exception as e:
-            self.logger.error(f"Error clearing game state for chat {chat_id}: {e}", exc_info=True)
-            return False
+            except Exception as e:
+                self.logger.error(f"Error clearing game state for chat {chat_id}: {e}", exc_info=True)
+                return False
     
     async def clear_user_states(self, chat_id: int) -> bool:
         """Clear all user states for a chat (after game ends)"""
-        try:
-            conn = await db_manager.pool.acquire()
+        async with self._flush_lock:
+            for key in [key for key in self._user_states if key[1] == chat_id]:
+                del self._user_states[key]
+            self._dirty_users = {key for key in self._dirty_users if key[1] != chat_id}
             try:
-                await conn.execute(
-                    "DELETE FROM user_states WHERE chat_id = $1",
-                    chat_id
-                )
+                async with db_manager.pool.acquire() as conn:
+                    await conn.execute(
+                        "DELETE FROM user_states WHERE chat_id = $1",
+                        chat_id
+                    )
                 self.logger.info(f"User states cleared for chat_id={chat_id}")
                 return True
-            finally:
-                await db_manager.pool.release(conn)
-        except Exception as e:
-            self.logger.error(f"Error clearing user states for chat {chat_id}: {e}", exc_info=True)
-            return False
+            except Exception as e:
+                self.logger.error(f"Error clearing user states for chat {chat_id}: {e}", exc_info=True)
+                return False
     
     async def init_state_tables(self):
         """Initialize state management tables in database"""
@@ -0,0 +1,132 @@
+"""
+Team Chat Relay
+Forwards private messages to teammates through the shared delivery pipeline,
+merging a burst of messages from one sender into one relay message
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Set
+from telegram import Bot
+from utils.message_delivery import message_delivery
+from utils.rate_limiter import PRIORITY_CHAT
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than this
+TELEGRAM_MAX_CHARS = 4096
+# Keep merged relay messages well under the limit, leaving room for the header
+MAX_BATCH_CHARS = 3500
+
+
+class PendingRelay:
+    """Messages from one sender waiting to be relayed"""
+
+    def __init__(self, team_name: str, sender_name: str, team_players: List[Dict[str, Any]]):
+        self.team_name = team_name
+        self.sender_name = sender_name
+        self.team_players = team_players
+        self.texts: List[str] = []
+        self.length = 0
+
+    def add(self, text: str):
+        self.texts.append(text)
+        self.length += len(text) + 1
+
+    def render(self) -> str:
+        """Format the relay message (no Markdown to avoid parsing errors)"""
+        text = f"💬 {self.team_name} - by {self.sender_name}\n\n" + "\n".join(self.texts)
+        # Only an unusually long header can push a full batch past the limit
+        return text[:TELEGRAM_MAX_CHARS]
+
+
+class TeamChatRelay:
+    """Batches each sender's messages and fans them out to teammates concurrently
+
+    relay() returns immediately; every sender gets its own flush task, so
+    teams relay in parallel and the handler never waits on delivery. Sends
+    go at PRIORITY_CHAT so chat never delays ballots or notifications.
+    """
+
+    def __init__(self, batch_delay: float = 0.7):
+        """
+        Args:
+            batch_delay: Seconds to gather a sender's messages into one relay
+        """
+        self.batch_delay = batch_delay
+        # sender_id -> messages waiting to be relayed
+        self._pending: Dict[int, PendingRelay] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
+        # Sends started by a full batch, kept referenced until they finish
+        self._sending: Set[asyncio.Task] = set()
+
+    def relay(self, bot: Bot, sender_id: int, sender_name: str, team_name: str,
+              team_players: List[Dict[str, Any]], text: str):
+        """Queue a sender's message for their teammates
+
+        A message longer than MAX_BATCH_CHARS is split into several relays.
+        """
+        for start in range(0, max(len(text), 1), MAX_BATCH_CHARS):
+            part = text[start:start + MAX_BATCH_CHARS]
+            pending = self._pending.get(sender_id)
+            if pending and pending.length + len(part) > MAX_BATCH_CHARS:
+                # Batch full - send what we have and start a new one
+                self._start_flush(bot, sender_id)
+                pending = None
+
+            if pending is None:
+                pending = PendingRelay(team_name, sender_name, team_players)
+                self._pending[sender_id] = pending
+            pending.add(part)
+
+        if sender_id not in self._flush_tasks:
+            self._flush_tasks[sender_id] = asyncio.create_task(
+                self._delayed_flush(bot, sender_id)
+            )
+
+    def _start_flush(self, bot: Bot, sender_id: int):
+        task = self._flush_tasks.pop(sender_id, None)
+        if task:
+            task.cancel()
+        pending = self._pending.pop(sender_id, None)
+        if pending:
+            task = asyncio.create_task(self._send(bot, sender_id, pending))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _delayed_flush(self, bot: Bot, sender_id: int):
+        try:
+            await asyncio.sleep(self.batch_delay)
+        finally:
+            self._flush_tasks.pop(sender_id, None)
+        pending = self._pending.pop(sender_id, None)
+        if pending:
+            await self._send(bot, sender_id, pending)
+
+    async def _send(self, bot: Bot, sender_id: int, pending: PendingRelay):
+        """Send one relay message to every teammate except the sender"""
+        text = pending.render()
+        recipients = [
+            {'chat_id': player['user_id'], 'text': text}
+            for player in pending.team_players
+            if player.get('user_id') != sender_id
+        ]
+        if not recipients:
+            return
+
+        try:
+            results = await message_delivery.send_parallel(
+                bot, recipients, priority=PRIORITY_CHAT
+            )
+        except Exception as e:
+            logger.error(f"Failed to relay team chat from {sender_id}: {e}")
+            return
+
+        sent_count = sum(1 for message in results.values() if message)
+        logger.debug(
+            f"Team chat forwarded {len(pending.texts)} message(s) "
+            f"to {sent_count}/{len(recipients)} team members"
+        )
+
+
+# Global team chat relay instance
+team_chat_relay = TeamChatRelay()
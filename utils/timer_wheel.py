@@ -0,0 +1,309 @@
+"""
+Hierarchical Timer Wheel
+One scheduler for every game deadline (lobby countdowns, round deadlines,
+result reveal pauses) instead of one sleeping task or loop timer per wait
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 4 levels of 64 slots: with 0.1 s ticks the wheel spans ~19 days
+WHEEL_BITS = 6
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4
+
+_PENDING = 0
+_FIRED = 1
+_CANCELLED = 2
+
+
+class TimerHandle:
+    """A scheduled callback; cancel() or reschedule it through the wheel"""
+
+    __slots__ = ('wheel', 'key', 'callback', 'args', 'deadline', 'expires_tick', 'generation', 'state')
+
+    def __init__(self, wheel: 'TimerWheel', key: Optional[Hashable],
+                 callback: Callable, args: Tuple[Any, ...]):
+        self.wheel = wheel
+        self.key = key
+        self.callback = callback
+        self.args = args
+        self.deadline = 0.0
+        self.expires_tick = 0
+        # Bumped on every (re)schedule so stale slot entries are skipped
+        self.generation = 0
+        self.state = _PENDING
+
+    def cancel(self) -> bool:
+        """Cancel the timer; returns False if it already fired or was cancelled"""
+        return self.wheel.cancel(self)
+
+    def done(self) -> bool:
+        return self.state != _PENDING
+
+    def cancelled(self) -> bool:
+        return self.state == _CANCELLED
+
+    @property
+    def fired(self) -> bool:
+        return self.state == _FIRED
+
+    def remaining(self) -> float:
+        """Seconds until the timer fires (0 once it is done)"""
+        if self.state != _PENDING:
+            return 0.0
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class TimerWheel:
+    """Hierarchical hashed timer wheel driven by a single task
+
+    Timers are bucketed by expiry tick into 4 levels of 64 slots; a slot of
+    a higher level is cascaded down when the lower level wraps around, so
+    scheduling and cancelling are O(1) and each tick touches only timers
+    that are due. The driver task only runs while timers are pending and
+    never fires a timer early (expiry is rounded up to the next tick).
+
+    Callbacks may be plain functions or coroutine functions; coroutines
+    are run as tasks so a slow callback never delays the wheel.
+    """
+
+    def __init__(self, tick: float = 0.1):
+        """
+        Args:
+            tick: Wheel resolution in seconds
+        """
+        self.tick = tick
+        self._origin = time.monotonic()
+        self._current_tick = 0
+        # level -> slot -> [(generation, handle), ...]
+        self._levels: List[List[List[Tuple[int, TimerHandle]]]] = [
+            [[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)
+        ]
+        # Beyond the top level; re-placed whenever the top level wraps
+        self._overflow: List[Tuple[int, TimerHandle]] = []
+        self._keyed: Dict[Hashable, TimerHandle] = {}
+        self._pending = 0
+        self._driver: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self.fired_total = 0
+        self.cancelled_total = 0
+
+    # ==================== Scheduling ====================
+
+    def schedule(self, delay: float, callback: Callable, *args,
+                 key: Optional[Hashable] = None) -> TimerHandle:
+        """Run callback(*args) after delay seconds
+
+        Args:
+            delay: Seconds from now
+            callback: Function or coroutine function
+            key: Optional name for introspection; scheduling an existing
+                key replaces its pending timer
+
+        Returns:
+            Handle to cancel or reschedule the timer
+        """
+        if key is not None:
+            previous = self._keyed.get(key)
+            if previous is not None:
+                self.cancel(previous)
+        handle = TimerHandle(self, key, callback, args)
+        self._arm(handle, delay)
+        return handle
+
+    def reschedule(self, handle: TimerHandle, delay: float) -> TimerHandle:
+        """Move a timer (pending or already fired) to delay seconds from now"""
+        if handle.state == _PENDING:
+            self._pending -= 1
+        if handle.key is not None and self._keyed.get(handle.key) not in (None, handle):
+            self.cancel(self._keyed[handle.key])
+        handle.state = _PENDING
+        self._arm(handle, delay)
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> bool:
+        """Cancel a pending timer"""
+        if handle.state != _PENDING:
+            return False
+        handle.state = _CANCELLED
+        self._pending -= 1
+        self.cancelled_total += 1
+        if handle.key is not None and self._keyed.get(handle.key) is handle:
+            del self._keyed[handle.key]
+        return True
+
+    def cancel_key(self, key: Hashable) -> bool:
+        """Cancel the pending timer registered under key"""
+        handle = self._keyed.get(key)
+        return self.cancel(handle) if handle else False
+
+    def get(self, key: Hashable) -> Optional[TimerHandle]:
+        """Get the pending timer registered under key"""
+        return self._keyed.get(key)
+
+    async def sleep(self, delay: float):
+        """Sleep on the wheel (no per-sleep loop timer)"""
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        handle = self.schedule(delay, self._wake, future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    def _arm(self, handle: TimerHandle, delay: float):
+        now = time.monotonic()
+        self._sync_origin_if_idle(now)
+        handle.deadline = now + max(0.0, delay)
+        # Round up so a timer never fires before its deadline
+        expires = -int(-(handle.deadline - self._origin) // self.tick)
+        handle.expires_tick = max(expires, self._current_tick + 1)
+        handle.generation += 1
+        self._place(handle)
+        self._pending += 1
+        if handle.key is not None:
+            self._keyed[handle.key] = handle
+        self._ensure_driver()
+
+    def _sync_origin_if_idle(self, now: float):
+        """Catch the tick counter up to the clock while the driver is stopped"""
+        if self._driver is None or self._driver.done():
+            self._advance_to(int((now - self._origin) // self.tick))
+
+    def _place(self, handle: TimerHandle):
+        entry = (handle.generation, handle)
+        expires = handle.expires_tick
+        current = self._current_tick
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * (level + 1)
+            if (expires >> shift) == (current >> shift):
+                slot = (expires >> (WHEEL_BITS * level)) & WHEEL_MASK
+                self._levels[level][slot].append(entry)
+                return
+        self._overflow.append(entry)
+
+    # ==================== Driver ====================
+
+    def _ensure_driver(self):
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._drive())
+
+    async def _drive(self):
+        """Advance the wheel in real time while timers are pending"""
+        while self._pending > 0:
+            self._advance_to(int((time.monotonic() - self._origin) // self.tick))
+            if self._pending <= 0:
+                break
+            next_tick_at = self._origin + (self._current_tick + 1) * self.tick
+            await asyncio.sleep(max(0.0, next_tick_at - time.monotonic()))
+
+    def _advance_to(self, target_tick: int):
+        """Process every tick up to target_tick, skipping empty stretches"""
+        while self._current_tick < target_tick:
+            if self._pending <= 0:
+                # Nothing scheduled: jump straight to the target
+                self._current_tick = target_tick
+                for level in self._levels:
+                    for slot in level:
+                        slot.clear()
+                self._overflow.clear()
+                return
+            self._current_tick += 1
+            self._cascade()
+            self._fire_slot()
+
+    def _cascade(self):
+        """Move timers of higher levels down when the level below wraps"""
+        tick = self._current_tick
+        top = 0
+        while top + 1 < WHEEL_LEVELS and tick & ((1 << (WHEEL_BITS * (top + 1))) - 1) == 0:
+            top += 1
+        if top == WHEEL_LEVELS - 1 and tick & ((1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1) == 0:
+            overflow, self._overflow = self._overflow, []
+            self._replace(overflow)
+        for level in range(top, 0, -1):
+            slot_index = (tick >> (WHEEL_BITS * level)) & WHEEL_MASK
+            entries = self._levels[level][slot_index]
+            self._levels[level][slot_index] = []
+            self._replace(entries)
+
+    def _replace(self, entries: List[Tuple[int, TimerHandle]]):
+        for generation, handle in entries:
+            if handle.state == _PENDING and handle.generation == generation:
+                self._place(handle)
+
+    def _fire_slot(self):
+        slot_index = self._current_tick & WHEEL_MASK
+        entries = self._levels[0][slot_index]
+        if not entries:
+            return
+        self._levels[0][slot_index] = []
+        for generation, handle in entries:
+            if handle.state != _PENDING or handle.generation != generation:
+                continue
+            if handle.expires_tick > self._current_tick:
+                # Not due in this rotation (defensive; placement prevents it)
+                self._place(handle)
+                continue
+            self._fire(handle)
+
+    def _fire(self, handle: TimerHandle):
+        handle.state = _FIRED
+        self._pending -= 1
+        self.fired_total += 1
+        if handle.key is not None and self._keyed.get(handle.key) is handle:
+            del self._keyed[handle.key]
+        try:
+            result = handle.callback(*handle.args)
+            if asyncio.iscoroutine(result):
+                task = asyncio.create_task(result)
+                self._running.add(task)
+                task.add_done_callback(self._callback_done)
+        except Exception as e:
+            logger.error(f"Timer callback {handle.key or handle.callback} failed: {e}")
+
+    def _callback_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Timer callback task failed: {task.exception()}")
+
+    # ==================== Introspection ====================
+
+    def pending(self, prefix: Optional[str] = None) -> Dict[Hashable, float]:
+        """Get named pending timers and the seconds left on each
+
+        Args:
+            prefix: Only keys that are strings starting with prefix
+        """
+        return {
+            key: handle.remaining() for key, handle in self._keyed.items()
+            if prefix is None or (isinstance(key, str) and key.startswith(prefix))
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get wheel gauges"""
+        return {
+            'pending': self._pending,
+            'named': len(self._keyed),
+            'running_callbacks': len(self._running),
+            'fired_total': self.fired_total,
+            'cancelled_total': self.cancelled_total,
+            'tick': self.tick
+        }
+
+
+# Global timer wheel instance
+timer_wheel = TimerWheel()
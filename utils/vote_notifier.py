@@ -0,0 +1,160 @@
+"""
+Vote Notification Aggregator
+Keeps one live "Vote Update" message per teammate per round and edits it
+in place, instead of sending a new DM to every teammate on every vote
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from telegram import Bot
+from telegram.error import BadRequest
+from utils.message_delivery import message_delivery
+from utils.rate_limiter import PRIORITY_NOTIFICATION
+
+logger = logging.getLogger(__name__)
+
+# (game_id, round_number, team_id)
+TeamRoundKey = Tuple[int, int, int]
+
+
+class TeamRoundStatus:
+    """Votes and live status messages of one team in one round"""
+
+    def __init__(self, team_name: str, role_name: str, team_players: List[Dict[str, Any]]):
+        self.team_name = team_name
+        self.role_name = role_name
+        self.team_players = team_players
+        # voter_id -> (voter_name, character_name); latest vote wins
+        self.votes: Dict[int, Tuple[str, str]] = {}
+        # recipient_id -> status message ID
+        self.message_ids: Dict[int, int] = {}
+        # recipient_id -> text last delivered (skip edits that change nothing)
+        self.last_text: Dict[int, str] = {}
+        self.flush_task: Optional[asyncio.Task] = None
+        # Serializes flushes so a slow send can't race the next edit
+        self.lock = asyncio.Lock()
+
+    def render(self) -> str:
+        """Build the team's vote status text"""
+        lines = [f"📢 **{self.team_name} Vote Update**", "", f"👑 **{self.role_name}**", ""]
+        for player in self.team_players:
+            vote = self.votes.get(player['user_id'])
+            if vote:
+                voter_name, char_name = vote
+                lines.append(f"✅ @{voter_name} → **{char_name}**")
+        waiting = len(self.team_players) - len(self.votes)
+        if waiting > 0:
+            lines.append("")
+            lines.append(f"⏳ {waiting} ဦး vote မပေးရသေးပါ")
+        return "\n".join(lines)
+
+    def recipients(self) -> List[int]:
+        """Teammates who have a vote from someone else to see"""
+        return [
+            player['user_id'] for player in self.team_players
+            if any(voter_id != player['user_id'] for voter_id in self.votes)
+        ]
+
+
+class VoteNotifier:
+    """Debounces vote notifications and edits status messages in place
+
+    notify() only records the vote and schedules a flush, so the voter's
+    callback never waits on teammate delivery. One flush per debounce window
+    sends or edits every teammate's status message concurrently.
+    """
+
+    def __init__(self, flush_delay: float = 1.5):
+        """
+        Args:
+            flush_delay: Seconds to gather votes before updating teammates
+        """
+        self.flush_delay = flush_delay
+        self._teams: Dict[TeamRoundKey, TeamRoundStatus] = {}
+
+    def notify(self, bot: Bot, game_id: int, round_number: int, team_id: int,
+               team_players: List[Dict[str, Any]], team_name: str, role_name: str,
+               voter_id: int, voter_name: str, character_name: str):
+        """Record a vote and schedule the team's status update"""
+        key = (game_id, round_number, team_id)
+        status = self._teams.get(key)
+        if status is None:
+            status = TeamRoundStatus(team_name, role_name, team_players)
+            self._teams[key] = status
+
+        status.votes[voter_id] = (voter_name, character_name)
+
+        if status.flush_task is None or status.flush_task.done():
+            status.flush_task = asyncio.create_task(self._delayed_flush(bot, status))
+
+    async def _delayed_flush(self, bot: Bot, status: TeamRoundStatus):
+        await asyncio.sleep(self.flush_delay)
+        status.flush_task = None
+        await self.flush(bot, status)
+
+    async def flush(self, bot: Bot, status: TeamRoundStatus):
+        """Send or edit every teammate's status message at once"""
+        async with status.lock:
+            await self._flush_locked(bot, status)
+
+    async def _flush_locked(self, bot: Bot, status: TeamRoundStatus):
+        text = status.render()
+        new_recipients = []
+        edits = []
+
+        for recipient_id in status.recipients():
+            if status.last_text.get(recipient_id) == text:
+                continue
+            if recipient_id in status.message_ids:
+                edits.append(recipient_id)
+            else:
+                new_recipients.append({'chat_id': recipient_id, 'text': text})
+
+        async def send_new():
+            if not new_recipients:
+                return
+            sent = await message_delivery.send_parallel(
+                bot, new_recipients, priority=PRIORITY_NOTIFICATION, parse_mode='Markdown'
+            )
+            for recipient_id, message in sent.items():
+                if message:
+                    status.message_ids[recipient_id] = message.message_id
+                    status.last_text[recipient_id] = text
+
+        async def edit(recipient_id: int):
+            try:
+                message = await message_delivery.edit_message_text(
+                    bot,
+                    chat_id=recipient_id,
+                    message_id=status.message_ids[recipient_id],
+                    text=text,
+                    priority=PRIORITY_NOTIFICATION,
+                    parse_mode='Markdown'
+                )
+                if message:
+                    status.last_text[recipient_id] = text
+            except BadRequest as e:
+                if "message is not modified" in str(e).lower():
+                    status.last_text[recipient_id] = text
+                else:
+                    # Message gone - send a fresh one next time
+                    logger.debug(f"Vote status edit failed for {recipient_id}: {e}")
+                    status.message_ids.pop(recipient_id, None)
+            except Exception as e:
+                logger.error(f"Failed to update vote status for {recipient_id}: {e}")
+
+        await asyncio.gather(send_new(), *(edit(recipient_id) for recipient_id in edits))
+        logger.debug(
+            f"Vote status flushed: {len(new_recipients)} sent, {len(edits)} edited"
+        )
+
+    def clear_game(self, game_id: int):
+        """Drop all status tracking for a game"""
+        for key in [key for key in self._teams if key[0] == game_id]:
+            status = self._teams.pop(key)
+            if status.flush_task and not status.flush_task.done():
+                status.flush_task.cancel()
+
+
+# Global vote notifier instance
+vote_notifier = VoteNotifier()
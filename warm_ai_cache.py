@@ -0,0 +1,90 @@
+"""
+Warm the AI response cache
+Precompute Gemini descriptions for every character so gameplay never waits on them
+"""
+import asyncio
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.db_manager import db_manager
+from services.ai_cache import ai_cache
+from services.ai_service import ai_service
+
+
+async def warm_ai_cache(purge: bool = False):
+    """Generate and cache descriptions for the whole characters table
+    
+    Args:
+        purge: Delete expired cache rows first
+    """
+    print("=" * 60)
+    print("Warming AI Cache")
+    print("=" * 60)
+    
+    try:
+        print("\n🔌 Connecting to PostgreSQL...")
+        await db_manager.create_pool()
+        await db_manager.init_database()
+        await ai_cache.init_cache_table()
+        print("✅ Connected")
+        
+        if purge:
+            deleted = await ai_cache.purge_expired()
+            print(f"🧹 Purged {deleted} expired entries")
+        
+        characters = await db_manager.get_all_characters()
+        print(f"\n📊 Characters: {len(characters)}")
+        print("=" * 60)
+        
+        cached = 0
+        generated = 0
+        
+        async def warm_one(character):
+            nonlocal cached, generated
+            key = ai_cache.make_key(
+                'description', ai_service.model_name, ai_service._description_prompt(character)
+            )
+            if await ai_cache.get(key) is not None:
+                cached += 1
+                return
+            await ai_service.generate_character_description(character)
+            if await ai_cache.get(key) is not None:
+                generated += 1
+                print(f"   ✅ {character.name}")
+            else:
+                print(f"   ❌ {character.name} - generation failed")
+        
+        # AIService's semaphore bounds how many requests run at once
+        await asyncio.gather(*(warm_one(character) for character in characters))
+        
+        failed = len(characters) - cached - generated
+        print("\n" + "=" * 60)
+        print("✅ Cache Warm-up Complete!")
+        print("=" * 60)
+        print(f"♻️  Already cached: {cached}")
+        print(f"✨ Generated: {generated}")
+        if failed > 0:
+            print(f"❌ Failed: {failed}")
+        print("=" * 60)
+        
+    except Exception as e:
+        print(f"\n❌ Error: {type(e).__name__}: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    
+    finally:
+        await db_manager.close_pool()
+        print("\n🔌 Connection closed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute AI descriptions for all characters")
+    parser.add_argument('--purge', action='store_true', help="Delete expired cache rows first")
+    args = parser.parse_args()
+    
+    asyncio.run(warm_ai_cache(purge=args.purge))